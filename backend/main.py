@@ -1,5 +1,13 @@
-from fastapi import FastAPI
+import os
+import threading
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from backend.routers import chat_router, data_router, news_router
+from backend.services.parser import get_parser
+from finsage import cassette, prefetch, telemetry
+from finsage.compute import default_executor
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -13,7 +21,82 @@ app.include_router(chat_router.router, prefix="/chat", tags=["Chatbot"])
 app.include_router(data_router.router, prefix="/data", tags=["Data"])
 app.include_router(news_router.router, prefix="/news", tags=["News"])
 
+
+@app.on_event("startup")
+def replay_cassettes():
+    """With FINSAGE_CASSETTE_DIR set, serve upstream calls from recorded cassettes (load tests, offline runs)."""
+    cassette.install_from_env()
+
+
+@app.on_event("startup")
+def warm_compute_pool():
+    """Start compute workers (and load their embedders) before the first request, if enabled."""
+    executor = default_executor()
+    if executor is not None:
+        executor.warmup()
+
+
+@app.on_event("startup")
+def load_ticker_dictionary():
+    """Load the SEC ticker dictionary for the query parser in the background."""
+    threading.Thread(target=get_parser, name="ticker-dictionary", daemon=True).start()
+
+
+_prefetcher = None
+
+
+@app.on_event("startup")
+def start_prefetcher():
+    """With FINSAGE_WATCHLIST set, keep data, filings and news for those tickers warm in the background."""
+    def start():
+        global _prefetcher
+        _prefetcher = prefetch.from_env(chat_router.get_planner())
+        if _prefetcher is not None:
+            _prefetcher.start()
+
+    if os.environ.get("FINSAGE_WATCHLIST"):
+        # Building the planner loads the embedding model; keep it off the startup path.
+        threading.Thread(target=start, name="prefetch-start", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_prefetcher():
+    if _prefetcher is not None:
+        _prefetcher.stop(timeout=1)
+
+
+@app.on_event("shutdown")
+def stop_compute_pool():
+    executor = default_executor()
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Time every request by its route template (e.g. /data/stock/{symbol})."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        labels = {"route": getattr(route, "path", "unmatched"), "method": request.method}
+        telemetry.REGISTRY.observe("finsage_http_request_duration_seconds", labels, time.perf_counter() - start,
+                                   help="Latency of HTTP requests served by the backend.")
+        if status >= 500:
+            telemetry.REGISTRY.inc("finsage_http_request_errors_total", labels, help="HTTP requests answered with 5xx.")
+
+
 # Root endpoint
 @app.get("/")
 def root():
     return {"message": "FinSage AI Backend is running successfully!"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint: agent/upstream latency histograms, error counters and cache hit ratios."""
+    return PlainTextResponse(telemetry.render_prometheus(), media_type=telemetry.CONTENT_TYPE)
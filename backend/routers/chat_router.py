@@ -1,31 +1,115 @@
 # backend/routers/chat_router.py
 
-from fastapi import APIRouter
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import os
+import threading
+
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from backend.services.parser import extract_ticker_or_name, detect_intent
 from backend.agents import planner_agent, data_agent, news_agent, prediction_agent, reasoning_agent
+from finsage import serialize
+from finsage.deadline import Deadline, DeadlineExceeded
+from finsage.planner import Planner, required_stages
 
 router = APIRouter()
 
+# Built on first use: agent construction loads the embedding model. The lock keeps a request
+# racing the startup prefetcher from building a second Planner (and a second model and RAG store).
+_planner = None
+_planner_lock = threading.Lock()
+
+
+def get_planner() -> Planner:
+    global _planner
+    if _planner is None:
+        with _planner_lock:
+            if _planner is None:
+                _planner = Planner()
+    return _planner
+
+
+# Sections of the /chat/ response; "fields" selects a subset and skips the steps behind the rest.
+CHAT_FIELDS = ("intent_detected", "parsed_entities", "plan_generated", "retrieved_data", "summarized_news", "prediction", "final_answer")
+
+
+def _format(body: dict, request: Request) -> str:
+    """Response encoder from the body's "format", else the Accept header (orjson by default)."""
+    return serialize.resolve_format(body.get("format"), request.headers.get("accept"))
+
+
+def _deadline_s(body: dict) -> Optional[float]:
+    """Request latency budget in seconds from "deadline_ms", else FINSAGE_DEADLINE_S; None for no deadline."""
+    if body.get("deadline_ms"):
+        return float(body["deadline_ms"]) / 1e3
+    env = os.environ.get("FINSAGE_DEADLINE_S")
+    return float(env) if env else None
+
+
+def _fields(body: dict) -> Optional[List[str]]:
+    """Requested sections from "fields": a list of names, or one name as a string; None for all."""
+    fields = body.get("fields") or None
+    if isinstance(fields, str):
+        return [fields]
+    if fields is not None and not (isinstance(fields, list) and all(isinstance(f, str) for f in fields)):
+        raise ValueError('"fields" must be a list of section names')
+    return fields
+
+
+def _encoded(payload: Any, fmt: str) -> Response:
+    return Response(serialize.encode(payload, fmt), media_type=serialize.MEDIA_TYPES[fmt])
+
+
 @router.post("/")
-async def chat_with_agent(user_query: dict):
+def chat_with_agent(user_query: dict, request: Request):
     """
     Main chatbot endpoint for intelligent financial query processing.
+    Every step blocks (and Deadline.run waits up to the whole budget), so this
+    runs on the threadpool like /chat/batch rather than on the event loop.
     Expects JSON body:
     {
-        "query": "Should I invest in HDFC Bank?"
+        "query": "Should I invest in HDFC Bank?",
+        "fields": ["final_answer"],  # optional: return (and compute) only these sections
+        "format": "msgpack",         # optional: json | orjson | msgpack (default: Accept header, else orjson)
+        "deadline_ms": 3000          # optional: steps still running then are skipped and listed in "missed_deadline"
     }
     """
 
     query = user_query.get("query", "")
     if not query:
         return {"error": "Query cannot be empty"}
+    try:
+        fmt = _format(user_query, request)
+    except ValueError as e:
+        return {"error": str(e)}
+    try:
+        fields: Optional[set] = set(_fields(user_query) or ()) or None
+    except ValueError as e:
+        return {"error": str(e)}
+    if fields is not None and not fields <= set(CHAT_FIELDS):
+        return {"error": f"Unknown fields: {', '.join(sorted(fields - set(CHAT_FIELDS)))}"}
+    # Every data step feeds final_answer, so only a projection without it can skip them.
+    wants = lambda section: fields is None or "final_answer" in fields or section in fields
+    budget = _deadline_s(user_query)
+    deadline = Deadline(budget) if budget else None
+    missed = []
+
+    def step(name: str, fn: Callable[[], Any]) -> Any:
+        if deadline is None:
+            return fn()
+        try:
+            return deadline.run(fn, name)
+        except DeadlineExceeded:
+            missed.append(name)
+            return None
 
     # Step 1: Parse query → extract name/ticker and intent
     parsed = extract_ticker_or_name(query)
     intent = detect_intent(query)
 
     # Step 2: Generate high-level plan using LLM (planner agent)
-    plan = planner_agent.generate_plan(query, parsed, intent)
+    plan = step("plan", lambda: planner_agent.generate_plan(query, parsed, intent)) or ""
 
     # Step 3: Execute plan
     data = None
@@ -33,28 +117,30 @@ async def chat_with_agent(user_query: dict):
     prediction = None
 
     # 3a. Fetch company/fund data if needed
-    if any(k in plan.lower() for k in ["fundamental", "details", "financials"]):
-        data = data_agent.fetch_data(parsed)
+    if wants("retrieved_data") and any(k in plan.lower() for k in ["fundamental", "details", "financials"]):
+        data = step("retrieved_data", lambda: data_agent.fetch_data(parsed))
 
     # 3b. Get related news summaries
-    if "news" in plan.lower():
-        news = news_agent.get_recent_news(parsed)
+    if wants("summarized_news") and "news" in plan.lower():
+        news = step("summarized_news", lambda: news_agent.get_recent_news(parsed))
 
     # 3c. Predict risk or price
-    if "predict" in plan.lower() or "risk" in plan.lower():
-        prediction = prediction_agent.predict_future(parsed)
+    if wants("prediction") and ("predict" in plan.lower() or "risk" in plan.lower()):
+        prediction = step("prediction", lambda: prediction_agent.predict_future(parsed))
 
     # Step 4: Reasoning agent composes final answer
-    final_answer = reasoning_agent.compose_answer(
-        query=query,
-        plan=plan,
-        data=data,
-        news=news,
-        prediction=prediction,
-    )
+    final_answer = None
+    if wants("final_answer"):
+        final_answer = step("final_answer", lambda: reasoning_agent.compose_answer(
+            query=query,
+            plan=plan,
+            data=data,
+            news=news,
+            prediction=prediction,
+        ))
 
     # Step 5: Return combined output
-    return {
+    response = {
         "user_query": query,
         "intent_detected": intent,
         "parsed_entities": parsed,
@@ -64,3 +150,91 @@ async def chat_with_agent(user_query: dict):
         "prediction": prediction,
         "final_answer": final_answer,
     }
+    if fields is not None:
+        response = {k: v for k, v in response.items() if k == "user_query" or k in fields}
+    if missed:
+        response["partial"] = True
+        response["missed_deadline"] = missed
+    return _encoded(response, fmt)
+
+
+@router.post("/batch")
+def chat_batch(request: dict, http_request: Request):
+    """
+    Batch analysis endpoint. Streams one JSON object per ticker (JSONL) as each completes,
+    or back-to-back msgpack objects with "format": "msgpack".
+    Expects JSON body:
+    {
+        "tickers": ["TSLA", "AAPL", ...],
+        "concurrency": 8,            # optional
+        "peers": ["F", "GM"],        # optional
+        "skip": ["TSLA"],            # optional: tickers already completed by the client (resume)
+        "fields": ["thesis", "risk"],  # optional: return (and compute) only these sections
+        "format": "orjson",            # optional: json | orjson | msgpack
+        "deadline_ms": 5000            # optional: per-ticker budget; late stages are reported as missed
+    }
+    """
+    skip = {t.upper() for t in request.get("skip") or []}
+    tickers = [t.upper() for t in request.get("tickers") or [] if t.upper() not in skip]
+    if not tickers:
+        return {"error": "tickers cannot be empty"}
+    concurrency = max(1, min(int(request.get("concurrency") or 8), 32))
+    try:
+        fields = _fields(request)
+        fmt = _format(request, http_request)
+        required_stages(fields)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    def lines():
+        for res in get_planner().iter_many(
+            tickers, concurrency=concurrency, peers=request.get("peers"), fields=fields, deadline=_deadline_s(request)
+        ):
+            yield serialize.encode(res, fmt) if fmt == "msgpack" else serialize.encode_line(res, fmt)
+
+    return StreamingResponse(lines(), media_type=serialize.MEDIA_TYPES[fmt] if fmt == "msgpack" else "application/x-ndjson")
+
+
+def _stage_events(body: dict) -> Iterator[Dict[str, Any]]:
+    """Planner.stream events for a {"query", "tickers"?, "peers"?, "fields"?, "deadline_ms"?} request."""
+    query = body.get("query", "")
+    tickers = [t.upper() for t in body.get("tickers") or []] or extract_ticker_or_name(query).get("tickers")
+    if not query and not tickers:
+        return iter([{"event": "error", "error": "Query cannot be empty"}])
+    try:
+        fields = _fields(body)
+        required_stages(fields)
+    except ValueError as e:
+        return iter([{"event": "error", "error": str(e)}])
+    return get_planner().stream(
+        query or f"Analyze {tickers[0]}", tickers=tickers, peers=body.get("peers"),
+        fields=fields, deadline=_deadline_s(body),
+    )
+
+
+@router.websocket("/ws")
+async def chat_progressive(websocket: WebSocket):
+    """
+    Progressive results: send {"query": "...", "tickers"?, "peers"?, "fields"?, "deadline_ms"?}
+    and receive each response section as soon as its stage finishes,
+    {"event": "stage", "section": "news", "data": {...}}, then {"event": "done", ...}.
+    Further queries can be sent on the same connection.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            body = await websocket.receive_json()
+            async for event in iterate_in_threadpool(_stage_events(body)):
+                await websocket.send_text(serialize.encode(event, "orjson").decode())
+    except WebSocketDisconnect:
+        pass
+
+
+@router.post("/stream")
+def chat_stream(request: dict):
+    """
+    The /chat/ws event stream over plain HTTP: one JSON event per line (NDJSON),
+    for clients that cannot open a WebSocket.
+    """
+    lines = (serialize.encode_line(event) for event in _stage_events(request))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
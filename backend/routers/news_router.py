@@ -1,7 +1,7 @@
 # backend/routers/news_router.py
 
 from fastapi import APIRouter, Query
-from backend.services.news_fetcher import fetch_latest_news, summarize_news
+from backend.services.news_fetcher import get_recent_news
 
 router = APIRouter(prefix="/news", tags=["News"])
 
@@ -13,12 +13,11 @@ async def get_latest_news(
     Fetch and summarize the latest financial news related to a stock, mutual fund, or market topic.
     """
     try:
-        news_articles = fetch_latest_news(query)
-        summaries = [summarize_news(article) for article in news_articles]
+        news_articles = get_recent_news(query)
         return {
             "query": query,
             "count": len(news_articles),
-            "results": summaries
+            "results": news_articles
         }
     except Exception as e:
         return {"error": str(e)}
@@ -4,20 +4,37 @@ LLM Service — Handles all interactions with OpenAI (or any LLM API).
 
 import os
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
+
+try:
+    from openai import OpenAI
+except Exception:  # pragma: no cover - optional dependency
+    OpenAI = None
+
+try:
+    from dotenv import load_dotenv
+except Exception:  # pragma: no cover - optional dependency
+    load_dotenv = None
 
 # Load environment variables from .env (if not already loaded)
-load_dotenv()
+if load_dotenv is not None:
+    load_dotenv()
 
 # Get API key safely
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-if not OPENAI_API_KEY:
-    raise ValueError("❌ OPENAI_API_KEY not found in environment variables.")
+# Created on first use, so the app (and its other routers) import without OpenAI configured.
+client = None
+
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+def _get_client():
+    global client
+    if client is None:
+        if OpenAI is None:
+            raise ImportError("openai not installed. Install with 'pip install openai'")
+        if not OPENAI_API_KEY:
+            raise ValueError("❌ OPENAI_API_KEY not found in environment variables.")
+        client = OpenAI(api_key=OPENAI_API_KEY)
+    return client
 
 
 def generate_response(prompt: str, model: str = "gpt-4o-mini", temperature: float = 0.5, max_tokens: int = 600) -> str:
@@ -27,7 +44,7 @@ def generate_response(prompt: str, model: str = "gpt-4o-mini", temperature: floa
     """
 
     try:
-        completion = client.chat.completions.create(
+        completion = _get_client().chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": "You are a highly intelligent financial reasoning assistant."},
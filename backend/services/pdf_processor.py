@@ -0,0 +1,214 @@
+# backend/services/pdf_processor.py
+"""
+PDF Processor — parallel PDF ingestion for the RAG store.
+
+Pages are extracted in a process pool, cleaned and chunked as they stream back
+in page order, and inserted into the store in fixed-size batches. At most a
+bounded number of page tasks and one batch of chunks are held in memory at a
+time, so a 500-page annual report costs the same peak memory as a 5-page one.
+
+Benchmark against the bundled sample:
+    python -m backend.services.pdf_processor Experiments/Sample.pdf --repeat 100
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.utils.text_cleaner import clean_text
+
+try:
+    from pypdf import PdfReader
+except Exception:  # pragma: no cover - optional dependency
+    PdfReader = None
+
+# One reader per worker process, opened by the pool initializer.
+_WORKER_READER = None
+
+
+def _init_worker(path: str) -> None:
+    global _WORKER_READER
+    _WORKER_READER = PdfReader(path)
+
+
+def _extract_pages(page_numbers: List[int]) -> List[Tuple[int, str]]:
+    out = []
+    for n in page_numbers:
+        try:
+            text = _WORKER_READER.pages[n].extract_text() or ""
+        except Exception:
+            text = ""
+        out.append((n, text))
+    return out
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def page_count(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def iter_page_text(
+    path: str,
+    pages: Optional[Iterable[int]] = None,
+    workers: Optional[int] = None,
+    pages_per_task: int = 4,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, raw_text) in page order.
+
+    With workers > 1, page ranges are extracted in a process pool. Only
+    2 * workers tasks are in flight at once, so results never pile up faster
+    than the consumer can clean, chunk and insert them.
+    """
+    if pages is None:
+        pages = range(page_count(path))
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    if workers <= 1:
+        _init_worker(path)
+        for task in _batched(pages, pages_per_task):
+            yield from _extract_pages(task)
+        return
+
+    tasks = _batched(pages, pages_per_task)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+        pending: deque = deque()
+        for task in tasks:
+            pending.append(pool.submit(_extract_pages, task))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 100) -> List[str]:
+    """
+    Split text into windows of about chunk_size characters with the given
+    overlap, ending each window on a word boundary where one is available.
+    """
+    chunks = []
+    start = 0
+    n = len(text)
+    while start < n:
+        end = min(start + chunk_size, n)
+        if end < n:
+            space = text.rfind(" ", start + chunk_size // 2, end)
+            if space != -1:
+                end = space
+        chunks.append(text[start:end].strip())
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+    return [c for c in chunks if c]
+
+
+def iter_chunks(
+    page_texts: Iterable[Tuple[int, str]],
+    doc_id: str,
+    chunk_size: int = 1000,
+    overlap: int = 100,
+) -> Iterator[Dict[str, Any]]:
+    """Clean and chunk each page as it arrives, yielding passage dicts."""
+    for n, raw in page_texts:
+        text = clean_text(raw)
+        for i, chunk in enumerate(chunk_text(text, chunk_size, overlap), 1):
+            yield {
+                "id": f"{doc_id}#p{n + 1}_c{i}",
+                "page": n + 1,
+                "chunk_id": f"p{n + 1}_c{i}",
+                "text": chunk,
+            }
+
+
+def _insert_batch(store: Any, batch: List[Dict[str, Any]]) -> None:
+    """Bulk-insert one batch into a RAGAgent-style store or a Chroma collection."""
+    if store is None:
+        return
+    if hasattr(store, "add_passages"):
+        store.add_passages(batch)
+    else:
+        store.add(
+            ids=[p["id"] for p in batch],
+            documents=[p["text"] for p in batch],
+            metadatas=[{"source": p["source"], "page": p["page"]} for p in batch],
+        )
+
+
+def ingest_pdf(
+    path: str,
+    store: Any = None,
+    doc_id: Optional[str] = None,
+    batch_size: int = 64,
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    overlap: int = 100,
+    pages: Optional[Iterable[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Extract, clean, chunk and bulk-insert a PDF into `store`.
+
+    `store` may be a finsage RAGAgent (anything with `add_passages`) or a
+    Chroma collection. Pass store=None to measure extraction and chunking only.
+    Returns page/chunk counts and throughput in pages per second.
+    """
+    if PdfReader is None:
+        return {"error": "pypdf not installed. Install with 'pip install pypdf'"}
+    if not os.path.exists(path):
+        return {"error": f"PDF not found: {path}"}
+
+    doc_id = doc_id or os.path.basename(path)
+    started = time.perf_counter()
+    seen_pages = 0
+    n_chunks = 0
+
+    def counted(page_texts):
+        nonlocal seen_pages
+        for item in page_texts:
+            seen_pages += 1
+            yield item
+
+    page_texts = counted(iter_page_text(path, pages=pages, workers=workers))
+    for batch in _batched(iter_chunks(page_texts, doc_id, chunk_size, overlap), batch_size):
+        for p in batch:
+            p["source"] = path
+        _insert_batch(store, batch)
+        n_chunks += len(batch)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "doc_id": doc_id,
+        "pages": seen_pages,
+        "chunks": n_chunks,
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(seen_pages / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    p = argparse.ArgumentParser(description="Measure PDF ingestion throughput (pages/sec).")
+    p.add_argument("path", nargs="?", default=os.path.join("Experiments", "Sample.pdf"))
+    p.add_argument("--workers", type=int, default=None, help="Process pool size (1 = serial)")
+    p.add_argument("--repeat", type=int, default=1, help="Process the page range N times to simulate a longer report")
+    args = p.parse_args()
+
+    n = page_count(args.path)
+    page_range = [i for _ in range(args.repeat) for i in range(n)]
+    for w in sorted({1, args.workers or (os.cpu_count() or 1)}):
+        stats = ingest_pdf(args.path, store=None, workers=w, pages=page_range)
+        stats["workers"] = w
+        print(json.dumps(stats))
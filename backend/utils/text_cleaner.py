@@ -0,0 +1,21 @@
+# backend/utils/text_cleaner.py
+"""
+Text Cleaner — normalizes raw extracted text before chunking and embedding.
+"""
+
+import re
+
+# Compiled once; cleaning runs for every page of every ingested document.
+_WHITESPACE = re.compile(r"\s+")
+_HYPHEN_BREAK = re.compile(r"(\w)-\s*\n\s*(\w)")
+
+
+def clean_text(text: str) -> str:
+    """
+    Join words hyphenated across line breaks and collapse all runs of
+    whitespace (newlines, tabs, repeated spaces) into a single space.
+    """
+    if not text:
+        return ""
+    text = _HYPHEN_BREAK.sub(r"\1\2", text)
+    return _WHITESPACE.sub(" ", text).strip()
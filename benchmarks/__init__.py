@@ -0,0 +1 @@
+"""Offline benchmark suite for FinSage (see benchmarks/run.py)."""
@@ -0,0 +1,54 @@
+"""Compare two benchmark JSON files and flag latency regressions.
+
+Usage:
+    python -m benchmarks.compare base.json new.json --threshold 0.10
+
+Exits non-zero when any case's mean latency grew by more than the threshold.
+"""
+from typing import Any, Dict, Iterator, Tuple
+import argparse
+import json
+import sys
+
+
+def _cases(node: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(node, dict):
+        if "mean_ms" in node:
+            yield prefix, float(node["mean_ms"])
+            return
+        if "seconds" in node and "items_per_sec" in node:
+            yield prefix, float(node["seconds"]) * 1e3
+            return
+        for k, v in node.items():
+            yield from _cases(v, f"{prefix}.{k}" if prefix else k)
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    old = dict(_cases(base.get("suites", {})))
+    rows = []
+    for name, ms in _cases(new.get("suites", {})):
+        if name not in old or old[name] <= 0:
+            continue
+        change = ms / old[name] - 1.0
+        rows.append({"case": name, "base_ms": old[name], "new_ms": ms, "change": round(change, 4), "regressed": change > threshold})
+    return {"base": base.get("commit"), "new": new.get("commit"), "threshold": threshold, "cases": rows}
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown (0.10 = 10%%)")
+    args = p.parse_args()
+    with open(args.base) as fh:
+        base = json.load(fh)
+    with open(args.new) as fh:
+        new = json.load(fh)
+    report = compare(base, new, args.threshold)
+    print(json.dumps(report, indent=2))
+    if any(r["regressed"] for r in report["cases"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
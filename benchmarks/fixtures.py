@@ -0,0 +1,333 @@
+"""Synthetic upstream fixtures for running FinSage fully offline.
+
+Provides deterministic stand-ins for every outbound dependency the agents use:
+yfinance tickers/frames, SEC ticker map and submissions JSON, filing HTML,
+Google News RSS XML, a sentence-transformers-compatible embedder and an
+OpenAI ChatCompletion stub. `offline()` patches them all into the agent
+modules for the duration of a `with` block.
+"""
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+from unittest import mock
+import json
+import math
+import os
+import re
+import xml.etree.ElementTree as ET
+import zlib
+
+import numpy as np
+
+TICKERS = ["TSLA", "AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "JPM", "XOM", "KO"]
+
+_WORDS = (
+    "revenue growth margin guidance impairment goodwill liquidity debt covenant risk factor "
+    "segment operating income cash flow dividend repurchase inventory supply demand regulatory "
+    "litigation acquisition restructuring tax rate currency hedge capital expenditure backlog"
+).split()
+
+
+def _seed(*parts: Any) -> int:
+    return zlib.crc32("|".join(str(p) for p in parts).encode())
+
+
+# ---------------------------------------------------------------------------
+# yfinance
+# ---------------------------------------------------------------------------
+
+class FakeFrame:
+    """The subset of the pandas DataFrame API that DataAgent touches."""
+
+    def __init__(self, rows: List[Any]):
+        self._rows = rows
+
+    @property
+    def empty(self) -> bool:
+        return not self._rows
+
+    def iterrows(self):
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+def price_history(ticker: str, days: int = 90) -> FakeFrame:
+    rng = np.random.default_rng(_seed("hist", ticker))
+    closes = 100.0 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, days)))
+    start = datetime(2024, 1, 2)
+    rows = [
+        (start + timedelta(days=i), {"Close": float(c), "Volume": int(rng.integers(1e6, 5e7))})
+        for i, c in enumerate(closes)
+    ]
+    return FakeFrame(rows)
+
+
+def fundamentals_info(ticker: str) -> Dict[str, Any]:
+    rng = np.random.default_rng(_seed("info", ticker))
+    price = float(rng.uniform(20, 800))
+    eps = float(rng.uniform(0.5, 20))
+    return {
+        "shortName": f"{ticker} Inc.",
+        "sector": "Technology",
+        "industry": "Software",
+        "marketCap": int(rng.uniform(1e9, 2e12)),
+        "previousClose": price * 0.99,
+        "regularMarketPrice": price,
+        "trailingPE": price / eps,
+        "forwardPE": price / (eps * 1.1),
+        "epsTrailingTwelveMonths": eps,
+    }
+
+
+class FakeTicker:
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.info = fundamentals_info(ticker)
+
+    def history(self, period: str = "90d", auto_adjust: bool = False, timeout: Any = None) -> FakeFrame:
+        days = int(period.rstrip("d")) if period.endswith("d") else 90
+        return price_history(self.ticker, days)
+
+
+class FakeYFinance:
+    Ticker = FakeTicker
+
+    @staticmethod
+    def download(tickers: List[str], period: str = "90d", **kwargs: Any) -> Dict[str, FakeFrame]:
+        """Stands in for the group_by="ticker" frame: indexable by ticker."""
+        days = int(period.rstrip("d")) if period.endswith("d") else 90
+        return {t: price_history(t, days) for t in tickers}
+
+
+# ---------------------------------------------------------------------------
+# SEC + filing HTML
+# ---------------------------------------------------------------------------
+
+def sec_ticker_map(tickers: List[str] = TICKERS) -> Dict[str, Any]:
+    return {
+        str(i): {"cik_str": 1000 + i, "ticker": t, "title": f"{t} Inc."}
+        for i, t in enumerate(tickers)
+    }
+
+
+def sec_submissions(cik: int, n: int = 20) -> Dict[str, Any]:
+    forms = ["10-K", "10-Q", "8-K", "10-Q", "4"]
+    return {
+        "cik": str(cik),
+        "filings": {
+            "recent": {
+                "accessionNumber": [f"0000{cik}-24-{i:06d}" for i in range(n)],
+                "form": [forms[i % len(forms)] for i in range(n)],
+                "filingDate": [(datetime(2024, 12, 1) - timedelta(days=30 * i)).strftime("%Y-%m-%d") for i in range(n)],
+            }
+        },
+    }
+
+
+def companyfacts(cik: int, years: int = 5) -> Dict[str, Any]:
+    """A companyfacts JSON document: annual 10-K flows plus quarterly noise and a shares count."""
+    rng = np.random.default_rng(cik)
+    revenue = float(rng.uniform(1e8, 1e11))
+
+    def flows(value: float, drift: float) -> List[Dict[str, Any]]:
+        out = []
+        for y in range(years):
+            fy = 2024 - y
+            out.append({"start": f"{fy - 1}-10-01", "end": f"{fy}-09-30", "val": round(value * drift ** -y, 2),
+                        "fy": fy, "fp": "FY", "form": "10-K", "filed": f"{fy}-11-01"})
+            out.append({"start": f"{fy}-04-01", "end": f"{fy}-06-30", "val": round(value * drift ** -y / 4, 2),
+                        "fy": fy, "fp": "Q3", "form": "10-Q", "filed": f"{fy}-08-01"})
+        return out
+
+    shares = float(rng.integers(10**7, 10**10))
+    margin = float(rng.uniform(-0.05, 0.3))
+    return {
+        "cik": cik,
+        "entityName": f"Company {cik}",
+        "facts": {
+            "dei": {"EntityCommonStockSharesOutstanding": {"units": {"shares": [
+                {"end": "2024-10-15", "val": shares, "form": "10-K", "filed": "2024-11-01"}]}}},
+            "us-gaap": {
+                "Revenues": {"units": {"USD": flows(revenue, 1.08)}},
+                "NetIncomeLoss": {"units": {"USD": flows(revenue * margin, 1.1)}},
+                "EarningsPerShareDiluted": {"units": {"USD/shares": flows(revenue * margin / shares, 1.1)}},
+            },
+        },
+    }
+
+
+def synthetic_paragraph(rng: Any, words: int = 40) -> str:
+    return " ".join(_WORDS[i] for i in rng.integers(0, len(_WORDS), words)).capitalize() + "."
+
+
+def filing_html(url: str, paragraphs: int = 40) -> str:
+    rng = np.random.default_rng(_seed("filing", url))
+    body = "\n".join(
+        f"<p>Item {1 + i % 9}{'A' if i % 4 == 0 else ''}. {synthetic_paragraph(rng)}</p>" for i in range(paragraphs)
+    )
+    return f"<html><head><style>p {{}}</style><script>var x=1;</script></head><body>\n{body}\n</body></html>"
+
+
+class FakeResponse:
+    def __init__(self, payload: Any = None, text: str = "", status_code: int = 200):
+        self._payload = payload
+        # Like requests.Response, the body is also readable as text (cassettes record it that way).
+        self.text = text or (json.dumps(payload) if payload is not None else "")
+        self.status_code = status_code
+
+    def json(self) -> Any:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+_SUBMISSIONS_RE = re.compile(r"CIK(\d+)\.json")
+
+
+def fake_requests_get(url: str, headers: Any = None, timeout: Any = None, **kwargs: Any) -> FakeResponse:
+    if url.endswith("company_tickers.json"):
+        return FakeResponse(sec_ticker_map())
+    m = _SUBMISSIONS_RE.search(url)
+    if m:
+        return FakeResponse(sec_submissions(int(m.group(1))))
+    if "/Archives/" in url:
+        return FakeResponse(text=filing_html(url))
+    return FakeResponse(status_code=404)
+
+
+# ---------------------------------------------------------------------------
+# Google News RSS
+# ---------------------------------------------------------------------------
+
+_HEADLINES = [
+    "{t} shares jump after earnings beat and record deliveries",
+    "Analysts upgrade {t} on strong growth outlook",
+    "{t} faces lawsuit over product recall",
+    "{t} stock slips as margins decline",
+    "What to watch for {t} this week",
+]
+
+
+def rss_xml(ticker: str, items: int = 10) -> str:
+    entries = "".join(
+        f"<item><title>{_HEADLINES[i % len(_HEADLINES)].format(t=ticker)}</title>"
+        f"<link>https://news.example.com/{ticker}/{i}</link>"
+        f"<description>Coverage of {ticker} item {i}</description></item>"
+        for i in range(items)
+    )
+    return f"<?xml version='1.0'?><rss><channel><title>{ticker}</title>{entries}</channel></rss>"
+
+
+class _Feed:
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.entries = entries
+
+
+class FakeFeedparser:
+    """Parses the fixture RSS with ElementTree so feedparser itself is not required."""
+
+    @staticmethod
+    def parse(url: str) -> _Feed:
+        m = re.search(r"q=([^&]+)", url)
+        ticker = (m.group(1).split()[0] if m else "UNKNOWN").upper()
+        root = ET.fromstring(rss_xml(ticker))
+        entries = [
+            {"title": it.findtext("title", ""), "link": it.findtext("link"), "summary": it.findtext("description", "")}
+            for it in root.iter("item")
+        ]
+        return _Feed(entries)
+
+
+# ---------------------------------------------------------------------------
+# Embedder + LLM
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class StubEmbedder:
+    """Deterministic feature-hashing embedder with the SentenceTransformer.encode signature.
+
+    Texts sharing tokens get similar vectors, so retrieval results are
+    meaningful, and cost grows with text length like a real encoder's would.
+    """
+
+    def __init__(self, model_name: str = "stub", dim: int = 384, buckets: int = 4096):
+        self.model_name = model_name
+        self.dim = dim
+        self.buckets = buckets
+        rng = np.random.default_rng(0)
+        self._proj = rng.standard_normal((buckets, dim)).astype(np.float32) / math.sqrt(dim)
+
+    def _bucket_ids(self, text: str) -> List[int]:
+        return [zlib.crc32(tok.encode()) % self.buckets for tok in _TOKEN_RE.findall(text.lower())]
+
+    def encode(self, sentences: Any, batch_size: int = 32, **kwargs: Any) -> Any:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            ids = self._bucket_ids(t)
+            if ids:
+                v = self._proj[ids].sum(axis=0)
+                n = np.linalg.norm(v)
+                out[i] = v / n if n else v
+        return out[0] if single else out
+
+
+class _FakeChatCompletion:
+    @staticmethod
+    def create(model: str, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        prompt = messages[-1]["content"]
+        cites = sorted(set(re.findall(r"^\[(\d+)\]", prompt, re.M)))[:3]
+        text = "Synthetic answer grounded in excerpts " + " ".join(f"[{c}]" for c in cites)
+        return {"choices": [{"message": {"content": text}}]}
+
+
+class FakeOpenAI:
+    api_key = None
+    ChatCompletion = _FakeChatCompletion
+
+
+def synthetic_passages(n: int, seed: int = 0, words: int = 40) -> Iterator[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        t = TICKERS[i % len(TICKERS)]
+        yield {
+            "id": f"doc{i // 30}#p{i % 30}",
+            "text": f"{t} " + synthetic_paragraph(rng, words),
+            "source": f"bench://{t}/{i // 30}",
+            "ticker": t,
+            "form": "10-K" if (i // 30) % 2 == 0 else "10-Q",
+            "filing_date": (datetime(2024, 12, 1) - timedelta(days=(i // 300) % 1000)).strftime("%Y-%m-%d"),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Patching
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def offline(embed_dim: int = 384):
+    """Patch every upstream the agents touch with the fixtures above."""
+    from finsage import compute
+    from finsage.agents import data_agent, llm_agent, news_agent, rag_agent
+
+    def embedder(model_name: str = "stub") -> StubEmbedder:
+        return StubEmbedder(model_name, dim=embed_dim)
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch("requests.get", fake_requests_get))
+        stack.enter_context(mock.patch.object(data_agent, "yf", FakeYFinance))
+        stack.enter_context(mock.patch.object(news_agent, "feedparser", FakeFeedparser))
+        stack.enter_context(mock.patch.object(rag_agent, "SentenceTransformer", embedder))
+        stack.enter_context(mock.patch.object(rag_agent, "np", np))
+        # Compute workers are forked inside this block, so they inherit the stub too.
+        stack.enter_context(mock.patch.object(compute, "SentenceTransformer", embedder))
+        stack.enter_context(mock.patch.object(llm_agent, "openai", FakeOpenAI))
+        stack.enter_context(mock.patch.dict(os.environ, {"OPENAI_API_KEY": "offline-benchmark"}))
+        yield
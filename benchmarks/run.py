@@ -0,0 +1,542 @@
+"""Offline benchmark runner for FinSage.
+
+Measures per-agent latency/throughput, Planner.run end to end, query parsing
+throughput, forecast backtesting and simulation, DCF sensitivity grids, query embedding under concurrency, response encoding size/time and RAG ingest/retrieve at several corpus sizes against the synthetic fixtures in
+`benchmarks.fixtures`. No network access is needed.
+
+Usage:
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --suite rag --sizes 1000,100000
+    python -m benchmarks.compare base.json bench.json
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import contextlib
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import fixtures
+
+SCHEMA_VERSION = 1
+
+
+def measure(fn: Callable[[], Any], repeat: int = 20, warmup: int = 2, items: int = 1) -> Dict[str, Any]:
+    """Time `fn` `repeat` times; `items` is the unit count per call for throughput."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    mean = statistics.fmean(samples)
+    return {
+        "n": repeat,
+        "mean_ms": round(mean * 1e3, 4),
+        "p50_ms": round(samples[len(samples) // 2] * 1e3, 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e3, 4),
+        "min_ms": round(samples[0] * 1e3, 4),
+        "items_per_sec": round(items / mean, 2) if mean > 0 else None,
+    }
+
+
+def bench_agents(args: argparse.Namespace) -> Dict[str, Any]:
+    from finsage.agents import (
+        DataAgent, DocumentAgent, NewsAgent, CalculationAgent, PredictionAgent, ComparisonAgent,
+        RiskAgent, ValidationAgent, ReasoningAgent, RAGAgent, LLMAgent,
+    )
+
+    t = "TSLA"
+    data = DataAgent().run(t)
+    news = NewsAgent().run(t)
+    ctx = {"fundamentals": data["fundamentals"], "history": data["history"], "news": news}
+    calc = CalculationAgent().run(t, ctx)
+    pred = PredictionAgent().run(t, ctx)
+    peers = [{"ticker": p, "fundamentals": DataAgent().run(p)["fundamentals"]} for p in fixtures.TICKERS[1:6]]
+    rag = RAGAgent()
+    filings = DocumentAgent().run(t)["filings"]
+    rag.ingest_urls([{"id": f["url"], "url": f["url"]} for f in filings])
+    passages = rag.retrieve(f"Analyze {t}", top_k=5)["results"]
+    llm = LLMAgent()
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "DataAgent": lambda: DataAgent().run(t),
+        "DocumentAgent": lambda: DocumentAgent().run(t),
+        "NewsAgent": lambda: NewsAgent().run(t),
+        "CalculationAgent": lambda: CalculationAgent().run(t, ctx),
+        "PredictionAgent": lambda: PredictionAgent().run(t, ctx),
+        "ComparisonAgent": lambda: ComparisonAgent().run(t, {"peers": peers, "fundamentals": ctx["fundamentals"]}),
+        "RiskAgent": lambda: RiskAgent().run(t, ctx),
+        "ValidationAgent": lambda: ValidationAgent().run(t, ctx),
+        "ReasoningAgent": lambda: ReasoningAgent().run(t, dict(ctx, metrics=calc, prediction=pred)),
+        "RAGAgent.ingest_urls": lambda: RAGAgent().ingest_urls([{"id": f["url"], "url": f["url"]} for f in filings]),
+        "RAGAgent.retrieve": lambda: rag.retrieve(f"Analyze {t}", top_k=5),
+        "LLMAgent": lambda: llm.run(f"Analyze {t}", passages=passages),
+    }
+    out = {name: measure(fn, repeat=args.repeat) for name, fn in cases.items()}
+
+    # Prompt size for a wide retrieval (20 passages, with the overlapping chunks real filings produce).
+    wide = rag.retrieve(f"Analyze {t} revenue margins risk", top_k=20)["results"]
+    wide = wide + [dict(p, text=p["text"][len(p["text"]) // 3:], score=(p.get("score") or 0) * 0.9) for p in wide[:5]]
+
+    def naive_prompt() -> str:
+        ctx = llm.prompt_builder.system + "\n\nRelevant excerpts:\n"
+        for i, p in enumerate(wide, 1):
+            ctx += f"[{i}] {p.get('text')[:500]} ... (source: {p.get('source')})\n\n"
+        return ctx + f"User question: Analyze {t}\n\nAnswer succinctly and include citations like [1]."
+
+    built = llm.prompt_builder.build(f"Analyze {t}", wide)
+    res = measure(lambda: llm.prompt_builder.build(f"Analyze {t}", wide), repeat=args.repeat)
+    res.update(
+        tokens=built["tokens"],
+        naive_tokens=llm.prompt_builder.counter.count(naive_prompt()),
+        budget=llm.prompt_builder.budget,
+        passages_used=built["passages_used"],
+        passages_dropped=built["passages_dropped"],
+    )
+    out["PromptBuilder.build.25_passages"] = res
+    return out
+
+
+def bench_planner(args: argparse.Namespace) -> Dict[str, Any]:
+    from finsage.cache import ResultCache
+    from finsage.memo import StageMemo
+    from finsage.planner import Planner
+
+    out = {}
+    # cold: caching and stage memoization disabled, every run fetches and recomputes;
+    # warm: shared cache and stage memo primed by warmup runs.
+    for label, cache, memo in (
+        ("cold", ResultCache(max_entries=0), StageMemo(max_entries=0)),
+        ("warm", ResultCache(), StageMemo()),
+    ):
+        planner = Planner(cache=cache, memo=memo)
+        tickers = iter(fixtures.TICKERS[:2] * (args.repeat + 10))
+
+        def one():
+            t = next(tickers)
+            planner.run(f"Analyze {t}", tickers=[t], peers=["AAPL", "MSFT"])
+
+        out[f"Planner.run.{label}"] = measure(one, repeat=args.repeat)
+
+    # dashboard re-run where only news changed: risk and synthesis recompute, the rest is reused
+    planner = Planner(cache=ResultCache())
+    planner.run("Analyze TSLA", tickers=["TSLA"])
+    news = planner.news_agent.run("TSLA")
+    counter = iter(range(10**9))
+
+    def news_changed():
+        planner.cache.put("NewsAgent", "TSLA", dict(news, fetched=next(counter)))
+        planner.run("Analyze TSLA", tickers=["TSLA"])
+
+    out["Planner.run.news_changed"] = measure(news_changed, repeat=args.repeat)
+
+    # progressive results: time until the first section reaches the client vs the whole response (cold)
+    planner = Planner(cache=ResultCache(max_entries=0), memo=StageMemo(max_entries=0))
+    first_ms, total_ms = [], []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        events = planner.stream("Analyze TSLA", tickers=["TSLA"])
+        next(events)
+        first_ms.append((time.perf_counter() - t0) * 1e3)
+        for _ in events:
+            pass
+        total_ms.append((time.perf_counter() - t0) * 1e3)
+    out["Planner.stream.cold"] = {
+        "first_section_p50_ms": round(statistics.median(first_ms), 4),
+        "done_p50_ms": round(statistics.median(total_ms), 4),
+        "n": args.repeat,
+    }
+
+    # one upstream stalls for 300ms on every call: a 100ms budget bounds the response anyway
+    planner = Planner(cache=ResultCache(max_entries=0), memo=StageMemo(max_entries=0))
+    fetch_news = planner.news_agent.run
+    planner.news_agent.run = lambda ticker, context=None: time.sleep(0.3) or fetch_news(ticker)
+    out["Planner.run.slow_news_deadline_100ms"] = measure(
+        lambda: planner.run("Analyze TSLA", tickers=["TSLA"], deadline=0.1), repeat=max(3, args.repeat // 4)
+    )
+    return out
+
+
+def bench_batch(args: argparse.Namespace) -> Dict[str, Any]:
+    from finsage.cache import ResultCache
+    from finsage.planner import Planner
+
+    tickers = fixtures.TICKERS
+
+    def loop():
+        planner = Planner(cache=ResultCache())
+        for t in tickers:
+            planner.run(f"Analyze {t}", tickers=[t])
+
+    def batch():
+        Planner(cache=ResultCache()).run_many(tickers, concurrency=8)
+
+    repeat = max(3, args.repeat // 4)
+    return {
+        "Planner.run.loop": measure(loop, repeat=repeat, warmup=1, items=len(tickers)),
+        "Planner.run_many": measure(batch, repeat=repeat, warmup=1, items=len(tickers)),
+    }
+
+
+def bench_rag(args: argparse.Namespace) -> Dict[str, Any]:
+    from finsage.agents import RAGAgent
+
+    out: Dict[str, Any] = {}
+    queries = [f"{t} goodwill impairment risk factor" for t in fixtures.TICKERS]
+    for size in args.sizes:
+        rag = RAGAgent()
+        batch: List[Dict[str, Any]] = []
+        t0 = time.perf_counter()
+        for p in fixtures.synthetic_passages(size):
+            batch.append(p)
+            if len(batch) >= 1024:
+                rag.add_passages(batch)
+                batch = []
+        if batch:
+            rag.add_passages(batch)
+        ingest_s = time.perf_counter() - t0
+        qi = iter(queries * 1000)
+        repeat = max(3, args.repeat // 4)
+        out[str(size)] = {
+            "ingest": {"seconds": round(ingest_s, 4), "items_per_sec": round(size / ingest_s, 2)},
+            "retrieve": measure(lambda: rag.retrieve(next(qi), top_k=5), repeat=repeat, warmup=1),
+            "retrieve_dense": measure(lambda: rag.retrieve(next(qi), top_k=5, mode="dense"), repeat=repeat, warmup=1),
+            "retrieve_filtered": measure(
+                lambda: rag.retrieve(next(qi), top_k=5, filters={"ticker": "TSLA", "form": "10-K"}), repeat=repeat, warmup=1
+            ),
+        }
+        del rag
+    return out
+
+
+_QUERY_TEMPLATES = [
+    "Should I buy {t} now?",
+    "What is the price of {t} today",
+    "latest news on {t} and {u}",
+    "Is {t} too risky compared to {u}?",
+    "forecast {t} earnings for next year",
+    "Compare ${t} with {u} on valuation",
+    "Which mutual fund holds {t}",
+    "Tell me about Tesla and Apple",
+]
+
+
+def bench_query_embedding(args: argparse.Namespace) -> Dict[str, Any]:
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from finsage.query_encoder import QueryEncoder
+
+    embedder = fixtures.StubEmbedder(dim=args.dim)
+    lock = threading.Lock()
+
+    def forward(texts: List[str]) -> Any:
+        # A model forward pass: a fixed launch cost plus a small per-text cost, one pass at a time.
+        with lock:
+            time.sleep(0.004 + 0.0001 * len(texts))
+            return embedder.encode(texts)
+
+    n, clients = 512, 32
+    rounds = iter(range(10**9))
+
+    def load(encode: Callable[[str], Any]) -> None:
+        r = next(rounds)
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(encode, [f"Analyze {fixtures.TICKERS[i % len(fixtures.TICKERS)]} round {r} q{i}" for i in range(n)]))
+
+    enc = QueryEncoder(forward, cache_size=0)
+    cached = QueryEncoder(forward)
+    cached.encode("Analyze TSLA")
+    return {
+        f"unbatched.{clients}_clients": measure(lambda: load(lambda q: forward([q])[0]), repeat=2, warmup=0, items=n),
+        f"micro_batched.{clients}_clients": measure(lambda: load(enc.encode), repeat=3, warmup=1, items=n),
+        "cached_hit": measure(lambda: cached.encode("Analyze TSLA"), repeat=args.repeat * 50, warmup=5),
+    }
+
+
+def bench_parser(args: argparse.Namespace) -> Dict[str, Any]:
+    from finsage.query_parser import QueryParser
+    from finsage.resolver import NameIndex
+    from finsage.tickers import TickerDirectory
+
+    # ~10k-entry dictionary, the size of the real SEC map
+    names = fixtures.TICKERS + [f"X{i:04d}" for i in range(10_000)]
+    directory = TickerDirectory.from_sec_map(fixtures.sec_ticker_map(names))
+    t0 = time.perf_counter()
+    resolver = NameIndex.from_directory(directory)
+    build_s = time.perf_counter() - t0
+    parser = QueryParser(directory, resolver)
+    queries = [
+        tpl.format(t=t, u=fixtures.TICKERS[(i + 3) % len(fixtures.TICKERS)]) if i % 2 else tpl.format(t=t.lower(), u=t)
+        for i, (tpl, t) in enumerate((tpl, t) for tpl in _QUERY_TEMPLATES for t in fixtures.TICKERS)
+    ]
+    qi = iter(queries * (args.repeat * 10 + 10))
+    ni = iter(["tsla inc", "Apple", "micrsoft", "X00", "JPM Inc."] * (args.repeat * 10 + 10))
+    return {
+        "QueryParser.parse": measure(lambda: parser.parse(next(qi)), repeat=args.repeat * 10, warmup=5),
+        "QueryParser.parse_many": measure(lambda: parser.parse_many(queries), repeat=args.repeat, warmup=1, items=len(queries)),
+        "NameIndex.build": {"seconds": round(build_s, 4), "items_per_sec": round(len(resolver) / build_s, 2)},
+        "NameIndex.resolve": measure(lambda: resolver.resolve(next(ni)), repeat=args.repeat * 10, warmup=5),
+    }
+
+
+def bench_risk(args: argparse.Namespace) -> Dict[str, Any]:
+    import numpy as np
+    from finsage import risk_engine
+
+    rng = np.random.default_rng(0)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (5000, 252)), axis=1))
+    bench = prices.mean(axis=0)
+    returns = risk_engine.returns_from_prices(prices)
+
+    def loop_rolling_vol(rows: int = 50, window: int = 20) -> None:
+        for r in returns[:rows]:
+            [r[i:i + window].std(ddof=1) for i in range(len(r) - window + 1)]
+
+    repeat = max(3, args.repeat // 4)
+    return {
+        "risk_profile.single": measure(lambda: risk_engine.risk_profile(prices[0], bench), repeat=args.repeat),
+        "risk_profile.matrix_5000x252": measure(lambda: risk_engine.risk_profile(prices, bench), repeat=repeat, warmup=1, items=5000),
+        "rolling_volatility.matrix_5000x252": measure(lambda: risk_engine.rolling_volatility(returns, 20), repeat=repeat, warmup=1, items=5000),
+        "rolling_volatility.loop_50x252": measure(loop_rolling_vol, repeat=repeat, warmup=1, items=50),
+    }
+
+
+def bench_backtest(args: argparse.Namespace) -> Dict[str, Any]:
+    import numpy as np
+    from finsage import backtest
+    from finsage.agents import PredictionAgent
+
+    rng = np.random.default_rng(0)
+    tickers, days, window = 2000, 756, backtest.WINDOW  # three years of daily closes
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (tickers, days)), axis=1))
+    agent = PredictionAgent()
+    histories = [[{"close": float(c)} for c in row] for row in prices[:5]]
+
+    def loop_agent(rows: int = 5) -> None:
+        # What evaluating the agent looks like without the engine: one refit per day per ticker.
+        for hist in histories[:rows]:
+            [agent.run("X", {"history": hist[i:i + window]}) for i in range(days - window)]
+
+    repeat = max(3, args.repeat // 4)
+    vec = measure(lambda: backtest.walk_forward(prices, window), repeat=repeat, warmup=1, items=tickers)
+    loop = measure(loop_agent, repeat=3, warmup=0, items=5)
+    # The loop is timed on 5 tickers and scaled to the full universe.
+    loop["extrapolated_s"] = round(loop["mean_ms"] / 5 * tickers / 1e3, 2)
+    vec["speedup_vs_loop"] = round(loop["mean_ms"] / 5 * tickers / vec["mean_ms"], 1)
+    return {
+        "walk_forward.single_756": measure(lambda: backtest.walk_forward(prices[0], window), repeat=args.repeat),
+        f"walk_forward.matrix_{tickers}x{days}": vec,
+        f"PredictionAgent.loop_5x{days}": loop,
+    }
+
+
+def bench_montecarlo(args: argparse.Namespace) -> Dict[str, Any]:
+    import os
+    import resource
+    import numpy as np
+    from finsage import montecarlo
+    from finsage.compute import ComputeExecutor
+
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, 756)))
+    watchlist = {f"T{i}": 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, 252))) for i in range(50)}
+    out: Dict[str, Any] = {
+        "simulate.gbm_10k_x_1": measure(lambda: montecarlo.simulate(closes, paths=10_000, steps=1, seed=0), repeat=args.repeat),
+        "simulate_many.50_tickers_10k_x_20": measure(
+            lambda: montecarlo.simulate_many(watchlist, paths=10_000, steps=20, seed=0), repeat=3, warmup=1, items=50
+        ),
+    }
+    workers = os.cpu_count() or 1
+    ex = ComputeExecutor(workers=workers, model_name=None) if workers > 1 else None
+    try:
+        for method in montecarlo.METHODS:
+            res = measure(
+                lambda: montecarlo.simulate(closes, paths=1_000_000, steps=250, method=method, seed=0, executor=ex),
+                repeat=1, warmup=0, items=1_000_000,
+            )
+            res["workers"] = workers if ex else 0
+            out[f"simulate.{method}_1M_x_250"] = res
+    finally:
+        if ex:
+            ex.shutdown()
+    out["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return out
+
+
+def bench_valuation(args: argparse.Namespace) -> Dict[str, Any]:
+    import numpy as np
+    from finsage import valuation
+    from finsage.agents import CalculationAgent
+
+    rng = np.random.default_rng(0)
+    n = 500
+    eps = rng.uniform(0.5, 12.0, n)
+    prices = eps * rng.uniform(8.0, 40.0, n)
+    growth = np.round(np.arange(0.0, 0.101, 0.005), 3)
+    discount = np.round(np.arange(0.06, 0.1401, 0.005), 3)
+    horizon = [5, 10, 15]
+    agent = CalculationAgent()
+    contexts = {f"T{i}": {"eps": float(e), "price": float(p)} for i, (e, p) in enumerate(zip(eps, prices))}
+    spec = {"growth": growth.tolist(), "discount": discount.tolist(), "horizon": horizon}
+
+    def loop_scalar(rows: int = 5) -> None:
+        # The per-scenario alternative: one scalar DCF per ticker x growth x discount x horizon cell.
+        for e in eps[:rows]:
+            [valuation.dcf_value(e, g, r, h) for g in growth for r in discount for h in horizon]
+
+    cells = len(growth) * len(discount) * len(horizon)
+    repeat = max(3, args.repeat // 4)
+    loop = measure(loop_scalar, repeat=repeat, warmup=1, items=5 * cells)
+    grid = measure(lambda: valuation.sensitivity(eps, prices, growth, discount, horizon), repeat=repeat, warmup=1, items=n * cells)
+    grid["speedup_vs_loop"] = round(grid["items_per_sec"] / loop["items_per_sec"], 1)
+    return {
+        f"sensitivity.{n}_tickers_{cells}_cells": grid,
+        "scalar_dcf.loop_5_tickers": loop,
+        f"CalculationAgent.run_many.{n}": measure(lambda: agent.run_many(contexts, spec), repeat=repeat, warmup=1, items=n),
+    }
+
+
+def bench_universe(args: argparse.Namespace) -> Dict[str, Any]:
+    import numpy as np
+    from finsage.universe import UniverseSnapshot
+
+    rng = np.random.default_rng(0)
+    sectors = ["Technology", "Energy", "Financials", "Healthcare", "Industrials", "Utilities", "Materials", "Consumer"]
+    records = [
+        {
+            "ticker": f"U{i:05d}",
+            "sector": sectors[i % len(sectors)],
+            "industry": f"{sectors[i % len(sectors)]}-{i % 7}",
+            "marketCap": float(np.exp(rng.uniform(18, 28))),
+            "trailingPE": float(rng.uniform(3, 80)),
+            "forwardPE": float(rng.uniform(3, 60)),
+        }
+        for i in range(10_000)
+    ]
+    t0 = time.perf_counter()
+    snap = UniverseSnapshot.from_records(records)
+    build_s = time.perf_counter() - t0
+    ti = iter([r["ticker"] for r in records] * 10)
+    return {
+        "UniverseSnapshot.build_10000": {"seconds": round(build_s, 4), "items_per_sec": round(len(snap) / build_s, 2)},
+        "UniverseSnapshot.rank": measure(lambda: snap.rank(next(ti)), repeat=args.repeat * 10, warmup=5),
+        "UniverseSnapshot.nearest_peers": measure(lambda: snap.nearest_peers(next(ti), k=5), repeat=args.repeat * 10, warmup=5),
+    }
+
+
+def bench_facts(args: argparse.Namespace) -> Dict[str, Any]:
+    import json as _json
+    import tempfile
+    import zipfile
+    from finsage.facts import FactsTable, build_table
+    from finsage.tickers import TickerDirectory
+
+    n = 2_000
+    directory = TickerDirectory({"ticker": f"F{i:05d}", "cik": 10_000 + i} for i in range(n))
+    with tempfile.TemporaryDirectory() as tmp:
+        src = f"{tmp}/companyfacts.zip"
+        with zipfile.ZipFile(src, "w") as zf:
+            for i in range(n):
+                zf.writestr(f"CIK{10_000 + i:010d}.json", _json.dumps(fixtures.companyfacts(10_000 + i)))
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr):
+            build_table(src, f"{tmp}/facts", directory=directory)
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        table = FactsTable.load(f"{tmp}/facts")
+        load_s = time.perf_counter() - t0
+        ti = iter([e["ticker"] for e in directory] * 20)
+        lookup = measure(lambda: table.lookup(next(ti)), repeat=args.repeat * 10, warmup=5)
+        del table
+    return {
+        f"facts.build_{n}": {"seconds": round(build_s, 4), "items_per_sec": round(n / build_s, 2)},
+        "facts.load_mmap": {"seconds": round(load_s, 6)},
+        "FactsTable.lookup": lookup,
+    }
+
+
+def bench_serialize(args: argparse.Namespace) -> Dict[str, Any]:
+    from finsage import serialize
+    from finsage.cache import ResultCache
+    from finsage.planner import Planner
+
+    planner = Planner(cache=ResultCache())
+    full = planner.run("Analyze TSLA", tickers=["TSLA"], peers=["AAPL", "MSFT"])
+    slim = planner.run("Analyze TSLA", tickers=["TSLA"], fields=["thesis", "risk"])
+    out: Dict[str, Any] = {
+        "Planner.run.full": measure(lambda: planner.run("Analyze TSLA", tickers=["TSLA"]), repeat=args.repeat),
+        "Planner.run.fields_risk": measure(lambda: planner.run("Analyze TSLA", tickers=["TSLA"], fields=["risk"]), repeat=args.repeat),
+    }
+    for fmt in serialize.available_formats():
+        for label, payload in (("full", full), ("thesis_risk", slim)):
+            res = measure(lambda: serialize.encode(payload, fmt), repeat=args.repeat * 10, warmup=5)
+            res["bytes"] = len(serialize.encode(payload, fmt))
+            out[f"encode.{fmt}.{label}"] = res
+    return out
+
+
+SUITES: Dict[str, Callable[[argparse.Namespace], Dict[str, Any]]] = {
+    "agents": bench_agents,
+    "planner": bench_planner,
+    "batch": bench_batch,
+    "rag": bench_rag,
+    "query_embedding": bench_query_embedding,
+    "parser": bench_parser,
+    "risk": bench_risk,
+    "backtest": bench_backtest,
+    "montecarlo": bench_montecarlo,
+    "valuation": bench_valuation,
+    "universe": bench_universe,
+    "facts": bench_facts,
+    "serialize": bench_serialize,
+}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    p = argparse.ArgumentParser(description="Run the offline FinSage benchmark suite.")
+    p.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suite(s) to run (default: all)")
+    p.add_argument("--repeat", type=int, default=20, help="Timed iterations per case")
+    p.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated RAG corpus sizes")
+    p.add_argument("--dim", type=int, default=384, help="Stub embedding dimension")
+    p.add_argument("--out", help="Write JSON results to this file instead of stdout")
+    args = p.parse_args(argv)
+    args.sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    results: Dict[str, Any] = {
+        "schema": SCHEMA_VERSION,
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "suites": {},
+    }
+    # Agents log progress with print(); keep stdout clean for the JSON report.
+    with fixtures.offline(embed_dim=args.dim), contextlib.redirect_stdout(sys.stderr):
+        for name in args.suite or list(SUITES):
+            print(f"[bench] running {name}", file=sys.stderr)
+            results["suites"][name] = SUITES[name](args)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text)
+    else:
+        print(text)
+    return results
+
+
+if __name__ == "__main__":
+    main()
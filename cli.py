@@ -1,14 +1,41 @@
 """Simple CLI for running the FinSage planner."""
 from finsage.planner import Planner
 import argparse
+import sys
+
+
+def _read_tickers(path):
+    fh = sys.stdin if path == "-" else open(path)
+    try:
+        return [line.strip().upper() for line in fh if line.strip() and not line.startswith("#")]
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
 
 
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("ticker", nargs="?", help="Ticker symbol to analyze (e.g., TSLA)")
     p.add_argument("--peers", nargs="*", help="Peer tickers to compare against")
+    p.add_argument("--batch", metavar="FILE", help="Analyze every ticker in FILE (one per line, '-' for stdin)")
+    p.add_argument("--out", metavar="JSONL", help="Batch mode: append one JSON result per line here (default: stdout)")
+    p.add_argument("--concurrency", type=int, default=8, help="Batch mode: tickers analyzed in parallel")
+    p.add_argument("--no-resume", action="store_true", help="Batch mode: redo tickers already completed in --out")
     args = p.parse_args()
 
+    if args.batch:
+        planner = Planner()
+        tickers = _read_tickers(args.batch)
+        if args.out:
+            summary = planner.run_many(tickers, out_path=args.out, resume=not args.no_resume,
+                                       concurrency=args.concurrency, peers=args.peers)
+            print(f"Batch complete: {summary}", file=sys.stderr)
+        else:
+            import json
+            for res in planner.iter_many(tickers, concurrency=args.concurrency, peers=args.peers):
+                print(json.dumps(res, default=str), flush=True)
+        return
+
     if not args.ticker:
         print("Please provide a ticker to analyze, e.g. 'python cli.py TSLA'")
         return
@@ -1,18 +1,53 @@
-"""CalculationAgent: compute common financial ratios and a simple DCF stub."""
+"""CalculationAgent: compute common financial ratios and a simple DCF stub.
+
+With a FactsTable (finsage.facts) it falls back to the latest 10-K EPS when
+live fundamentals lack one, and reports the XBRL revenue/net income/shares.
+context["price"] / context["eps"] (or a {"data": {"price", "eps"}} block)
+override the fetched values for what-if runs.
+
+Scenario mode (context["scenarios"]: True, or {"growth": [...], "discount":
+[...], "horizon": [...]}) adds a DCF sensitivity grid with break-even
+contours (finsage.valuation); run_many() computes the grids for a whole
+watchlist in one broadcast.
+"""
 from typing import Dict, Any
 import math
+from ..telemetry import traced
+from .. import valuation
+
+
+def filed_facts(table: Any, ticker: str, context: Dict[str, Any]) -> Any:
+    """Facts row for a ticker (by CIK when the context has one), or None."""
+    if table is None:
+        return None
+    cik = context.get("cik")
+    try:
+        return table.lookup(cik=int(cik)) if cik else table.lookup(ticker)
+    except (TypeError, ValueError):
+        return table.lookup(ticker)
 
 
 class CalculationAgent:
     name = "CalculationAgent"
 
+    def __init__(self, facts: Any = None):
+        self.facts = facts
+
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
-        fundamentals = context.get("fundamentals", {})
+        fundamentals = context.get("fundamentals") or {}
         history = context.get("history", [])
+        facts = filed_facts(context.get("facts") or self.facts, ticker, context)
 
-        price = fundamentals.get("regularMarketPrice") or (history[-1]["close"] if history else None)
-        eps = fundamentals.get("epsTrailingTwelveMonths")
+        data = context.get("data") or {}
+        price = context.get("price") or fundamentals.get("regularMarketPrice") or data.get("price") or (history[-1]["close"] if history else None)
+        eps, eps_source = context.get("eps"), "override"
+        if not eps:
+            eps = fundamentals.get("epsTrailingTwelveMonths") or data.get("eps")
+            eps_source = "fundamentals" if eps else None
+        if not eps and facts and facts.get("eps"):
+            eps, eps_source = facts["eps"], "10-K"
         pe = None
         if price is not None and eps:
             try:
@@ -30,9 +65,57 @@ class CalculationAgent:
         except Exception:
             dcf = None
 
-        return {
+        out = {
             "ticker": ticker,
+            "price": price,
             "pe_calculated": pe,
             "eps": eps,
+            "eps_source": eps_source,
             "dcf_per_share": dcf,
         }
+        if context.get("scenarios"):
+            grid = self._grid(eps, math.nan if price is None else price, context["scenarios"]) if eps else {"error": "no EPS available for a DCF grid"}
+            out["dcf_grid"] = grid if "error" in grid else valuation.as_tables(grid)
+        if facts:
+            shares = facts.get("shares_outstanding")
+            out["filed"] = {
+                "period_end": facts.get("period_end"),
+                "revenue": facts.get("revenue"),
+                "net_income": facts.get("net_income"),
+                "shares_outstanding": shares,
+                "net_margin": facts["net_income"] / facts["revenue"] if facts.get("net_income") is not None and facts.get("revenue") else None,
+                "market_cap": float(price) * shares if price is not None and shares else None,
+            }
+        return out
+
+    @staticmethod
+    def _grid(eps: Any, price: Any, spec: Any) -> Dict[str, Any]:
+        """valuation.sensitivity() for one EPS or an array of them, or an error dict."""
+        spec = spec if isinstance(spec, dict) else {}
+        try:
+            return valuation.sensitivity(
+                eps,
+                price,
+                growth=spec.get("growth") or valuation.GROWTH,
+                discount=spec.get("discount") or valuation.DISCOUNT,
+                horizon=spec.get("horizon"),
+                terminal_growth=spec.get("terminal_growth", valuation.TERMINAL_GROWTH),
+            )
+        except (TypeError, ValueError) as e:
+            return {"error": f"bad scenario grid: {e}"}
+
+    def run_many(self, contexts: Dict[str, Dict[str, Any]], scenarios: Any = True) -> Dict[str, Dict[str, Any]]:
+        """run() for each ticker's context, with the DCF grids of all of them computed in one broadcast."""
+        results = {t: self.run(t, {k: v for k, v in (ctx or {}).items() if k != "scenarios"}) for t, ctx in contexts.items()}
+        if not scenarios:
+            return results
+        valued = [t for t, res in results.items() if res.get("eps")]
+        for t in results.keys() - set(valued):
+            results[t]["dcf_grid"] = {"error": "no EPS available for a DCF grid"}
+        if valued:
+            # A ticker without a price still gets its value grid; its upside and contours are null.
+            prices = [results[t]["price"] if results[t]["price"] is not None else math.nan for t in valued]
+            grid = self._grid([results[t]["eps"] for t in valued], prices, scenarios)
+            for i, t in enumerate(valued):
+                results[t]["dcf_grid"] = grid if "error" in grid else valuation.as_tables(grid, i)
+        return results
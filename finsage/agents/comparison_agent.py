@@ -1,18 +1,35 @@
-"""ComparisonAgent: compare a ticker to a list of peers using DataAgent outputs."""
+"""ComparisonAgent: compare a ticker to a list of peers using DataAgent outputs.
+
+With a UniverseSnapshot (finsage.universe) it also ranks the ticker within its
+sector and finds nearest peers by market cap, without any network fetches.
+"""
 from typing import Dict, Any, List
+from ..telemetry import traced
 
 
 class ComparisonAgent:
     name = "ComparisonAgent"
 
+    def __init__(self, universe: Any = None):
+        self.universe = universe
+
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
         peers = context.get("peers", [])
-        base = context.get("fundamentals", {})
+        base = context.get("fundamentals") or {}
         comparisons: List[Dict[str, Any]] = []
         for p in peers:
             # Each peer entry expected to contain fundamentals from DataAgent
-            f = p.get("fundamentals", {})
+            f = p.get("fundamentals") or {}
             comparisons.append({"ticker": p.get("ticker"), "pe": f.get("trailingPE"), "marketCap": f.get("marketCap")})
 
-        return {"ticker": ticker, "comparisons": comparisons}
+        out: Dict[str, Any] = {"ticker": ticker, "comparisons": comparisons}
+        universe = context.get("universe") or self.universe
+        if universe is not None:
+            out["sector_rank"] = universe.rank(ticker, fundamentals=base)
+            nearest = universe.nearest_peers(ticker, k=context.get("peer_count", 5), fundamentals=base)
+            out["nearest_peers"] = nearest
+            if not peers:
+                out["comparisons"] = [{"ticker": r["ticker"], "pe": r.get("trailingPE"), "marketCap": r.get("marketCap")} for r in nearest]
+        return out
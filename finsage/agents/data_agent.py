@@ -3,7 +3,9 @@
 This agent fetches price history and basic fundamentals for a ticker.
 It falls back gracefully if yfinance isn't installed and returns helpful error messages.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List
+from .. import deadline
+from ..telemetry import span, traced
 
 try:
     import yfinance as yf
@@ -16,21 +18,51 @@ class DataAgent:
 
     name = "DataAgent"
 
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
         if yf is None:
             return {"error": "yfinance not installed. Install with 'pip install yfinance'"}
 
         tk = yf.Ticker(ticker)
-        info = tk.info if hasattr(tk, "info") else {}
-
         # Historical prices (last 90 days)
-        hist = tk.history(period="90d", auto_adjust=False)
+        with span("upstream", "yfinance.history"):
+            hist = deadline.hedged("yfinance.history", lambda: tk.history(period="90d", auto_adjust=False, timeout=deadline.timeout(10)))
+        return self._build(ticker, tk, hist)
+
+    @traced
+    def run_many(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch many tickers, sharing one bulk `yf.download` for all price histories."""
+        if yf is None:
+            return {t: {"error": "yfinance not installed. Install with 'pip install yfinance'"} for t in tickers}
+        if len(tickers) < 2:
+            return {t: self.run(t) for t in tickers}
+
+        try:
+            with span("upstream", "yfinance.download"):
+                frames = yf.download(tickers, period="90d", auto_adjust=False, group_by="ticker", threads=True, progress=False)
+        except Exception:
+            return {t: self.run(t) for t in tickers}
+
+        out: Dict[str, Dict[str, Any]] = {}
+        for t in tickers:
+            try:
+                out[t] = self._build(t, yf.Ticker(t), frames[t])
+            except Exception as e:
+                out[t] = {"ticker": t, "error": f"bulk fetch failed: {e}"}
+        return out
+
+    def _build(self, ticker: str, tk: Any, hist: Any) -> Dict[str, Any]:
+        with span("upstream", "yfinance.info"):
+            info = tk.info if hasattr(tk, "info") else {}
+
         hist_records = []
         if not hist.empty:
+            # bulk downloads pad missing sessions with NaN rows; NaN != NaN skips them
             hist_records = [
                 {"date": str(idx.date()), "close": float(row["Close"]), "volume": int(row["Volume"])}
                 for idx, row in hist.iterrows()
+                if row["Close"] == row["Close"]
             ]
 
         fundamentals = {
@@ -5,26 +5,47 @@ Works without API key. Uses SEC public endpoints and requires a proper User-Agen
 from typing import Dict, Any, List
 import requests
 import time
+from .. import deadline
+from ..telemetry import span, traced
+from ..tickers import SEC_TICKER_MAP_URL
 
-SEC_TICKER_MAP_URL = "https://www.sec.gov/files/company_tickers.json"
 SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik}.json"
 
 
 class DocumentAgent:
     name = "DocumentAgent"
 
-    def __init__(self, user_agent: str = None):
+    def __init__(self, user_agent: str = None, cache: Any = None):
         # SEC requires a descriptive User-Agent
         self.user_agent = user_agent or "finsage-agent (email@example.com)"
+        # Optional ResultCache; the ~1MB ticker map changes rarely and is shared across tickers.
+        self.cache = cache
+        self._cik_index: Dict[str, Any] = {}
+        self._indexed_map: Any = None
 
     def _get_headers(self):
         return {"User-Agent": self.user_agent, "Accept": "application/json"}
 
     def _load_ticker_map(self) -> Dict[str, Any]:
-        resp = requests.get(SEC_TICKER_MAP_URL, headers=self._get_headers(), timeout=10)
-        resp.raise_for_status()
+        if self.cache is not None:
+            return self.cache.get_or_compute("sec_ticker_map", "all", self._fetch_ticker_map)
+        return self._fetch_ticker_map()
+
+    def _fetch_ticker_map(self) -> Dict[str, Any]:
+        with span("upstream", "sec.ticker_map"):
+            resp = requests.get(SEC_TICKER_MAP_URL, headers=self._get_headers(), timeout=deadline.timeout(10))
+            resp.raise_for_status()
         return resp.json()
 
+    def _lookup_cik(self, mapping: Dict[str, Any], ticker: str) -> Any:
+        # The SEC ticker map keys are numeric strings for entries; index them by ticker once
+        # per map object so batch runs over thousands of tickers don't rescan ~10k entries each.
+        if mapping is not self._indexed_map:
+            self._cik_index = {val.get("ticker", "").upper(): val.get("cik_str") for val in mapping.values()}
+            self._indexed_map = mapping
+        return self._cik_index.get(ticker.upper())
+
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
         try:
@@ -32,13 +53,7 @@ class DocumentAgent:
         except Exception as e:
             return {"error": f"Failed to load SEC ticker map: {e}"}
 
-        # The SEC ticker map keys are numeric strings for entries; find matching entry
-        cik = None
-        for key, val in mapping.items():
-            if val.get("ticker", "").upper() == ticker.upper():
-                cik = val.get("cik_str")
-                break
-
+        cik = self._lookup_cik(mapping, ticker)
         if cik is None:
             return {"error": f"CIK not found for ticker {ticker}"}
 
@@ -46,8 +61,11 @@ class DocumentAgent:
         cik_padded = str(cik).zfill(10)
         try:
             url = SUBMISSIONS_URL.format(cik=cik_padded)
-            resp = requests.get(url, headers=self._get_headers(), timeout=10)
-            resp.raise_for_status()
+            with span("upstream", "sec.submissions"):
+                resp = deadline.hedged(
+                    "sec.submissions", lambda: requests.get(url, headers=self._get_headers(), timeout=deadline.timeout(10))
+                )
+                resp.raise_for_status()
             data = resp.json()
         except Exception as e:
             return {"error": f"Failed to fetch submissions for CIK {cik}: {e}"}
@@ -65,4 +83,4 @@ class DocumentAgent:
             doc_url = base + acc + "-index.htm"
             results.append({"form": form, "filing_date": filing_date, "url": doc_url})
 
-        return {"ticker": ticker, "source": "sec.submissions", "filings": results}
+        return {"ticker": ticker, "cik": str(cik), "source": "sec.submissions", "filings": results}
@@ -4,10 +4,15 @@ Primary: OpenAI ChatCompletion (requires OPENAI_API_KEY and `openai` package).
 Fallback: Hugging Face `transformers` text-generation pipeline (best-effort).
 
 The agent accepts a prompt and optional context passages; it returns the generated text
-and any metadata about the call.
+and any metadata about the call. Passages are deduplicated and packed into a token
+budget by finsage.prompt.PromptBuilder; prompt sizes are exported as the
+finsage_prompt_tokens histogram.
 """
 from typing import Dict, Any, List, Optional
 import os
+from .. import deadline
+from ..prompt import TOKEN_BUCKETS, PromptBuilder
+from ..telemetry import REGISTRY, span, traced
 
 try:
     import openai
@@ -23,46 +28,51 @@ except Exception:
 class LLMAgent:
     name = "LLMAgent"
 
-    def __init__(self, model: str = "gpt-3.5-turbo"):
+    def __init__(self, model: str = "gpt-3.5-turbo", prompt_budget: Optional[int] = None):
         self.model = model
         self.openai_available = openai is not None and os.environ.get("OPENAI_API_KEY")
         self.hf_available = pipeline is not None
+        self.prompt_builder = PromptBuilder(budget=prompt_budget)
 
-    def _compose_prompt(self, user_query: str, passages: Optional[List[Dict[str, Any]]] = None) -> str:
-        SYSTEM = (
-            "You are FinSage, an assistant that answers financial queries using provided factual excerpts. "
-            "Cite sources by url when appropriate and be concise."
+    def _record(self, built: Dict[str, Any], backend: str) -> None:
+        REGISTRY.observe(
+            "finsage_prompt_tokens", {"backend": backend}, built["tokens"], help="Prompt size in tokens per LLM call.", buckets=TOKEN_BUCKETS
         )
-        ctx = SYSTEM + "\n\n"
-        if passages:
-            ctx += "Relevant excerpts:\n"
-            for i, p in enumerate(passages, 1):
-                ctx += f"[{i}] {p.get('text')[:500]} ... (source: {p.get('source')})\n\n"
-        ctx += "User question: " + user_query + "\n\nAnswer succinctly and include citations like [1]."
-        return ctx
+        REGISTRY.inc("finsage_prompt_passages_dropped_total", {"reason": "duplicate"}, built["passages_dropped"]["duplicate"],
+                     help="Retrieved passages left out of prompts.")
+        REGISTRY.inc("finsage_prompt_passages_dropped_total", {"reason": "budget"}, built["passages_dropped"]["budget"])
 
+    @traced
     def run(self, user_query: str, passages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
-        prompt = self._compose_prompt(user_query, passages)
+        built = self.prompt_builder.build(user_query, passages)
+        usage = {"prompt_tokens": built["tokens"], "passages_used": built["passages_used"]}
 
         # Prefer OpenAI Chat API
         if self.openai_available:
             try:
                 openai.api_key = os.environ.get("OPENAI_API_KEY")
                 # Use chat format
-                messages = [{"role": "system", "content": "You are a helpful financial assistant."}, {"role": "user", "content": prompt}]
-                res = openai.ChatCompletion.create(model=self.model, messages=messages, temperature=0.2, max_tokens=512)
+                # The system prompt is a constant first message, so the provider can cache its prefix.
+                messages = [{"role": "system", "content": built["system"]}, {"role": "user", "content": built["user"]}]
+                self._record(built, "openai")
+                with span("upstream", "llm.openai"):
+                    res = openai.ChatCompletion.create(
+                        model=self.model, messages=messages, temperature=0.2, max_tokens=512, request_timeout=deadline.timeout(60)
+                    )
                 txt = res["choices"][0]["message"]["content"].strip()
-                return {"model": self.model, "text": txt, "source": "openai"}
+                return {"model": self.model, "text": txt, "source": "openai", **usage}
             except Exception as e:
                 return {"error": f"OpenAI call failed: {e}"}
 
         # Fallback to Hugging Face text-generation
         if self.hf_available:
             try:
-                gen = pipeline("text-generation", model="gpt2", device=-1)
-                out = gen(prompt, max_length=512, do_sample=False)
+                self._record(built, "huggingface")
+                with span("upstream", "llm.huggingface"):
+                    gen = pipeline("text-generation", model="gpt2", device=-1)
+                    out = gen(built["system"] + "\n\n" + built["user"], max_length=512, do_sample=False)
                 txt = out[0]["generated_text"]
-                return {"model": "hf-gpt2", "text": txt, "source": "huggingface"}
+                return {"model": "hf-gpt2", "text": txt, "source": "huggingface", **usage}
             except Exception as e:
                 return {"error": f"HF pipeline failed: {e}"}
 
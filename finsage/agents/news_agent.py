@@ -4,6 +4,9 @@ Note: sentiment is a simple rule-based score (counts positive/negative words). F
 use a proper NLP model or sentiment API.
 """
 from typing import Dict, Any, List
+from .. import deadline
+from ..telemetry import span, traced
+
 try:
     import feedparser
 except Exception:  # pragma: no cover - optional dependency
@@ -17,6 +20,7 @@ NEG_WORDS = {"miss", "decline", "downgrade", "lawsuit", "recall", "loss"}
 class NewsAgent:
     name = "NewsAgent"
 
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
         query = f"{ticker} stock"
@@ -24,7 +28,11 @@ class NewsAgent:
             return {"error": "feedparser not installed. Install with 'pip install feedparser'"}
 
         url = f"https://news.google.com/rss/search?q={query}"
-        feed = feedparser.parse(url)
+        with span("upstream", "google_news_rss") as s:
+            # feedparser has no timeout of its own; hedging (and the planner deadline) bound a stuck fetch
+            feed = deadline.hedged("google_news_rss", lambda: feedparser.parse(url))
+            if getattr(feed, "bozo", False) and not feed.entries:
+                s.fail()
         items: List[Dict[str, Any]] = []
         for entry in feed.entries[:10]:
             title = entry.get("title", "")
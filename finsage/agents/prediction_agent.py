@@ -1,8 +1,15 @@
 """PredictionAgent: a lightweight forecast using linear trend on recent prices.
 
 Provides a point forecast for the next period and a simple confidence estimate based on residuals.
+With context["backtest"] set, also reports how the same forecast would have
+scored walking forward over the rest of the history (see finsage.backtest).
+With context["simulate"] (True, or keyword arguments for
+finsage.montecarlo.simulate such as {"paths": 100000, "method": "bootstrap"}),
+also reports a Monte Carlo interval from simulated price paths.
 """
 from typing import Dict, Any
+from ..telemetry import traced
+
 try:
     import numpy as np
 except Exception:  # pragma: no cover - optional dependency
@@ -12,6 +19,7 @@ except Exception:  # pragma: no cover - optional dependency
 class PredictionAgent:
     name = "PredictionAgent"
 
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
         history = context.get("history", [])
@@ -37,10 +45,31 @@ class PredictionAgent:
         resid = ys - preds
         sigma = float(np.std(resid))
 
-        return {
+        out = {
             "ticker": ticker,
             "forecast_next_close": forecast,
             "trend_slope": float(slope),
             "residual_std": sigma,
             "confidence_interval_approx": [forecast - 1.96 * sigma, forecast + 1.96 * sigma],
         }
+        if context.get("backtest"):
+            if len(history) > N:
+                from ..backtest import backtest_history
+
+                out["backtest"] = backtest_history(history, window=N)
+            else:
+                out["backtest"] = {"error": f"need more than {N} days of history to backtest"}
+        if context.get("simulate"):
+            from ..compute import ComputeBusy
+            from ..montecarlo import simulate
+
+            opts = context["simulate"] if isinstance(context["simulate"], dict) else {}
+            try:
+                mc = simulate([h["close"] for h in history], **opts)
+            except (TypeError, ValueError, ComputeBusy) as e:
+                mc = {"error": str(e)}
+            if "terminal_quantiles" in mc:
+                q = mc["terminal_quantiles"]
+                mc["confidence_interval_mc"] = [q.get("p2.5"), q.get("p97.5")]
+            out["monte_carlo"] = mc
+        return out
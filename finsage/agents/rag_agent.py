@@ -1,16 +1,25 @@
 """RAGAgent: simple retrieval-augmented generation support.
 
 Implements document ingestion (fetch filing HTML/text), embedding via
-sentence-transformers, and an in-memory vector store with cosine similarity.
+sentence-transformers, and an in-memory passage store partitioned by ticker
+with metadata filters (see finsage.passage_store). Query embeddings go through
+a cached, micro-batching finsage.query_encoder.QueryEncoder.
 
 Notes:
 - Requires `sentence-transformers` for embeddings. If not installed, the agent
   returns an error message instead of raising at import time.
 - This is a minimal, dependency-light RAG implementation suitable for experiments.
 """
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import requests
 import os
+from .. import deadline
+from ..compute import ComputeBusy, embed_model_name, html_to_text
+from ..passage_store import META_FIELDS, PassageStore, content_hash, detect_section, near_dup_key
+from ..query_encoder import QueryEncoder
+from ..telemetry import span, traced
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -19,95 +28,234 @@ except Exception:  # pragma: no cover - optional dependency
     SentenceTransformer = None
     np = None
 
-try:
-    from bs4 import BeautifulSoup
-except Exception:
-    BeautifulSoup = None
+# Filings smaller than this are parsed inline; IPC would cost more than the parse.
+OFFLOAD_HTML_MIN_CHARS = 200_000
 
 
 class RAGAgent:
     name = "RAGAgent"
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model_name = model_name
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        executor: Any = None,
+        max_passages: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        # Defaults to FINSAGE_EMBED_MODEL. An executor embeds with the model its workers loaded,
+        # so a different one here would silently mix embedding spaces.
+        self.model_name = model_name or embed_model_name()
+        worker_model = getattr(executor, "model_name", None)
+        if worker_model and worker_model != self.model_name:
+            raise ValueError(f"RAGAgent model {self.model_name!r} does not match the compute executor's {worker_model!r}")
         self.model = None
-        self.index: List[Dict[str, Any]] = []
-        if SentenceTransformer is not None:
+        # Per-ticker shards, each with its own BM25 index and embedding matrix. Bounds default to
+        # FINSAGE_RAG_MAX_PASSAGES / FINSAGE_RAG_MAX_BYTES; beyond them LRU documents are evicted.
+        if max_passages is None and os.environ.get("FINSAGE_RAG_MAX_PASSAGES"):
+            max_passages = int(os.environ["FINSAGE_RAG_MAX_PASSAGES"])
+        if max_bytes is None and os.environ.get("FINSAGE_RAG_MAX_BYTES"):
+            max_bytes = int(os.environ["FINSAGE_RAG_MAX_BYTES"])
+        self.store = PassageStore(max_passages=max_passages, max_bytes=max_bytes)
+        # Optional finsage.compute.ComputeExecutor: embedding and large HTML parses then run
+        # in warm worker processes instead of holding the GIL on the request thread.
+        self.executor = executor
+        self.queries = QueryEncoder(self._encode)
+        if SentenceTransformer is not None and executor is None:
             try:
                 self.model = SentenceTransformer(self.model_name)
             except Exception:
                 self.model = None
 
-    def _fetch_text(self, url: str) -> str:
-        try:
-            r = requests.get(url, timeout=15)
-            r.raise_for_status()
-            text = r.text
-            if BeautifulSoup is not None:
-                soup = BeautifulSoup(text, "html.parser")
-                # remove scripts/styles
-                for s in soup(["script", "style"]):
-                    s.decompose()
-                return soup.get_text(separator=" ", strip=True)
-            return text
-        except Exception:
-            return ""
-
-    def ingest_urls(self, docs: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Ingest a list of documents with keys {'id','url','source'} and index their embeddings."""
+    def _ensure_model(self) -> Optional[Dict[str, Any]]:
+        """Load the embedding model on first use; return an error dict if unavailable."""
         if SentenceTransformer is None or np is None:
             return {"error": "sentence-transformers or numpy not installed. Install with 'pip install sentence-transformers numpy'"}
-
-        if self.model is None:
-            # attempt to load
+        if self.model is None and self.executor is None:
             try:
                 self.model = SentenceTransformer(self.model_name)
             except Exception as e:
                 return {"error": f"failed to load embedding model: {e}"}
+        return None
+
+    def _encode(self, texts: Any, batch_size: int = 32) -> Any:
+        with span("upstream", "embedding"):
+            if self.executor is not None:
+                single = isinstance(texts, str)
+                embs = self.executor.embed([texts] if single else texts, batch_size=batch_size)
+                return embs[0] if single else embs
+            return self.model.encode(texts, batch_size=batch_size)
 
-        new_items = 0
-        for d in docs:
-            url = d.get("url")
-            doc_id = d.get("id") or d.get("url")
-            text = self._fetch_text(url)
+    def _fetch_text(self, url: str, timeout: float = 15) -> str:
+        try:
+            with span("upstream", "sec.filing"):
+                r = deadline.hedged("sec.filing", lambda: requests.get(url, timeout=timeout))
+                r.raise_for_status()
+            text = r.text
+            if self.executor is not None and len(text) >= OFFLOAD_HTML_MIN_CHARS:
+                return self.executor.html_to_text(text)
+            return html_to_text(text)
+        except Exception:
+            return ""
+
+    @traced
+    def ingest_urls(self, docs: List[Dict[str, Any]], fetch_workers: int = 8, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Ingest documents with keys {'id','url','source'} and index their embeddings.
+        Optional metadata keys (ticker, cik, form, filing_date) are copied onto
+        every passage; each passage also carries the "Item N" section it falls under.
+
+        Idempotent: documents already in the store are not re-fetched (filing
+        URLs are immutable) unless refresh=True; a refreshed document whose
+        content hash changed replaces its old passages.
+        """
+        err = self._ensure_model()
+        if err:
+            return err
+
+        unique = {(d.get("id") or d.get("url")): d for d in docs}
+        todo = {doc_id: d for doc_id, d in unique.items() if refresh or not self.store.has_document(doc_id)}
+        for doc_id in unique.keys() - todo.keys():
+            self.store.touch(doc_id)
+
+        # Fetches are I/O bound; overlap them, then embed everything in one batched encode.
+        urls = [d.get("url") for d in todo.values()]
+        # Fetch threads don't inherit the request's deadline, so cap their timeout here.
+        fetch = partial(self._fetch_text, timeout=deadline.timeout(15))
+        if fetch_workers > 1 and len(urls) > 1:
+            with ThreadPoolExecutor(max_workers=min(fetch_workers, len(urls))) as pool:
+                texts = list(pool.map(fetch, urls))
+        else:
+            texts = [fetch(u) for u in urls]
+
+        passages: List[Dict[str, Any]] = []
+        hashes: Dict[str, str] = {}
+        unchanged = 0
+        for (doc_id, d), url, text in zip(todo.items(), urls, texts):
             if not text:
                 continue
+            h = content_hash(text)
+            if self.store.document_hash(doc_id) == h:
+                unchanged += 1
+                self.store.touch(doc_id)
+                continue
+            self.store.delete_document(doc_id)
+            hashes[doc_id] = h
+            meta = {k: d[k] for k in META_FIELDS if d.get(k)}
+            section = None
             # simple chunking: split by paragraphs into smaller passages
-            passages = [p.strip() for p in text.split("\n") if p.strip()][:30]
-            for i, p in enumerate(passages):
-                emb = self.model.encode(p)
-                self.index.append({"id": f"{doc_id}#p{i}", "text": p, "embedding": emb, "source": url})
-                new_items += 1
-
-        return {"ingested": new_items, "index_size": len(self.index)}
-
-    def _cosine_sim(self, a: Any, b: Any) -> float:
-        if np is None:
-            return 0.0
-        if isinstance(a, list):
-            a = np.array(a)
-        if isinstance(b, list):
-            b = np.array(b)
-        if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
-            return 0.0
-        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
-
-    def retrieve(self, query: str, top_k: int = 5) -> Dict[str, Any]:
-        """Retrieve top_k passages relevant to query."""
-        if SentenceTransformer is None or np is None:
-            return {"error": "sentence-transformers or numpy not installed. Install with 'pip install sentence-transformers numpy'"}
-        if self.model is None:
-            try:
-                self.model = SentenceTransformer(self.model_name)
-            except Exception as e:
-                return {"error": f"failed to load embedding model: {e}"}
+            chunks = [p.strip() for p in text.split("\n") if p.strip()][:30]
+            for i, p in enumerate(chunks):
+                section = detect_section(p) or section
+                item = {"id": f"{doc_id}#p{i}", "doc_id": doc_id, "text": p, "source": url, **meta}
+                if section:
+                    item["section"] = section
+                passages.append(item)
+
+        out = self.add_passages(passages, doc_hashes=hashes)
+        if not out.get("error"):
+            out["skipped_documents"] = len(unique) - len(todo) + unchanged
+        return out
+
+    @traced
+    def add_passages(
+        self,
+        passages: List[Dict[str, Any]],
+        batch_size: int = 64,
+        doc_hashes: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Bulk-index pre-chunked passages ({'id','text','source', ...metadata}) with one batched encode.
+        Passages whose id is already indexed, or whose normalized text duplicates a live
+        passage of the same ticker, are dropped before encoding.
+        """
+        err = self._ensure_model()
+        if err:
+            return err
+
+        fresh: List[Dict[str, Any]] = []
+        seen = set()
+        for p in passages:
+            key = (str(p.get("ticker") or "").upper(), near_dup_key(p["text"]))
+            if p["id"] in seen or key in seen or self.store.is_duplicate(p):
+                continue
+            seen.add(p["id"])
+            seen.add(key)
+            fresh.append(p)
+        duplicates = len(passages) - len(fresh)
+
+        if not fresh:
+            evicted = self.store.add([], doc_hashes=doc_hashes)["evicted"] if doc_hashes else 0
+            return {"ingested": 0, "duplicates": duplicates, "evicted": evicted, "index_size": len(self.store)}
+
+        try:
+            embs = self._encode([p["text"] for p in fresh], batch_size=batch_size)
+        except ComputeBusy as e:
+            return {"error": str(e)}
+        counts = self.store.add((dict(p, embedding=emb) for p, emb in zip(fresh, embs)), doc_hashes=doc_hashes)
 
-        q_emb = self.model.encode(query)
-        scored: List[Tuple[float, Dict[str, Any]]] = []
-        for item in self.index:
-            score = self._cosine_sim(q_emb, item["embedding"])
-            scored.append((score, item))
+        return {
+            "ingested": counts["added"],
+            "duplicates": duplicates + counts["duplicates"],
+            "evicted": counts["evicted"],
+            "index_size": len(self.store),
+        }
 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top = [ {"score": s, "id": it["id"], "text": it["text"], "source": it.get("source")} for s, it in scored[:top_k] ]
-        return {"query": query, "top_k": top_k, "results": top}
+    def delete_document(self, doc_id: str) -> Dict[str, Any]:
+        """Remove a document's passages from retrieval (tombstoned, compacted later)."""
+        return {"deleted": self.store.delete_document(doc_id), "index_size": len(self.store)}
+
+    @traced
+    def retrieve(self, query: str, top_k: int = 5, mode: str = "hybrid", filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Retrieve top_k passages relevant to query.
+
+        mode="hybrid" (default) fuses BM25 and dense cosine rankings with
+        reciprocal rank fusion; when BM25 finds at least top_k matches, only
+        those lexical candidates are dense-scored. mode="dense" scores every
+        candidate passage by cosine similarity alone.
+
+        filters restrict the candidates before any scoring, e.g.
+        {"ticker": "TSLA", "form": "10-K", "date_from": "2023-01-01"}.
+        """
+        err = self._ensure_model()
+        if err:
+            return err
+
+        try:
+            q_emb = self.queries.encode(query)
+        except ComputeBusy as e:
+            return {"error": str(e)}
+        return self._search(query, q_emb, top_k, mode, filters)
+
+    @traced
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        mode: str = "hybrid",
+        filters: Any = None,
+    ) -> Dict[str, Any]:
+        """
+        Retrieve for many queries, encoding them in a single batched forward pass.
+        `filters` is one dict applied to every query, or a list with one per query.
+        """
+        err = self._ensure_model()
+        if err:
+            return err
+
+        per_query = filters if isinstance(filters, list) else [filters] * len(queries)
+        try:
+            q_embs = self.queries.encode_many(list(queries))
+        except ComputeBusy as e:
+            return {"error": str(e)}
+        return {"results": [self._search(q, e, top_k, mode, f) for q, e, f in zip(queries, q_embs, per_query)]}
+
+    def _search(self, query: str, q_emb: Any, top_k: int, mode: str = "hybrid", filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        try:
+            results = self.store.search(query, q_emb, top_k, mode, filters)
+        except ValueError as e:
+            return {"error": str(e)}
+        out = {"query": query, "top_k": top_k, "mode": mode, "results": results}
+        if filters:
+            out["filters"] = filters
+        return out
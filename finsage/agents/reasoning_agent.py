@@ -1,15 +1,17 @@
 """ReasoningAgent: synthesize findings into a concise investment thesis."""
 from typing import Dict, Any
+from ..telemetry import traced
 
 
 class ReasoningAgent:
     name = "ReasoningAgent"
 
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
-        fundamentals = context.get("fundamentals", {})
+        fundamentals = context.get("fundamentals") or {}
         news = context.get("news", {})
-        calc = context.get("metrics", {})
+        calc = context.get("metrics") or {}
         forecast = context.get("prediction", {})
 
         parts = []
@@ -1,13 +1,21 @@
 """RiskAgent: lightweight risk identification and scoring."""
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from ..risk_engine import align_on_dates, risk_profile
+from ..telemetry import traced
+
+
+def _series(history: Optional[List[Dict[str, Any]]]) -> Tuple[List[Any], List[float]]:
+    rows = [h for h in history or [] if h.get("close") is not None]
+    return [h.get("date") for h in rows], [float(h["close"]) for h in rows]
 
 
 class RiskAgent:
     name = "RiskAgent"
 
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
-        fundamentals = context.get("fundamentals", {})
+        fundamentals = context.get("fundamentals") or {}
         news = context.get("news", {})
         score = 50
         notes = []
@@ -23,5 +31,32 @@ class RiskAgent:
             score += 20
             notes.append("recent negative news")
 
+        # Price-based risk from history (and beta if a benchmark history is supplied)
+        metrics = None
+        dates, closes = _series(context.get("history"))
+        if len(closes) >= 3:
+            bench_dates, bench = _series(context.get("benchmark_history"))
+            metrics = risk_profile(closes)
+            if bench:
+                # The two histories are fetched and cached separately; pair closes by date, not position.
+                own, bench = align_on_dates(dates, closes, bench_dates, bench)
+                paired = risk_profile(own, bench) if len(own) >= 3 else {"beta": None, "beta_observations": max(0, len(own) - 1)}
+                metrics.update({k: v for k, v in paired.items() if k.startswith("beta")})
+            if metrics["volatility"] > 0.5:
+                score += 15
+                notes.append(f"high volatility ({metrics['volatility']:.0%} annualized)")
+            elif metrics["volatility"] < 0.2:
+                score -= 10
+                notes.append("low volatility")
+            if metrics["max_drawdown"] < -0.3:
+                score += 10
+                notes.append(f"deep drawdown ({metrics['max_drawdown']:.0%})")
+            if (metrics.get("beta") or 0) > 1.5:
+                score += 5
+                notes.append(f"high beta ({metrics['beta']:.2f})")
+
         score = max(0, min(100, score))
-        return {"ticker": ticker, "risk_score": score, "notes": notes}
+        out = {"ticker": ticker, "risk_score": score, "notes": notes}
+        if metrics is not None:
+            out["metrics"] = metrics
+        return out
@@ -1,18 +1,29 @@
-"""ValidationAgent: cross-validate key data points and flag discrepancies."""
+"""ValidationAgent: cross-validate key data points and flag discrepancies.
+
+With a FactsTable (finsage.facts) it also checks live EPS and market cap
+against the latest 10-K figures.
+"""
 from typing import Dict, Any
+from ..telemetry import traced
+from .calculation_agent import filed_facts
 
 
 class ValidationAgent:
     name = "ValidationAgent"
 
+    def __init__(self, facts: Any = None):
+        self.facts = facts
+
+    @traced
     def run(self, ticker: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         context = context or {}
-        fundamentals = context.get("fundamentals", {})
+        fundamentals = context.get("fundamentals") or {}
         history = context.get("history", [])
+        facts = filed_facts(context.get("facts") or self.facts, ticker, context)
         issues = []
 
         if not fundamentals:
-            issues.append("missing fundamentals")
+            issues.append("missing fundamentals" if not facts else "missing fundamentals (10-K facts available)")
 
         if not history:
             issues.append("missing price history")
@@ -29,4 +40,16 @@ class ValidationAgent:
             except Exception:
                 issues.append("failed to validate PE")
 
+        # Trailing EPS drifts from the last fiscal year, so only large gaps are flagged.
+        if facts:
+            filed_eps = facts.get("eps")
+            if eps and filed_eps and abs(float(eps) - filed_eps) / abs(filed_eps) > 0.5:
+                issues.append("trailing EPS differs >50% from latest 10-K EPS")
+            shares = facts.get("shares_outstanding")
+            cap = fundamentals.get("marketCap")
+            if cap and price and shares:
+                implied = float(price) * shares
+                if abs(implied - float(cap)) / float(cap) > 0.2:
+                    issues.append("market cap differs >20% from price x filed shares outstanding")
+
         return {"ticker": ticker, "issues": issues, "ok": len(issues) == 0}
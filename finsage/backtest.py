@@ -0,0 +1,91 @@
+"""Vectorized walk-forward backtest of PredictionAgent's linear-trend forecast.
+
+PredictionAgent fits a least-squares line to the last `window` closes,
+forecasts the next close at x = window and quotes forecast +/- 1.96 * sigma
+(population std of the residuals) as its interval. Here every rolling fit
+over a 1-D series (days,) or a (tickers, days) matrix is computed at once:
+a strided sliding-window view exposes each window without copying, and the
+closed-form OLS sums are contracted over it with einsum, so nothing loops
+over windows in Python.
+
+Forecast i uses closes [i, i + window) and is scored against close
+i + window, exactly as if the agent had been run on each day's history.
+Inputs must be aligned and NaN-free along the time axis.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOW = 30
+Z = 1.96
+
+
+def rolling_trend(prices: Any, window: int = WINDOW, z: float = Z) -> Dict[str, np.ndarray]:
+    """
+    The agent's fit for every trailing window, shape (..., days - window + 1):
+    slope, next-day forecast, residual std and the forecast +/- z * std band.
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    if window < 2 or p.shape[-1] < window:
+        raise ValueError(f"need window >= 2 and at least {window} days, got {p.shape[-1]}")
+    # Slope, residuals and band width are shift-invariant; demeaning keeps the sum-of-squares identity precise.
+    level = p.mean(axis=-1, keepdims=True)
+    win = sliding_window_view(p - level, window, axis=-1)
+    xc = np.arange(window) - (window - 1) / 2.0
+    sxx = float(xc @ xc)
+    ybar = win.mean(axis=-1)
+    slope = np.einsum("...ij,j->...i", win, xc) / sxx
+    syy = np.einsum("...ij,...ij->...i", win, win) - window * ybar * ybar
+    sigma = np.sqrt(np.maximum(syy - slope * slope * sxx, 0.0) / window)
+    forecast = level + ybar + slope * (window - (window - 1) / 2.0)
+    return {
+        "slope": slope,
+        "forecast": forecast,
+        "residual_std": sigma,
+        "lower": forecast - z * sigma,
+        "upper": forecast + z * sigma,
+    }
+
+
+def walk_forward(prices: Any, window: int = WINDOW, z: float = Z) -> Dict[str, Any]:
+    """
+    Error metrics of the next-day forecasts over the whole history. For a
+    matrix each value is an array with one entry per row; for a series, plain
+    floats. `skill` is 1 - MAE / MAE of the no-change forecast (> 0 beats it).
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    if p.shape[-1] <= window:
+        raise ValueError(f"need more than {window} days to score a forecast, got {p.shape[-1]}")
+    fit = {k: v[..., :-1] for k, v in rolling_trend(p, window, z).items()}
+    actual = p[..., window:]
+    last = p[..., window - 1:-1]
+    err = fit["forecast"] - actual
+    abs_err = np.abs(err)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        naive_mae = np.abs(actual - last).mean(axis=-1)
+        skill = 1.0 - abs_err.mean(axis=-1) / naive_mae
+        mape = np.mean(abs_err / np.abs(actual), axis=-1)
+    out: Dict[str, Any] = {
+        "window": window,
+        "forecasts": int(actual.shape[-1]),
+        "mae": abs_err.mean(axis=-1),
+        "rmse": np.sqrt(np.mean(err * err, axis=-1)),
+        "mape": mape,
+        "bias": err.mean(axis=-1),
+        "directional_accuracy": np.mean(np.sign(fit["forecast"] - last) == np.sign(actual - last), axis=-1),
+        "interval_z": z,
+        "interval_coverage": np.mean((actual >= fit["lower"]) & (actual <= fit["upper"]), axis=-1),
+        "interval_width_pct": np.mean((fit["upper"] - fit["lower"]) / np.abs(actual), axis=-1),
+        "naive_mae": naive_mae,
+        "skill": skill,
+    }
+    if p.ndim == 1:
+        out = {k: (float(v) if isinstance(v, np.generic) or (isinstance(v, np.ndarray) and v.ndim == 0) else v) for k, v in out.items()}
+    return out
+
+
+def backtest_history(history: List[Dict[str, Any]], window: int = WINDOW, z: float = Z) -> Dict[str, Any]:
+    """walk_forward over a DataAgent-style history (list of {"close": ...})."""
+    closes = np.array([h["close"] for h in history], dtype=np.float64)
+    return walk_forward(closes, window, z)
@@ -0,0 +1,220 @@
+"""Shared TTL result cache with single-flight request coalescing.
+
+Agent outputs are cached per (agent, key) with per-agent TTLs: fundamentals
+for hours, news for minutes, filings for days. Concurrent misses for the same
+key wait on a single in-flight fetch instead of each hitting the upstream.
+
+The in-process tier is an LRU bounded by entry count. An optional shared
+backend (Redis) lets several workers reuse each other's results; it is only
+consulted on a local miss and only by the single in-flight leader.
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+from . import telemetry
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency
+    redis = None
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Seconds; keyed by agent name (or any cache namespace).
+DEFAULT_TTLS: Dict[str, float] = {
+    "DataAgent": 6 * HOUR,
+    "NewsAgent": 10 * MINUTE,
+    "DocumentAgent": 3 * DAY,
+    "sec_ticker_map": DAY,
+}
+DEFAULT_TTL = 5 * MINUTE
+
+
+class TTLCache:
+    """Thread-safe LRU map whose entries also expire after a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires <= self._clock():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """Shared cache tier in Redis; values are stored as JSON with a server-side TTL."""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "finsage:", client: Any = None):
+        if client is None:
+            if redis is None:
+                raise ImportError("redis not installed. Install with 'pip install redis'")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.setex(self.prefix + key, max(1, int(ttl)), json.dumps(value))
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """Per-agent TTL cache with single-flight coalescing and an optional shared backend."""
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttls: Optional[Dict[str, float]] = None,
+        backend: Any = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.local = TTLCache(max_entries, clock=clock)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.backend = backend
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, agent: str) -> float:
+        return self.ttls.get(agent, DEFAULT_TTL)
+
+    def get_or_compute(self, agent: str, key: str, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached result for (agent, key), or run `compute` once for
+        all concurrent callers. Results containing an "error" key are returned
+        but not cached, so transient upstream failures are retried next time.
+        """
+        full_key = f"{agent}:{key}"
+        found, value = self.local.get(full_key)
+        if found:
+            telemetry.record_cache(agent, True)
+            return value
+
+        with self._lock:
+            flight = self._inflight.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[full_key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            telemetry.record_cache(agent, True)
+            telemetry.REGISTRY.inc("finsage_cache_coalesced_total", {"cache": agent}, help="Misses that waited on an in-flight fetch.")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            ttl = self.ttl_for(agent) if ttl is None else ttl
+            found, value = self._backend_get(full_key)
+            if not found:
+                value = compute()
+                if not (isinstance(value, dict) and value.get("error")):
+                    self._backend_set(full_key, value, ttl)
+            telemetry.record_cache(agent, found)
+            if not (isinstance(value, dict) and value.get("error")):
+                self.local.set(full_key, value, ttl)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(full_key, None)
+            flight.done.set()
+
+    def has(self, agent: str, key: str) -> bool:
+        return self.local.get(f"{agent}:{key}")[0]
+
+    def put(self, agent: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a result fetched out of band (bulk downloads, prefetchers)."""
+        if isinstance(value, dict) and value.get("error"):
+            return
+        ttl = self.ttl_for(agent) if ttl is None else ttl
+        self.local.set(f"{agent}:{key}", value, ttl)
+        self._backend_set(f"{agent}:{key}", value, ttl)
+
+    def invalidate(self, agent: str, key: str) -> None:
+        self.local.delete(f"{agent}:{key}")
+
+    def _backend_get(self, key: str) -> Tuple[bool, Any]:
+        if self.backend is None:
+            return False, None
+        try:
+            return self.backend.get(key)
+        except Exception:
+            return False, None
+
+    def _backend_set(self, key: str, value: Any, ttl: float) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception:
+            pass
+
+
+_default_cache: Optional[ResultCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> ResultCache:
+    """Process-wide cache shared by every Planner; uses Redis when FINSAGE_REDIS_URL is set."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            url = os.environ.get("FINSAGE_REDIS_URL")
+            backend = RedisBackend(url) if url and redis is not None else None
+            max_entries = int(os.environ.get("FINSAGE_CACHE_MAX_ENTRIES", "10000"))
+            _default_cache = ResultCache(max_entries=max_entries, backend=backend)
+        return _default_cache
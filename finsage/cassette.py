@@ -0,0 +1,391 @@
+"""Record/replay of the agents' outbound calls, for offline load and regression tests.
+
+A Cassette stores one JSON file per distinct upstream request under
+`<directory>/<upstream>/<key>.json` (key: digest of the request), holding the
+response and how long the real call took. `patch(cassette)` swaps the
+upstream clients the agents use (requests for SEC JSON/filing HTML,
+feedparser for Google News RSS, yfinance, the OpenAI client) for proxies:
+
+- mode "record": call the real upstream and save the response;
+- mode "replay": serve the saved response after an injected delay, never
+  touching the network. A request with no recording raises CassetteMiss;
+  miss="passthrough" sends it to the real upstream instead, and miss="any"
+  serves another recording of the same upstream (for load tests, where the
+  size and latency of a response matter more than its content, e.g. LLM
+  prompts that differ because the retrieved passages did).
+
+Replay latency is the recorded duration times `latency_scale`, or a fixed
+per-upstream delay from `latency` (upstream names as in the telemetry
+spans: sec.ticker_map, sec.submissions, sec.filing, google_news_rss,
+yfinance.info, yfinance.history, yfinance.download, llm.openai).
+
+The server picks cassettes up from the environment at startup
+(install_from_env): FINSAGE_CASSETTE_DIR, FINSAGE_CASSETTE_MODE
+(replay|record), FINSAGE_CASSETTE_LATENCY ("sec.filing=150,llm.openai=1200",
+milliseconds) and FINSAGE_CASSETTE_LATENCY_SCALE. Embeddings are computed
+locally and are not recorded.
+"""
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from unittest import mock
+import hashlib
+import json
+import os
+import threading
+import time
+
+MODES = ("record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recording for a request."""
+
+
+def parse_latency(spec: str) -> Dict[str, float]:
+    out = {}
+    for part in spec.split(","):
+        name, _, ms = part.partition("=")
+        if name.strip() and ms.strip():
+            try:
+                out[name.strip()] = float(ms) / 1e3
+            except ValueError:
+                print(f"[cassette] ignoring bad latency {part!r}")
+    return out
+
+
+class Cassette:
+    def __init__(
+        self,
+        directory: str,
+        mode: str = "replay",
+        latency: Optional[Dict[str, float]] = None,
+        latency_scale: float = 1.0,
+        miss: str = "error",
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {', '.join(MODES)})")
+        if miss not in ("error", "passthrough", "any"):
+            raise ValueError(f"Unknown miss policy: {miss}")
+        self.directory = directory
+        self.mode = mode
+        self.latency = latency or {}
+        self.latency_scale = latency_scale
+        self.miss = miss
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._listing: Dict[str, List[str]] = {}
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0}
+
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        blob = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str).encode()
+        return hashlib.blake2b(blob, digest_size=12).hexdigest()
+
+    def _path(self, upstream: str, key: str) -> str:
+        return os.path.join(self.directory, upstream, key + ".json")
+
+    def _entry(self, upstream: str, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(upstream, key)
+        with self._lock:
+            entry = self._loaded.get(path)
+        if entry is None and os.path.exists(path):
+            with open(path) as fh:
+                entry = json.load(fh)
+            with self._lock:
+                self._loaded[path] = entry
+        return entry
+
+    def _save(self, upstream: str, key: str, entry: Dict[str, Any]) -> None:
+        path = self._path(upstream, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(entry, fh, default=str)
+        os.replace(tmp, path)
+        with self._lock:
+            self._loaded[path] = entry
+
+    def _substitute(self, upstream: str, key: str) -> Optional[Dict[str, Any]]:
+        """Some recording of `upstream`, picked deterministically by the missing key."""
+        with self._lock:
+            names = self._listing.get(upstream)
+        if names is None:
+            folder = os.path.join(self.directory, upstream)
+            names = sorted(n[:-5] for n in os.listdir(folder) if n.endswith(".json")) if os.path.isdir(folder) else []
+            with self._lock:
+                self._listing[upstream] = names
+        return self._entry(upstream, names[int(key, 16) % len(names)]) if names else None
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def delay(self, upstream: str, recorded: float) -> float:
+        return self.latency.get(upstream, recorded * self.latency_scale)
+
+    def call(
+        self,
+        upstream: str,
+        request: Dict[str, Any],
+        real: Callable[[], Any],
+        dump: Callable[[Any], Any],
+        load: Callable[[Any], Any],
+    ) -> Any:
+        """The upstream response for `request`: recorded from `real()`, or replayed from disk."""
+        key = self.key(request)
+        if self.mode == "record":
+            t0 = time.perf_counter()
+            resp = real()
+            elapsed = time.perf_counter() - t0
+            self._save(upstream, key, {"upstream": upstream, "request": request, "elapsed": elapsed, "response": dump(resp)})
+            self._count("recorded")
+            return resp
+        entry = self._entry(upstream, key)
+        if entry is None:
+            self._count("missed")
+            print(f"[cassette] no recording for {upstream} {json.dumps(request, default=str)[:200]}")
+            if self.miss == "passthrough":
+                return real()
+            if self.miss == "any":
+                entry = self._substitute(upstream, key)
+            if entry is None:
+                raise CassetteMiss(f"no recording for {upstream} {request}")
+        pause = self.delay(upstream, entry.get("elapsed", 0.0))
+        if pause > 0:
+            time.sleep(pause)
+        self._count("replayed")
+        return load(entry["response"])
+
+
+# ---------------------------------------------------------------------------
+# Replayed response objects (the subset of each client's API the agents use)
+# ---------------------------------------------------------------------------
+
+class ReplayResponse:
+    def __init__(self, status_code: int, text: str, url: str = ""):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+    @property
+    def content(self) -> bytes:
+        return self.text.encode()
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            import requests
+
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}", response=self)
+
+
+class ReplayFrame:
+    """Price rows as (timestamp, {column: value}), iterated like DataFrame.iterrows()."""
+
+    def __init__(self, rows: List[Any]):
+        self._rows = [(datetime.fromisoformat(ts), row) for ts, row in rows]
+
+    @property
+    def empty(self) -> bool:
+        return not self._rows
+
+    def iterrows(self) -> Iterator[Any]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class ReplayFeed:
+    def __init__(self, entries: List[Dict[str, Any]], bozo: bool = False):
+        self.entries = entries
+        self.bozo = bozo
+
+
+def _dump_frame(frame: Any) -> List[Any]:
+    rows = []
+    for idx, row in frame.iterrows():
+        ts = idx.isoformat() if hasattr(idx, "isoformat") else str(idx)
+        items = row.items() if hasattr(row, "items") else dict(row).items()
+        rows.append((ts, {str(k): (v.item() if hasattr(v, "item") else v) for k, v in items}))
+    return rows
+
+
+def _upstream_for(url: str) -> str:
+    if url.endswith("company_tickers.json"):
+        return "sec.ticker_map"
+    if "/submissions/" in url:
+        return "sec.submissions"
+    if "/Archives/" in url:
+        return "sec.filing"
+    return "http"
+
+
+# ---------------------------------------------------------------------------
+# Client proxies
+# ---------------------------------------------------------------------------
+
+class _Requests:
+    def __init__(self, real: Any, cassette: Cassette):
+        self._real = real
+        self._cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._real, name)
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        # Headers and timeouts don't change the response; only the URL and query params key it.
+        request = {"url": url, "params": kwargs.get("params")}
+        return self._cassette.call(
+            _upstream_for(url), request,
+            lambda: self._real.get(url, **kwargs),
+            lambda r: {"status_code": r.status_code, "text": r.text},
+            lambda d: ReplayResponse(d["status_code"], d["text"], url),
+        )
+
+
+class _Feedparser:
+    def __init__(self, real: Any, cassette: Cassette):
+        self._real = real
+        self._cassette = cassette
+
+    def parse(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        return self._cassette.call(
+            "google_news_rss", {"url": url},
+            lambda: self._real.parse(url, *args, **kwargs),
+            lambda f: {"bozo": bool(getattr(f, "bozo", False)), "entries": [dict(e) for e in f.entries]},
+            lambda d: ReplayFeed(d["entries"], d["bozo"]),
+        )
+
+
+class _Ticker:
+    def __init__(self, yf: "_YFinance", ticker: str):
+        self._yf = yf
+        self.ticker = ticker
+        self._real_ticker: Any = None
+        self._info: Any = None
+
+    def _real(self) -> Any:
+        if self._real_ticker is None:
+            self._real_ticker = self._yf._real.Ticker(self.ticker)
+        return self._real_ticker
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        if self._info is None:
+            self._info = self._yf._cassette.call(
+                "yfinance.info", {"ticker": self.ticker}, lambda: dict(self._real().info), lambda i: i, lambda d: d
+            )
+        return self._info
+
+    def history(self, period: str = "1mo", auto_adjust: bool = True, **kwargs: Any) -> Any:
+        return self._yf._cassette.call(
+            "yfinance.history", {"ticker": self.ticker, "period": period, "auto_adjust": auto_adjust},
+            lambda: self._real().history(period=period, auto_adjust=auto_adjust, **kwargs),
+            _dump_frame, ReplayFrame,
+        )
+
+
+class _YFinance:
+    def __init__(self, real: Any, cassette: Cassette):
+        self._real = real
+        self._cassette = cassette
+
+    def Ticker(self, ticker: str) -> _Ticker:
+        return _Ticker(self, ticker)
+
+    def download(self, tickers: List[str], period: str = "1mo", **kwargs: Any) -> Dict[str, Any]:
+        """Replayed as a dict of per-ticker frames (what frames[ticker] indexing needs)."""
+        tickers = list(tickers)
+        return self._cassette.call(
+            "yfinance.download", {"tickers": tickers, "period": period, "auto_adjust": kwargs.get("auto_adjust")},
+            lambda: self._real.download(tickers, period=period, **kwargs),
+            lambda frames: {t: _dump_frame(frames[t]) for t in tickers},
+            lambda d: {t: ReplayFrame(rows) for t, rows in d.items()},
+        )
+
+
+class _ChatCompletion:
+    def __init__(self, real: Any, cassette: Cassette):
+        self._real = real
+        self._cassette = cassette
+
+    def create(self, model: str, messages: List[Dict[str, str]], **kwargs: Any) -> Any:
+        request = {"model": model, "messages": messages, "temperature": kwargs.get("temperature"), "max_tokens": kwargs.get("max_tokens")}
+        return self._cassette.call(
+            "llm.openai", request,
+            lambda: self._real.ChatCompletion.create(model=model, messages=messages, **kwargs),
+            lambda res: json.loads(json.dumps(res, default=str)),
+            lambda d: d,
+        )
+
+
+class _OpenAI:
+    def __init__(self, real: Any, cassette: Cassette):
+        self._real = real
+        self.ChatCompletion = _ChatCompletion(real, cassette)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._real, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # LLMAgent sets openai.api_key per call; pass it through to the real client.
+        if name == "api_key" and self.__dict__.get("_real") is not None:
+            setattr(self._real, name, value)
+        object.__setattr__(self, name, value)
+
+
+@contextmanager
+def patch(cassette: Cassette) -> Iterator[Cassette]:
+    """Route the agents' upstream clients through `cassette` for the duration of the block."""
+    from . import tickers
+    from .agents import data_agent, document_agent, llm_agent, news_agent, rag_agent
+
+    clients = [(m, "requests", _Requests) for m in (document_agent, rag_agent, tickers)] + [
+        (news_agent, "feedparser", _Feedparser),
+        (data_agent, "yf", _YFinance),
+        (llm_agent, "openai", _OpenAI),
+    ]
+    with ExitStack() as stack:
+        for module, attr, proxy in clients:
+            real = getattr(module, attr)
+            # Recording needs the real client; replay works without it being installed at all.
+            if real is not None or cassette.mode == "replay":
+                stack.enter_context(mock.patch.object(module, attr, proxy(real, cassette)))
+        if cassette.mode == "replay" and not os.environ.get("OPENAI_API_KEY"):
+            # LLMAgent only takes the OpenAI path with a key set; replay never sends it anywhere.
+            stack.enter_context(mock.patch.dict(os.environ, {"OPENAI_API_KEY": "cassette-replay"}))
+        yield cassette
+
+
+def from_env() -> Optional[Cassette]:
+    directory = os.environ.get("FINSAGE_CASSETTE_DIR")
+    if not directory:
+        return None
+    return Cassette(
+        directory,
+        mode=os.environ.get("FINSAGE_CASSETTE_MODE", "replay"),
+        latency=parse_latency(os.environ.get("FINSAGE_CASSETTE_LATENCY", "")),
+        latency_scale=float(os.environ.get("FINSAGE_CASSETTE_LATENCY_SCALE", "1.0")),
+    )
+
+
+_installed: Optional[ExitStack] = None
+_install_lock = threading.Lock()
+
+
+def install_from_env() -> Optional[Cassette]:
+    """Patch the upstream clients for the rest of the process when FINSAGE_CASSETTE_DIR is set."""
+    global _installed
+    cassette = from_env()
+    if cassette is None:
+        return None
+    with _install_lock:
+        if _installed is None:
+            _installed = ExitStack()
+            _installed.enter_context(patch(cassette))
+            print(f"[cassette] {cassette.mode} from {cassette.directory}")
+    return cassette
@@ -0,0 +1,174 @@
+"""Process-pool executor for CPU-bound stages (embedding, HTML parsing, numeric work).
+
+Embedding, BeautifulSoup parsing and numpy fits hold the GIL, so on the request
+thread they serialize every other request in the process. ComputeExecutor runs
+them in a pool of worker processes instead; each worker loads its own
+SentenceTransformer once at startup, so tasks never pay model-load latency.
+
+Backpressure: at most `workers + max_queue` tasks may be running or queued.
+Further submissions block for up to `block_timeout` seconds and then raise
+ComputeBusy, so a burst of large filings cannot queue unbounded work behind
+the interactive traffic.
+
+Enable process-wide with FINSAGE_COMPUTE_WORKERS=<n> (and optionally
+FINSAGE_COMPUTE_MAX_QUEUE); unset means stages run inline as before.
+FINSAGE_EMBED_MODEL names the sentence-transformers model for both the
+workers and RAGAgent, so passages and queries share one embedding space.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, List, Optional
+import os
+import threading
+
+from . import telemetry
+
+try:
+    from sentence_transformers import SentenceTransformer
+except Exception:  # pragma: no cover - optional dependency
+    SentenceTransformer = None
+
+try:
+    from bs4 import BeautifulSoup
+except Exception:
+    BeautifulSoup = None
+
+
+DEFAULT_EMBED_MODEL = "all-MiniLM-L6-v2"
+
+
+def embed_model_name() -> str:
+    """Embedding model from FINSAGE_EMBED_MODEL, else DEFAULT_EMBED_MODEL."""
+    return os.environ.get("FINSAGE_EMBED_MODEL") or DEFAULT_EMBED_MODEL
+
+
+class ComputeBusy(RuntimeError):
+    """Raised when the compute queue stays full for longer than the submit timeout."""
+
+
+# ---------------------------------------------------------------------------
+# Worker-side state and tasks (module level so they pickle by reference)
+# ---------------------------------------------------------------------------
+
+_WORKER_EMBEDDER = None
+
+
+def _init_worker(model_name: Optional[str]) -> None:
+    global _WORKER_EMBEDDER
+    if model_name and SentenceTransformer is not None:
+        try:
+            _WORKER_EMBEDDER = SentenceTransformer(model_name)
+        except Exception:
+            _WORKER_EMBEDDER = None
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def embed_texts(texts: List[str], batch_size: int = 64) -> Any:
+    if _WORKER_EMBEDDER is None:
+        raise RuntimeError("embedding model not available in compute worker")
+    return _WORKER_EMBEDDER.encode(texts, batch_size=batch_size)
+
+
+_BLOCK_TAGS = ["p", "div", "br", "li", "tr", "table", "h1", "h2", "h3", "h4", "h5", "h6"]
+_PARA = "\x00"
+
+
+def html_to_text(html: str) -> str:
+    """Visible text, one line per block element (paragraph, row, heading); inline markup stays joined."""
+    if BeautifulSoup is None:
+        return html
+    soup = BeautifulSoup(html, "html.parser")
+    # remove scripts/styles
+    for s in soup(["script", "style"]):
+        s.decompose()
+    for tag in soup.find_all(_BLOCK_TAGS):
+        tag.insert_before(_PARA)
+    text = soup.get_text(separator=" ")
+    return "\n".join(line for line in (" ".join(p.split()) for p in text.split(_PARA)) if line)
+
+
+# ---------------------------------------------------------------------------
+# Executor
+# ---------------------------------------------------------------------------
+
+class ComputeExecutor:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        model_name: Optional[str] = DEFAULT_EMBED_MODEL,
+        block_timeout: Optional[float] = 30.0,
+    ):
+        # None starts the workers without an embedder (numeric and parsing tasks only).
+        self.model_name = model_name
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.block_timeout = block_timeout
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(model_name,))
+
+    @property
+    def pending(self) -> int:
+        """Tasks currently running or queued."""
+        return self._pending
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Submit any picklable module-level function (e.g. a numpy fit); blocks, then raises ComputeBusy, when full."""
+        if not self._slots.acquire(timeout=self.block_timeout):
+            telemetry.REGISTRY.inc("finsage_compute_rejected_total", {"task": fn.__name__}, help="Tasks refused because the compute queue was full.")
+            raise ComputeBusy(f"compute queue full ({self.workers} workers, max_queue={self.max_queue})")
+        with self._lock:
+            self._pending += 1
+        try:
+            fut = self._pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        fut.add_done_callback(self._release)
+        return fut
+
+    def _release(self, _fut: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Submit and wait; the calling thread releases the GIL while the worker computes."""
+        with telemetry.span("compute", fn.__name__):
+            return self.submit(fn, *args, **kwargs).result()
+
+    def embed(self, texts: List[str], batch_size: int = 64) -> Any:
+        return self.run(embed_texts, list(texts), batch_size)
+
+    def html_to_text(self, html: str) -> str:
+        return self.run(html_to_text, html)
+
+    def warmup(self) -> List[int]:
+        """Start every worker (and load its embedder) before the first real request."""
+        return [f.result() for f in [self._pool.submit(_ping) for _ in range(self.workers)]]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_default_executor: Optional[ComputeExecutor] = None
+_default_lock = threading.Lock()
+
+
+def default_executor() -> Optional[ComputeExecutor]:
+    """Process-wide executor configured from FINSAGE_COMPUTE_WORKERS; None runs stages inline."""
+    global _default_executor
+    workers = int(os.environ.get("FINSAGE_COMPUTE_WORKERS", "0") or 0)
+    if workers <= 0:
+        return None
+    with _default_lock:
+        if _default_executor is None:
+            max_queue = os.environ.get("FINSAGE_COMPUTE_MAX_QUEUE")
+            _default_executor = ComputeExecutor(
+                workers=workers, max_queue=int(max_queue) if max_queue else None, model_name=embed_model_name()
+            )
+        return _default_executor
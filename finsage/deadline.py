@@ -0,0 +1,152 @@
+"""Per-request latency budgets and hedged upstream calls.
+
+A Deadline is bound to the current context (contextvars) for the duration of
+a request, so agents deep in the call stack can see how much time is left
+without it being passed through every signature:
+
+- `timeout(default)` caps a network timeout at the remaining budget;
+- `run_within(fn, stage)` runs a stage on a worker thread and stops waiting
+  when the budget runs out (DeadlineExceeded). Python threads cannot be
+  killed, so the abandoned call finishes in the background; its network
+  timeouts were already capped, and cached fetches still warm the cache for
+  the next request.
+
+`hedged(upstream, fn)` sends a duplicate request when the first has not
+answered within the upstream's hedge delay and returns whichever finishes
+first. Delays come from FINSAGE_HEDGE_UPSTREAMS ("google_news_rss=800,
+sec.submissions=500", milliseconds); upstreams not listed are never hedged.
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+import contextvars
+import os
+import threading
+import time
+
+from . import telemetry
+
+_current: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar("finsage_deadline", default=None)
+
+# Separate pools for stages and hedged attempts: a stage waiting on its own hedged
+# call must never be stuck behind other stages for a worker.
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pool_lock = threading.Lock()
+
+
+class DeadlineExceeded(Exception):
+    """The request's latency budget ran out before a stage finished."""
+
+
+class Deadline:
+    def __init__(self, budget: float, clock: Callable[[], float] = time.monotonic):
+        self.budget = budget
+        self._clock = clock
+        self.expires = clock() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, default: float) -> float:
+        """A network timeout no longer than the remaining budget (never zero, which means 'no timeout')."""
+        return max(0.001, min(default, self.remaining()))
+
+    def run(self, fn: Callable[[], Any], stage: str = "stage") -> Any:
+        """Result of fn, or DeadlineExceeded if the budget runs out first (fn keeps running unobserved)."""
+        left = self.remaining()
+        if left <= 0:
+            raise DeadlineExceeded(stage)
+        fut = _submit(fn, "stage")
+        done, _ = wait([fut], timeout=left)
+        if not done:
+            telemetry.REGISTRY.inc("finsage_deadline_missed_total", {"stage": stage}, help="Stages abandoned at the request deadline.")
+            raise DeadlineExceeded(stage)
+        return fut.result()
+
+
+def _executor(kind: str) -> ThreadPoolExecutor:
+    with _pool_lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            workers = int(os.environ.get("FINSAGE_DEADLINE_WORKERS", "32"))
+            pool = _pools[kind] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"finsage-{kind}")
+        return pool
+
+
+def _submit(fn: Callable[[], Any], kind: str) -> Future:
+    # Each task runs in a copy of the caller's context, so the deadline and telemetry collectors follow it.
+    return _executor(kind).submit(contextvars.copy_context().run, fn)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def bind(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make `deadline` the current one for this context (None clears it)."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def scope(budget: Optional[float]) -> Any:
+    """bind() a fresh Deadline of `budget` seconds, or no deadline for None."""
+    return bind(Deadline(budget) if budget is not None else None)
+
+
+def timeout(default: float) -> float:
+    """Network timeout for the current request: `default`, capped at the remaining budget."""
+    dl = _current.get()
+    return dl.timeout(default) if dl is not None else default
+
+
+def run_within(fn: Callable[[], Any], stage: str = "stage") -> Any:
+    """Run fn under the current deadline (directly when there is none)."""
+    dl = _current.get()
+    return dl.run(fn, stage) if dl is not None else fn()
+
+
+def _parse_delays(spec: str) -> Dict[str, float]:
+    delays = {}
+    for part in spec.split(","):
+        name, _, ms = part.partition("=")
+        if name.strip() and ms.strip():
+            try:
+                delays[name.strip()] = float(ms) / 1e3
+            except ValueError:
+                print(f"[deadline] ignoring bad hedge delay {part!r}")
+    return delays
+
+
+HEDGE_DELAYS: Dict[str, float] = _parse_delays(os.environ.get("FINSAGE_HEDGE_UPSTREAMS", ""))
+
+
+def hedged(upstream: str, fn: Callable[[], Any], delay: Optional[float] = None) -> Any:
+    """
+    fn(), hedged: if it has not finished after `delay` seconds (default: the
+    upstream's configured delay) a second attempt starts, and the first to
+    succeed wins. Errors surface only if both attempts fail.
+    """
+    delay = HEDGE_DELAYS.get(upstream) if delay is None else delay
+    if delay is None:
+        return fn()
+    first = _submit(fn, "hedge")
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+    telemetry.REGISTRY.inc("finsage_hedged_requests_total", {"upstream": upstream}, help="Duplicate requests sent after the hedge delay.")
+    pending = {first, _submit(fn, "hedge")}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                return fut.result()
+            error = fut.exception()
+    raise error
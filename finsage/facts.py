@@ -0,0 +1,271 @@
+"""Bulk fundamentals from SEC companyfacts dumps.
+
+SEC publishes every filer's XBRL facts as companyfacts.zip (one
+CIK##########.json per filer). This module streams that archive (or a
+directory of the JSON files) one member at a time, keeps only the latest
+annual values of a few key facts, and writes them as a columnar table: one
+.npy file per column, sorted by CIK, plus a sorted ticker index. Loading the
+table memory-maps the columns, so whole-universe fundamentals are available
+in well under a second with no per-ticker HTTP; lookups are binary searches.
+
+Build once (e.g. nightly):
+    python -m finsage.facts --source companyfacts.zip --out data/facts
+and point FINSAGE_FACTS_DIR at the output directory.
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import threading
+import time
+import zipfile
+
+import numpy as np
+
+from .tickers import TickerDirectory, load_directory
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+ANNUAL_FORMS = frozenset({"10-K", "10-K/A", "20-F", "20-F/A", "40-F", "40-F/A"})
+
+# column -> candidate (taxonomy, concept, unit), first match wins
+FACTS: Dict[str, List[Tuple[str, str, str]]] = {
+    "eps_diluted": [("us-gaap", "EarningsPerShareDiluted", "USD/shares")],
+    "eps_basic": [("us-gaap", "EarningsPerShareBasic", "USD/shares")],
+    "revenue": [
+        ("us-gaap", "Revenues", "USD"),
+        ("us-gaap", "RevenueFromContractWithCustomerExcludingAssessedTax", "USD"),
+        ("us-gaap", "SalesRevenueNet", "USD"),
+    ],
+    "net_income": [("us-gaap", "NetIncomeLoss", "USD")],
+    "shares_outstanding": [
+        ("dei", "EntityCommonStockSharesOutstanding", "shares"),
+        ("us-gaap", "CommonStockSharesOutstanding", "shares"),
+    ],
+}
+# Point-in-time facts: take the latest value; the rest are annual flows (full fiscal year).
+INSTANT_FACTS = frozenset({"shares_outstanding"})
+FLOAT_COLUMNS = tuple(FACTS)
+
+_DAY0 = date(1970, 1, 1)
+
+
+def _days(iso: Optional[str]) -> int:
+    try:
+        return (date.fromisoformat(iso[:10]) - _DAY0).days
+    except Exception:
+        return -1
+
+
+def _annual(entry: Dict[str, Any]) -> bool:
+    if entry.get("form") not in ANNUAL_FORMS or entry.get("fp") not in (None, "FY"):
+        return False
+    start = entry.get("start")
+    if not start:
+        return False
+    span = _days(entry.get("end")) - _days(start)
+    return 330 <= span <= 400
+
+
+def _latest(entries: Iterable[Dict[str, Any]], instant: bool) -> Optional[Dict[str, Any]]:
+    best = None
+    best_key = None
+    for e in entries:
+        if e.get("val") is None or (not instant and not _annual(e)):
+            continue
+        key = (e.get("end") or "", e.get("filed") or "")
+        if best_key is None or key > best_key:
+            best, best_key = e, key
+    return best
+
+
+def parse_companyfacts(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Latest annual values of the key facts for one filer, or None if it has none of them."""
+    cik = doc.get("cik")
+    facts = doc.get("facts") or {}
+    if cik is None:
+        return None
+    row: Dict[str, Any] = {"cik": int(cik), "name": doc.get("entityName") or ""}
+    period_end = filed = ""
+    found = False
+    for col, candidates in FACTS.items():
+        row[col] = np.nan
+        for taxonomy, concept, unit in candidates:
+            entries = ((facts.get(taxonomy) or {}).get(concept) or {}).get("units", {}).get(unit)
+            if not entries:
+                continue
+            e = _latest(entries, instant=col in INSTANT_FACTS)
+            if e is None:
+                continue
+            row[col] = float(e["val"])
+            found = True
+            if col not in INSTANT_FACTS and (e.get("end") or "") > period_end:
+                period_end, filed = e.get("end") or "", e.get("filed") or ""
+            break
+    row["period_end"] = _days(period_end) if period_end else -1
+    row["filed"] = _days(filed) if filed else -1
+    return row if found else None
+
+
+def _loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def iter_companyfacts(source: str) -> Iterator[Dict[str, Any]]:
+    """Yield parsed filer documents from companyfacts.zip, a directory of JSON files, or one JSON file."""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".json"):
+                with open(os.path.join(source, name), "rb") as fh:
+                    yield _loads(fh.read())
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for info in zf.infolist():
+                if info.filename.endswith(".json"):
+                    # one member in memory at a time
+                    yield _loads(zf.read(info))
+    else:
+        with open(source, "rb") as fh:
+            yield _loads(fh.read())
+
+
+class FactsTable:
+    """Columnar facts sorted by CIK; columns may be memory-mapped .npy arrays."""
+
+    def __init__(self, columns: Dict[str, np.ndarray], ticker_keys: np.ndarray, ticker_rows: np.ndarray):
+        self.columns = columns
+        self.ticker_keys = ticker_keys
+        self.ticker_rows = ticker_rows
+
+    def __len__(self) -> int:
+        return len(self.columns["cik"])
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], directory: Optional[TickerDirectory] = None) -> "FactsTable":
+        rows = sorted(rows, key=lambda r: r["cik"])
+        columns: Dict[str, np.ndarray] = {
+            "cik": np.asarray([r["cik"] for r in rows], dtype=np.int64),
+            "period_end": np.asarray([r["period_end"] for r in rows], dtype=np.int32),
+            "filed": np.asarray([r["filed"] for r in rows], dtype=np.int32),
+            "name": np.asarray([r["name"] for r in rows], dtype="U80"),
+        }
+        for col in FLOAT_COLUMNS:
+            columns[col] = np.asarray([r[col] for r in rows], dtype=np.float64)
+
+        pairs: List[Tuple[str, int]] = []
+        if directory is not None:
+            ciks = columns["cik"]
+            for e in directory:
+                if e.get("cik") is None:
+                    continue
+                i = int(np.searchsorted(ciks, int(e["cik"])))
+                if i < len(ciks) and ciks[i] == int(e["cik"]):
+                    pairs.append((e["ticker"], i))
+        pairs.sort()
+        keys = np.asarray([t for t, _ in pairs], dtype="U12")
+        idx = np.asarray([i for _, i in pairs], dtype=np.int32)
+        return cls(columns, keys, idx)
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        for name, col in self.columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), col)
+        np.save(os.path.join(path, "_ticker_keys.npy"), self.ticker_keys)
+        np.save(os.path.join(path, "_ticker_rows.npy"), self.ticker_rows)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "FactsTable":
+        mode = "r" if mmap else None
+        columns = {
+            name[:-4]: np.load(os.path.join(path, name), mmap_mode=mode)
+            for name in os.listdir(path)
+            if name.endswith(".npy") and not name.startswith("_")
+        }
+        keys = np.load(os.path.join(path, "_ticker_keys.npy"), mmap_mode=mode)
+        rows = np.load(os.path.join(path, "_ticker_rows.npy"), mmap_mode=mode)
+        return cls(columns, keys, rows)
+
+    def row_for(self, ticker: Optional[str] = None, cik: Optional[int] = None) -> Optional[int]:
+        if ticker is not None:
+            t = ticker.upper()
+            i = int(np.searchsorted(self.ticker_keys, t))
+            if i < len(self.ticker_keys) and self.ticker_keys[i] == t:
+                return int(self.ticker_rows[i])
+            return None
+        if cik is not None:
+            ciks = self.columns["cik"]
+            i = int(np.searchsorted(ciks, int(cik)))
+            if i < len(ciks) and ciks[i] == int(cik):
+                return i
+        return None
+
+    def lookup(self, ticker: Optional[str] = None, cik: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Facts for one filer by ticker or CIK; missing values are None, dates ISO strings."""
+        i = self.row_for(ticker, cik)
+        if i is None:
+            return None
+        out: Dict[str, Any] = {"cik": int(self.columns["cik"][i]), "name": str(self.columns["name"][i])}
+        for col in FLOAT_COLUMNS:
+            v = float(self.columns[col][i])
+            out[col] = v if v == v else None
+        for col in ("period_end", "filed"):
+            d = int(self.columns[col][i])
+            out[col] = date.fromordinal(_DAY0.toordinal() + d).isoformat() if d >= 0 else None
+        eps = out["eps_diluted"] if out["eps_diluted"] is not None else out["eps_basic"]
+        out["eps"] = eps
+        return out
+
+
+def build_table(source: str, out: Optional[str] = None, directory: Optional[TickerDirectory] = None) -> FactsTable:
+    """Stream a companyfacts dump into a FactsTable (and save it to `out` if given)."""
+    directory = directory if directory is not None else load_directory()
+    t0 = time.perf_counter()
+    rows = []
+    for n, doc in enumerate(iter_companyfacts(source), 1):
+        row = parse_companyfacts(doc)
+        if row is not None:
+            rows.append(row)
+        if n % 5000 == 0:
+            print(f"[facts] parsed {n} filers ({time.perf_counter() - t0:.1f}s)")
+    table = FactsTable.from_rows(rows, directory)
+    if out:
+        table.save(out)
+    print(f"[facts] {len(table)} filers with facts in {time.perf_counter() - t0:.1f}s")
+    return table
+
+
+_default_facts: Optional[FactsTable] = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def default_facts() -> Optional[FactsTable]:
+    """Table from FINSAGE_FACTS_DIR, memory-mapped once; None when unset or unreadable."""
+    global _default_facts, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            _default_loaded = True
+            path = os.environ.get("FINSAGE_FACTS_DIR")
+            if path:
+                try:
+                    _default_facts = FactsTable.load(path)
+                except Exception as e:
+                    print(f"[facts] failed to load {path}: {e}")
+        return _default_facts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Build the columnar facts table from an SEC companyfacts dump.")
+    p.add_argument("--source", required=True, help="companyfacts.zip, a directory of CIK*.json, or one JSON file")
+    p.add_argument("--out", required=True, help="Output directory for the .npy columns")
+    p.add_argument("--tickers-file", help="Local company_tickers.json for the ticker index (default: SEC map)")
+    args = p.parse_args(argv)
+    build_table(args.source, args.out, directory=load_directory(args.tickers_file))
+
+
+if __name__ == "__main__":
+    main()
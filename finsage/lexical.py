@@ -0,0 +1,119 @@
+"""Sparse lexical retrieval: an incremental inverted index with BM25 scoring.
+
+Dense MiniLM similarity blurs exact tokens that finance questions hinge on
+("Item 1A", "10-K", a CUSIP). This index keeps them: the tokenizer preserves
+alphanumeric codes and hyphenated form numbers, and BM25 rewards rare exact
+matches.
+
+Postings are stored per term as parallel typed arrays (uint32 doc ids, uint16
+term frequencies), appended in doc-id order as passages are ingested, so
+updates are O(tokens) and memory is ~6 bytes per posting.
+"""
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import re
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word/code tokens; hyphenated or dotted codes also emit their parts ("10-k" -> 10-k, 10, k)."""
+    out: List[str] = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        if tok in STOPWORDS:
+            continue
+        out.append(tok)
+        if "-" in tok or "." in tok:
+            out.extend(p for p in re.split(r"[-.]", tok) if p and p not in STOPWORDS)
+    return out
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._terms: Dict[str, int] = {}
+        self._doc_ids: List[array] = []  # per term: array('I') of doc ids, ascending
+        self._tfs: List[array] = []  # per term: array('H') of term frequencies
+        self._doc_len = array("I")
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._terms)
+
+    def add(self, text: str) -> int:
+        """Index one passage and return its doc id (ids are dense, assigned in insertion order)."""
+        doc = len(self._doc_len)
+        counts: Dict[str, int] = {}
+        tokens = tokenize(text)
+        for tok in tokens:
+            counts[tok] = counts.get(tok, 0) + 1
+        for tok, tf in counts.items():
+            tid = self._terms.get(tok)
+            if tid is None:
+                tid = self._terms[tok] = len(self._doc_ids)
+                self._doc_ids.append(array("I"))
+                self._tfs.append(array("H"))
+            self._doc_ids[tid].append(doc)
+            self._tfs[tid].append(min(tf, 65535))
+        self._doc_len.append(len(tokens))
+        self._total_len += len(tokens)
+        return doc
+
+    def add_many(self, texts: Iterable[str]) -> List[int]:
+        return [self.add(t) for t in texts]
+
+    def search(self, query: str, k: int = 10, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k (doc_id, bm25) for `query`, best first; only docs sharing a query
+        term are scored. `mask` (bool per doc id) excludes docs before ranking.
+        """
+        n = len(self._doc_len)
+        if n == 0:
+            return []
+        terms = [self._terms[t] for t in dict.fromkeys(tokenize(query)) if t in self._terms]
+        if not terms:
+            return []
+
+        avgdl = self._total_len / n if self._total_len else 1.0
+        doc_len = np.frombuffer(self._doc_len, dtype=np.uint32)
+        scores = np.zeros(n, dtype=np.float32)
+        touched = np.zeros(n, dtype=bool)
+        for tid in terms:
+            ids = np.frombuffer(self._doc_ids[tid], dtype=np.uint32)
+            tf = np.frombuffer(self._tfs[tid], dtype=np.uint16).astype(np.float32)
+            df = len(ids)
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_len[ids] / avgdl)
+            scores[ids] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+            touched[ids] = True
+
+        if mask is not None:
+            touched &= mask[:n]
+        hits = np.flatnonzero(touched)
+        if len(hits) == 0:
+            return []
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(d), float(scores[d])) for d in hits]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> Dict[int, float]:
+    """Fuse several best-first rankings of doc ids: score(d) = sum 1 / (k + rank)."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank)
+    return fused
@@ -0,0 +1,248 @@
+"""Load generator: replay a query mix against Planner.run or the backend app.
+
+Usage:
+    # once, with network access: record cassettes for the tickers in the mix
+    python -m finsage.loadgen --cassettes ./cassettes --mode record --requests 50 --concurrency 2
+    # anywhere, offline: replay with recorded upstream latency
+    python -m finsage.loadgen --cassettes ./cassettes --concurrency 16 --duration 60 --out load.json
+    # open loop at 20 req/s against backend.main:app in-process, fixed LLM latency
+    python -m finsage.loadgen --target app --cassettes ./cassettes --rate 20 --duration 60 --latency llm.openai=1200
+
+Requests are drawn (seeded) from a weighted mix of query templates over a
+ticker list. Closed loop (default) keeps `concurrency` requests in flight;
+with --rate, arrivals are Poisson at that rate and latency is measured from
+each request's scheduled start, so a saturated server shows up as queueing
+delay instead of a silently lower offered load. The report gives throughput
+and latency percentiles overall and per mix entry.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import argparse
+import contextlib
+import json
+import random
+import sys
+import threading
+import time
+
+DEFAULT_TICKERS = ["TSLA", "AAPL", "MSFT", "NVDA", "AMZN"]
+
+# Shaped like dashboard traffic: mostly full analyses, then single-section refreshes and comparisons.
+DEFAULT_MIX: List[Dict[str, Any]] = [
+    {"name": "analyze", "weight": 0.5, "query": "Analyze {t}"},
+    {"name": "thesis", "weight": 0.2, "query": "Should I buy {t}?", "fields": ["thesis"]},
+    {"name": "risk", "weight": 0.15, "query": "How risky is {t}?", "fields": ["risk", "metrics"]},
+    {"name": "compare", "weight": 0.15, "query": "Compare {t} with {u}", "peers": ["{u}"]},
+]
+
+
+def requests_from_mix(mix: List[Dict[str, Any]], tickers: List[str], seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Endless seeded stream of request bodies {"name", "query", "tickers", "peers"?, "fields"?}."""
+    rng = random.Random(seed)
+    weights = [float(m.get("weight", 1.0)) for m in mix]
+    while True:
+        m = rng.choices(mix, weights)[0]
+        t = rng.choice(tickers)
+        u = rng.choice([x for x in tickers if x != t] or tickers)
+        body: Dict[str, Any] = {"name": m.get("name", m["query"]), "query": m["query"].format(t=t, u=u), "tickers": [t]}
+        if m.get("peers"):
+            body["peers"] = [p.format(t=t, u=u) for p in m["peers"]]
+        if m.get("fields"):
+            body["fields"] = list(m["fields"])
+        yield body
+
+
+def planner_target(planner: Any = None) -> Callable[[Dict[str, Any]], bool]:
+    """Run each request through Planner.run in-process; a result with an "error" counts as failed."""
+    if planner is None:
+        from .planner import Planner
+
+        planner = Planner()
+
+    def send(body: Dict[str, Any]) -> bool:
+        res = planner.run(body["query"], tickers=body["tickers"], peers=body.get("peers"), fields=body.get("fields"))
+        return not res.get("error")
+
+    return send
+
+
+def app_target(path: str = "/chat/stream") -> Callable[[Dict[str, Any]], bool]:
+    """
+    POST each request to backend.main:app in-process (ASGI, no sockets) and read
+    the whole response. The default /chat/stream runs the Planner; the older
+    /chat/ route still calls the legacy backend.agents helpers and is not a
+    useful target.
+    """
+    from starlette.testclient import TestClient
+    from backend.main import app
+
+    client = TestClient(app)
+
+    def send(body: Dict[str, Any]) -> bool:
+        resp = client.post(path, json={k: v for k, v in body.items() if k != "name"})
+        return resp.status_code < 400 and b'"event":"error"' not in resp.content
+
+    return send
+
+
+def http_target(url: str, path: str = "/chat/stream", timeout: float = 120.0) -> Callable[[Dict[str, Any]], bool]:
+    """POST each request to a running server."""
+    import requests
+
+    session = requests.Session()
+    target = url.rstrip("/") + path
+
+    def send(body: Dict[str, Any]) -> bool:
+        resp = session.post(target, json={k: v for k, v in body.items() if k != "name"}, timeout=timeout)
+        return resp.status_code < 400 and b'"event":"error"' not in resp.content
+
+    return send
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p90": None, "p95": None, "p99": None, "max": None, "mean": None}
+    s = sorted(samples)
+    pick = lambda q: round(s[min(len(s) - 1, int(q * len(s)))] * 1e3, 2)
+    return {"p50": pick(0.5), "p90": pick(0.9), "p95": pick(0.95), "p99": pick(0.99),
+            "max": round(s[-1] * 1e3, 2), "mean": round(sum(s) / len(s) * 1e3, 2)}
+
+
+def run_load(
+    send: Callable[[Dict[str, Any]], bool],
+    bodies: Iterator[Dict[str, Any]],
+    concurrency: int = 8,
+    requests: Optional[int] = None,
+    duration: Optional[float] = None,
+    rate: Optional[float] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Drive `send` until `requests` have been issued or `duration` seconds pass; returns the report."""
+    if requests is None and duration is None:
+        raise ValueError("set requests and/or duration")
+    results: List[Any] = []  # (name, latency seconds, ok)
+    lock = threading.Lock()
+    issued = 0
+
+    def take() -> Optional[Dict[str, Any]]:
+        nonlocal issued
+        with lock:
+            if (requests is not None and issued >= requests) or (duration is not None and time.perf_counter() >= stop):
+                return None
+            issued += 1
+            return next(bodies)
+
+    def one(body: Dict[str, Any], scheduled: float) -> None:
+        try:
+            ok = bool(send(body))
+        except Exception as e:
+            print(f"[loadgen] {body['name']} failed: {e}", file=sys.stderr)
+            ok = False
+        with lock:
+            results.append((body["name"], time.perf_counter() - scheduled, ok))
+
+    start = time.perf_counter()
+    stop = start + duration if duration is not None else float("inf")
+    if rate:
+        rng = random.Random(seed)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            at = start
+            while True:
+                at += rng.expovariate(rate)
+                time.sleep(max(0.0, at - time.perf_counter()))
+                body = take()
+                if body is None:
+                    break
+                pool.submit(one, body, at)
+    else:
+        def worker() -> None:
+            while True:
+                body = take()
+                if body is None:
+                    return
+                one(body, time.perf_counter())
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    elapsed = time.perf_counter() - start
+
+    by_kind: Dict[str, Dict[str, Any]] = {}
+    for name in sorted({r[0] for r in results}):
+        mine = [r for r in results if r[0] == name]
+        by_kind[name] = {"requests": len(mine), "errors": sum(1 for r in mine if not r[2]), "latency_ms": _percentiles([r[1] for r in mine])}
+    return {
+        "mode": f"open loop at {rate}/s" if rate else f"closed loop x{concurrency}",
+        "requests": len(results),
+        "errors": sum(1 for r in results if not r[2]),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": _percentiles([r[1] for r in results]),
+        "by_kind": by_kind,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    from . import cassette
+
+    p = argparse.ArgumentParser(description="Replay a FinSage query mix and report throughput and latency.")
+    p.add_argument("--target", choices=("planner", "app", "http"), default="planner")
+    p.add_argument("--url", help="Base URL for --target http")
+    p.add_argument("--path", default="/chat/stream", help="Endpoint for the app/http targets")
+    p.add_argument("--cassettes", help="Cassette directory (omit to hit the real upstreams)")
+    p.add_argument("--mode", choices=cassette.MODES, default="replay")
+    p.add_argument("--latency", default="", help='Fixed replay latency per upstream, e.g. "sec.filing=150,llm.openai=1200" (ms)')
+    p.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier on recorded latency for other upstreams")
+    p.add_argument("--miss", choices=("any", "error", "passthrough"), default="any",
+                   help="Replay of an unrecorded request: another recording of the same upstream, an error, or the real call")
+    p.add_argument("--mix", help="JSON file with a list of {name, weight, query, fields?, peers?}; {t}/{u} are tickers")
+    p.add_argument("--tickers", default=",".join(DEFAULT_TICKERS))
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--requests", type=int)
+    p.add_argument("--duration", type=float)
+    p.add_argument("--rate", type=float, help="Open-loop arrival rate (requests/s)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="Write the JSON report here instead of stdout")
+    args = p.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 100
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        with open(args.mix) as fh:
+            mix = json.load(fh)
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+
+    with contextlib.ExitStack() as stack:
+        tape = None
+        if args.cassettes and args.target != "http":
+            tape = cassette.Cassette(args.cassettes, args.mode, cassette.parse_latency(args.latency), args.latency_scale, args.miss)
+            stack.enter_context(cassette.patch(tape))
+        # Agents log progress with print(); keep stdout for the report.
+        stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        if args.target == "planner":
+            send = planner_target()
+        elif args.target == "app":
+            send = app_target(args.path)
+        else:
+            if not args.url:
+                p.error("--target http needs --url")
+            send = http_target(args.url, args.path)
+        report = run_load(send, requests_from_mix(mix, tickers, args.seed), args.concurrency, args.requests, args.duration, args.rate, args.seed)
+        report["target"] = args.target
+        if tape is not None:
+            report["cassette"] = dict(tape.stats, mode=tape.mode)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
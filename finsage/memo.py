@@ -0,0 +1,101 @@
+"""Input-hash memoization of planner stages.
+
+Each derived stage (calculations, prediction, risk, RAG, synthesis, ...) is a
+pure function of its inputs, so its output is memoized under a fingerprint of
+those inputs. When a dashboard re-runs the planner and only news changed, the
+fingerprints of calculation/prediction/RAG inputs are unchanged and their
+outputs are reused; only news -> risk -> thesis are recomputed.
+
+Fingerprints are blake2b digests of the canonical (sorted-key) JSON of the
+inputs. Inputs served from the result cache are usually the very same
+objects as last time (cached values are read-only), so digests are also
+remembered by object identity and such inputs are not re-serialized.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+import hashlib
+import json
+import threading
+
+from . import telemetry
+from .cache import HOUR, TTLCache
+from .serialize import to_native
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _canonical(obj: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=to_native, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, default=to_native, sort_keys=True, separators=(",", ":")).encode()
+
+
+class StageMemo:
+    """Stage outputs keyed by (stage, fingerprint of inputs), in an LRU with a TTL."""
+
+    def __init__(self, max_entries: int = 4096, ttl: float = HOUR, identity_entries: int = 1024):
+        self.ttl = ttl
+        self._store = TTLCache(max_entries)
+        # id(obj) -> (obj, digest); holding obj keeps the id from being reused while the entry lives
+        self._by_id: "OrderedDict[int, Tuple[Any, str]]" = OrderedDict()
+        self._identity_entries = identity_entries
+        self._lock = threading.Lock()
+
+    def digest(self, obj: Any) -> str:
+        if obj is None or isinstance(obj, (str, int, float, bool)):
+            return hashlib.blake2b(_canonical(obj), digest_size=16).hexdigest()
+        with self._lock:
+            hit = self._by_id.get(id(obj))
+            if hit is not None and hit[0] is obj:
+                self._by_id.move_to_end(id(obj))
+                return hit[1]
+        d = hashlib.blake2b(_canonical(obj), digest_size=16).hexdigest()
+        with self._lock:
+            self._by_id[id(obj)] = (obj, d)
+            while len(self._by_id) > self._identity_entries:
+                self._by_id.popitem(last=False)
+        return d
+
+    def fingerprint(self, inputs: Dict[str, Any]) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for name in sorted(inputs):
+            h.update(name.encode())
+            h.update(self.digest(inputs[name]).encode())
+        return h.hexdigest()
+
+    def lookup(self, stage: str, inputs: Dict[str, Any]) -> Tuple[str, bool, Any]:
+        """(key, found, value) for `stage` with these inputs; pass the key to store() after a miss."""
+        key = f"{stage}:{self.fingerprint(inputs)}"
+        found, value = self._store.get(key)
+        telemetry.record_cache(f"stage.{stage}", found)
+        return key, found, value
+
+    def store(self, key: str, value: Any) -> None:
+        """Memoize an output; error results are not kept, so they are retried next run."""
+        if not (isinstance(value, dict) and value.get("error")):
+            self._store.set(key, value, self.ttl)
+
+    def run(self, stage: str, inputs: Dict[str, Any], compute: Callable[[], Any], report: Dict[str, List[str]]) -> Any:
+        """Cached output of `stage` for these inputs, or compute it; records the stage as reused or computed."""
+        key, found, value = self.lookup(stage, inputs)
+        if found:
+            report["reused"].append(stage)
+            return value
+        value = compute()
+        report["computed"].append(stage)
+        self.store(key, value)
+        return value
+
+    def clear(self) -> None:
+        self._store.clear()
+        with self._lock:
+            self._by_id.clear()
+
+    def __len__(self) -> int:
+        return len(self._store)
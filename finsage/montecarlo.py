@@ -0,0 +1,121 @@
+"""Monte Carlo price-path simulation for forecast intervals.
+
+Paths start at the last close and step with daily log-returns drawn either
+from a geometric Brownian motion fitted to the history ("gbm": mean and std
+of the log-returns) or by resampling the historical log-returns with
+replacement ("bootstrap", which keeps fat tails and skew).
+
+Paths are generated in fixed-size chunks, so peak memory is one
+(chunk_size, steps) block per worker however many paths are asked for; only
+each path's terminal log-return and max drawdown are kept. Every chunk gets
+its own seed spawned from one SeedSequence, so results depend on `seed` and
+`chunk_size` only, never on how many workers ran the chunks. With a
+ComputeExecutor (FINSAGE_COMPUTE_WORKERS) chunks of every ticker are spread
+across its worker processes; without one they run inline.
+"""
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .compute import ComputeExecutor, default_executor
+
+METHODS = ("gbm", "bootstrap")
+QUANTILES = (0.025, 0.05, 0.25, 0.5, 0.75, 0.95, 0.975)
+CHUNK_SIZE = 20_000
+
+
+def log_returns(prices: Any) -> np.ndarray:
+    p = np.asarray(prices, dtype=np.float64)
+    return np.diff(np.log(p))
+
+
+def simulate_chunk(
+    method: str, log_rets: np.ndarray, steps: int, paths: int, seed: np.random.SeedSequence
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(terminal log-return, max drawdown) of `paths` simulated paths; module level so it pickles to workers."""
+    rng = np.random.default_rng(seed)
+    if method == "gbm":
+        inc = rng.standard_normal((paths, steps))
+        inc *= log_rets.std(ddof=1)
+        inc += log_rets.mean()
+    else:
+        inc = log_rets[rng.integers(0, len(log_rets), size=(paths, steps))]
+    np.cumsum(inc, axis=1, out=inc)
+    peak = np.maximum.accumulate(inc, axis=1)
+    np.maximum(peak, 0.0, out=peak)
+    drawdown = 1.0 - np.exp(np.subtract(inc, peak, out=peak).min(axis=1))
+    return inc[:, -1].copy(), drawdown
+
+
+def _chunks(paths: int, chunk_size: int) -> List[int]:
+    full, rest = divmod(paths, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def _summary(
+    start: float, terminal: np.ndarray, drawdown: np.ndarray, method: str, steps: int, chunks: int, quantiles: Sequence[float]
+) -> Dict[str, Any]:
+    prices = start * np.exp(np.quantile(terminal, quantiles))
+    return {
+        "method": method,
+        "paths": int(terminal.size),
+        "steps": steps,
+        "chunks": chunks,
+        "start_price": start,
+        "terminal_quantiles": {f"p{q * 100:g}": float(v) for q, v in zip(quantiles, prices)},
+        "expected_price": float(start * np.exp(terminal).mean()),
+        "prob_loss": float(np.mean(terminal < 0.0)),
+        "expected_max_drawdown": float(drawdown.mean()),
+    }
+
+
+def simulate_many(
+    prices: Dict[str, Any],
+    paths: int = 10_000,
+    steps: int = 1,
+    method: str = "gbm",
+    seed: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    quantiles: Sequence[float] = QUANTILES,
+    executor: Optional[ComputeExecutor] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Simulate `paths` paths of `steps` days for each ticker's close series and
+    summarise the terminal price distribution. Tickers with fewer than three
+    closes get an {"error": ...} entry. `executor` defaults to the process-wide
+    compute pool.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method} (expected one of {', '.join(METHODS)})")
+    executor = executor if executor is not None else default_executor()
+    sizes = _chunks(max(1, int(paths)), max(1, int(chunk_size)))
+    seqs = np.random.SeedSequence(seed).spawn(len(prices))
+
+    pending: Dict[str, Tuple[float, List[Any]]] = {}
+    out: Dict[str, Dict[str, Any]] = {}
+    for (ticker, closes), seq in zip(prices.items(), seqs):
+        closes = np.asarray(closes, dtype=np.float64)
+        if closes.size < 3 or not np.all(closes > 0):
+            out[ticker] = {"error": "need at least 3 positive closes to simulate"}
+            continue
+        rets = log_returns(closes)
+        parts = []
+        for n, chunk_seed in zip(sizes, seq.spawn(len(sizes))):
+            if executor is None:
+                parts.append(simulate_chunk(method, rets, steps, n, chunk_seed))
+            else:
+                parts.append(executor.submit(simulate_chunk, method, rets, steps, n, chunk_seed))
+        pending[ticker] = (float(closes[-1]), parts)
+
+    for ticker, (start, parts) in pending.items():
+        done = [p.result() if isinstance(p, Future) else p for p in parts]
+        terminal = np.concatenate([t for t, _ in done])
+        drawdown = np.concatenate([d for _, d in done])
+        out[ticker] = _summary(start, terminal, drawdown, method, steps, len(sizes), quantiles)
+    return {t: out[t] for t in prices}
+
+
+def simulate(closes: Any, **kwargs: Any) -> Dict[str, Any]:
+    """simulate_many for a single close series."""
+    return simulate_many({"_": closes}, **kwargs)["_"]
@@ -0,0 +1,386 @@
+"""Metadata-partitioned passage store behind RAGAgent.
+
+Passages are sharded by ticker; each shard owns its BM25 index, its
+row-normalized embedding matrix and one column per filterable metadata field
+(cik, form, filing_date, section). A query restricted to a ticker only touches
+that shard, and form/date/section filters become a boolean row mask that is
+applied before lexical ranking and dense scoring, so cost scales with the
+matching rows rather than the whole corpus.
+
+Filters (all optional; values may be a string or a list of strings):
+    {"ticker": "TSLA", "form": ["10-K", "10-Q"], "cik": "1318605",
+     "section": "Item 1A", "date_from": "2023-01-01", "date_to": "2024-12-31"}
+Dates are ISO strings and compared lexicographically; passages without a
+filing date never match a date filter.
+
+Growth is bounded:
+- ingest is idempotent: passage ids already present are skipped, and a
+  document is tracked by (doc_id, content hash) so unchanged re-ingests are
+  no-ops and changed ones replace the old passages;
+- passages whose normalized text (case, punctuation, whitespace) matches a
+  live passage in the same shard are suppressed as near-duplicates;
+- deletes only tombstone rows (masked out of every search); a shard is
+  compacted once a quarter of its rows are dead;
+- with max_passages / max_bytes set, least-recently-used documents (by
+  ingest or retrieval) are evicted until the store fits.
+"""
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import re
+import threading
+
+import numpy as np
+
+from .lexical import BM25Index, reciprocal_rank_fusion
+
+META_FIELDS = ("ticker", "cik", "form", "filing_date", "section")
+_COLUMN_FIELDS = ("cik", "form", "filing_date", "section")  # ticker is the shard key
+FILTER_KEYS = frozenset(("ticker", "cik", "form", "section", "date_from", "date_to"))
+
+_SECTION_RE = re.compile(r"^\s*item\s+(\d{1,2}[a-z]?)\b", re.I)
+_WORD_RE = re.compile(r"\w+")
+
+# Compact a shard once this fraction of its rows are tombstones.
+COMPACT_DEAD_FRACTION = 0.25
+
+
+def detect_section(text: str) -> Optional[str]:
+    """Normalized 10-K/10-Q heading ("Item 1A") if the passage starts with one."""
+    m = _SECTION_RE.match(text)
+    return f"Item {m.group(1).upper()}" if m else None
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+
+
+def near_dup_key(text: str) -> bytes:
+    """8-byte key of the text with case, punctuation and whitespace normalized away."""
+    norm = " ".join(_WORD_RE.findall(text.lower()))
+    return hashlib.blake2b(norm.encode("utf-8", "replace"), digest_size=8).digest()
+
+
+def _doc_id(item: Dict[str, Any]) -> str:
+    return str(item.get("doc_id") or str(item["id"]).split("#", 1)[0])
+
+
+def _item_bytes(item: Dict[str, Any]) -> int:
+    return len(item["text"]) + int(getattr(item.get("embedding"), "nbytes", 0))
+
+
+def _values(v: Any) -> List[str]:
+    if isinstance(v, (list, tuple, set, frozenset)):
+        return [str(x) for x in v]
+    return [str(v)]
+
+
+def _norm_ticker(t: Any) -> str:
+    return str(t).upper() if t else ""
+
+
+class Shard:
+    """All passages for one ticker."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.items: List[Dict[str, Any]] = []
+        # lexical doc id == row in self.items == row in the dense matrix
+        self.lexical = BM25Index()
+        self._matrix = None
+        self._meta: Dict[str, List[str]] = {f: [] for f in _COLUMN_FIELDS}
+        self._columns: Dict[str, Any] = {}
+        self._live = array("B")
+        self.dead = 0
+        self.near_dups: Dict[bytes, int] = {}  # normalized-text key -> live row
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def live_count(self) -> int:
+        return len(self.items) - self.dead
+
+    def add(self, item: Dict[str, Any], dup_key: bytes) -> int:
+        row = len(self.items)
+        self.items.append(item)
+        self.lexical.add(item["text"])
+        for f in _COLUMN_FIELDS:
+            self._meta[f].append(str(item.get(f) or ""))
+        self._live.append(1)
+        self.near_dups[dup_key] = row
+        return row
+
+    def kill(self, row: int) -> None:
+        if self._live[row]:
+            self._live[row] = 0
+            self.dead += 1
+            key = near_dup_key(self.items[row]["text"])
+            if self.near_dups.get(key) == row:
+                del self.near_dups[key]
+
+    def live_items(self) -> List[Dict[str, Any]]:
+        return [it for it, alive in zip(self.items, self._live) if alive]
+
+    def dense_matrix(self) -> Any:
+        if self._matrix is None or len(self._matrix) != len(self.items):
+            start = 0 if self._matrix is None else len(self._matrix)
+            rows = np.vstack([it["embedding"] for it in self.items[start:]]).astype(np.float32)
+            norms = np.linalg.norm(rows, axis=1, keepdims=True)
+            rows /= np.where(norms == 0, 1.0, norms)
+            self._matrix = rows if self._matrix is None else np.vstack([self._matrix, rows])
+        return self._matrix
+
+    def column(self, field: str) -> Any:
+        col = self._columns.get(field)
+        if col is None or len(col) != len(self.items):
+            col = self._columns[field] = np.asarray(self._meta[field], dtype=str)
+        return col
+
+    def mask(self, filters: Dict[str, Any]) -> Optional[Any]:
+        """Boolean row mask for tombstones and the non-ticker filters, or None when every row qualifies."""
+        mask = np.frombuffer(self._live, dtype=bool).copy() if self.dead else None
+
+        def _and(m: Any) -> None:
+            nonlocal mask
+            mask = m if mask is None else mask & m
+
+        for f in ("cik", "form"):
+            if filters.get(f):
+                _and(np.isin(self.column(f), _values(filters[f])))
+        if filters.get("section"):
+            wanted = [detect_section(s) or s for s in _values(filters["section"])]
+            _and(np.isin(self.column("section"), wanted))
+        if filters.get("date_from") or filters.get("date_to"):
+            dates = self.column("filing_date")
+            m = dates != ""
+            if filters.get("date_from"):
+                m &= dates >= str(filters["date_from"])
+            if filters.get("date_to"):
+                m &= dates <= str(filters["date_to"])
+            _and(m)
+        return mask
+
+
+class _Document:
+    __slots__ = ("shard", "content_hash", "ids", "bytes")
+
+    def __init__(self, shard: str, content_hash: Optional[str]):
+        self.shard = shard
+        self.content_hash = content_hash
+        self.ids: List[str] = []
+        self.bytes = 0
+
+
+class PassageStore:
+    def __init__(self, max_passages: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_passages = max_passages
+        self.max_bytes = max_bytes
+        self.shards: Dict[str, Shard] = {}
+        self._docs: "OrderedDict[str, _Document]" = OrderedDict()  # LRU order, oldest first
+        self._where: Dict[str, Tuple[str, int]] = {}  # passage id -> (shard, row)
+        self._live = 0
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Live (non-tombstoned) passages."""
+        return self._live
+
+    @property
+    def bytes(self) -> int:
+        """Approximate payload size: passage text plus embedding buffers."""
+        return self._bytes
+
+    @property
+    def document_count(self) -> int:
+        return len(self._docs)
+
+    def document_hash(self, doc_id: str) -> Optional[str]:
+        doc = self._docs.get(doc_id)
+        return doc.content_hash if doc else None
+
+    def has_document(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def touch(self, doc_id: str) -> None:
+        with self._lock:
+            if doc_id in self._docs:
+                self._docs.move_to_end(doc_id)
+
+    def is_duplicate(self, item: Dict[str, Any]) -> bool:
+        """True if the passage id is already stored or its normalized text duplicates a live passage."""
+        if item["id"] in self._where:
+            return True
+        shard = self.shards.get(_norm_ticker(item.get("ticker")))
+        return shard is not None and near_dup_key(item["text"]) in shard.near_dups
+
+    def add(self, items: Iterable[Dict[str, Any]], doc_hashes: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+        """
+        Add passages (with "embedding"), grouped into documents by "doc_id"
+        (default: the id prefix before '#'). Every document in `doc_hashes` is
+        registered, even one left with no passages (all near-duplicates), so
+        re-ingesting it is skipped. Returns counts of added and suppressed
+        passages and of documents evicted to stay within bounds.
+        """
+        doc_hashes = doc_hashes or {}
+        added = duplicates = 0
+        with self._lock:
+            for item in items:
+                if item["id"] in self._where:
+                    duplicates += 1
+                    continue
+                key = _norm_ticker(item.get("ticker"))
+                shard = self.shards.get(key)
+                if shard is None:
+                    shard = self.shards[key] = Shard(key)
+                dup_key = near_dup_key(item["text"])
+                if dup_key in shard.near_dups:
+                    duplicates += 1
+                    continue
+                doc_id = _doc_id(item)
+                doc = self._docs.get(doc_id)
+                if doc is None:
+                    doc = self._docs[doc_id] = _Document(key, doc_hashes.get(doc_id))
+                self._docs.move_to_end(doc_id)
+                row = shard.add(item, dup_key)
+                self._where[item["id"]] = (key, row)
+                size = _item_bytes(item)
+                doc.ids.append(item["id"])
+                doc.bytes += size
+                self._bytes += size
+                self._live += 1
+                added += 1
+            for doc_id, h in doc_hashes.items():
+                if doc_id not in self._docs:
+                    self._docs[doc_id] = _Document("", h)
+            evicted = self._evict()
+        return {"added": added, "duplicates": duplicates, "evicted": evicted}
+
+    def delete_document(self, doc_id: str) -> int:
+        """Tombstone every passage of a document; returns how many were removed."""
+        with self._lock:
+            doc = self._docs.pop(doc_id, None)
+            if doc is None or not doc.ids:
+                return 0
+            shard = self.shards[doc.shard]
+            for pid in doc.ids:
+                _, row = self._where.pop(pid)
+                shard.kill(row)
+            self._live -= len(doc.ids)
+            self._bytes -= doc.bytes
+            if shard.dead and shard.dead >= COMPACT_DEAD_FRACTION * len(shard):
+                self._compact(shard)
+            return len(doc.ids)
+
+    def _evict(self) -> int:
+        evicted = 0
+        while self._docs and (
+            (self.max_passages is not None and self._live > self.max_passages)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._docs))
+            self.delete_document(oldest)
+            evicted += 1
+        return evicted
+
+    def _compact(self, shard: Shard) -> None:
+        """Rebuild a shard from its live rows, dropping tombstones from the BM25 postings and matrix."""
+        live = shard.live_items()
+        if not live:
+            del self.shards[shard.key]
+            return
+        fresh = Shard(shard.key)
+        for item in live:
+            self._where[item["id"]] = (shard.key, fresh.add(item, near_dup_key(item["text"])))
+        self.shards[shard.key] = fresh
+
+    def _select(self, filters: Dict[str, Any]) -> List[Shard]:
+        if not filters.get("ticker"):
+            return list(self.shards.values())
+        return [self.shards[k] for k in dict.fromkeys(_norm_ticker(t) for t in _values(filters["ticker"])) if k in self.shards]
+
+    def search(
+        self,
+        query: str,
+        q_emb: Any,
+        top_k: int = 5,
+        mode: str = "hybrid",
+        filters: Optional[Dict[str, Any]] = None,
+        prefilter_k: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank passages matching `filters`. Each selected shard contributes its
+        BM25 and dense candidates (lexical candidates narrow the dense stage
+        when there are at least top_k of them); the union is then fused with
+        reciprocal rank fusion, or ranked by cosine alone for mode="dense".
+        """
+        filters = filters or {}
+        unknown = set(filters) - FILTER_KEYS
+        if unknown:
+            raise ValueError(f"unknown filter keys: {sorted(unknown)}")
+
+        q = np.asarray(q_emb, dtype=np.float32)
+        q_norm = float(np.linalg.norm(q))
+        q = q / q_norm if q_norm else q
+        prefilter_k = prefilter_k or max(50, 10 * top_k)
+        keep = prefilter_k if mode == "hybrid" else top_k
+
+        with self._lock:
+            lexical: List[Tuple[float, Tuple[str, int]]] = []
+            dense: List[Tuple[float, Tuple[str, int]]] = []
+            for shard in self._select(filters):
+                if not shard.live_count:
+                    continue
+                mask = shard.mask(filters)
+                if mask is not None and not mask.any():
+                    continue
+                lex = shard.lexical.search(query, k=prefilter_k, mask=mask) if mode == "hybrid" else []
+                lexical.extend((s, (shard.key, d)) for d, s in lex)
+                matrix = shard.dense_matrix()
+                if len(lex) >= top_k:
+                    cand = np.fromiter((d for d, _ in lex), dtype=np.int64, count=len(lex))
+                    scores = matrix[cand] @ q
+                elif mask is not None:
+                    cand = np.flatnonzero(mask)
+                    scores = matrix[cand] @ q
+                else:
+                    cand = np.arange(len(shard))
+                    scores = matrix @ q
+                if len(cand) > keep:
+                    top = np.argpartition(-scores, keep - 1)[:keep]
+                else:
+                    top = np.arange(len(cand))
+                dense.extend((float(scores[i]), (shard.key, int(cand[i]))) for i in top)
+
+            lexical.sort(key=lambda x: x[0], reverse=True)
+            dense.sort(key=lambda x: x[0], reverse=True)
+            lexical, dense = lexical[:prefilter_k], dense[:keep]
+            bm25 = {ref: s for s, ref in lexical}
+            dense_score = {ref: s for s, ref in dense}
+
+            if mode == "hybrid":
+                fused = reciprocal_rank_fusion([[ref for _, ref in lexical], [ref for _, ref in dense]])
+                ranked = sorted(fused.items(), key=lambda x: x[1], reverse=True)[:top_k]
+            else:
+                ranked = [(ref, s) for s, ref in dense[:top_k]]
+
+            out = []
+            for (key, d), s in ranked:
+                it = self.shards[key].items[d]
+                hit = {
+                    "score": s,
+                    "dense_score": dense_score.get((key, d)),
+                    "bm25_score": bm25.get((key, d)),
+                    "id": it["id"],
+                    "text": it["text"],
+                    "source": it.get("source"),
+                }
+                hit.update({f: it[f] for f in META_FIELDS if it.get(f)})
+                out.append(hit)
+                # retrieval counts as use for LRU eviction
+                doc_id = _doc_id(it)
+                if doc_id in self._docs:
+                    self._docs.move_to_end(doc_id)
+            return out
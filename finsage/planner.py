@@ -1,5 +1,20 @@
 """Planner orchestrator for the FinSage MVP."""
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Any, FrozenSet, Iterable, Iterator, List, Optional, Set
+import json
+import os
+import queue
+import threading
+import time
+
+from . import serialize, telemetry
+from .cache import ResultCache, default_cache
+from .compute import ComputeExecutor, default_executor
+from .deadline import Deadline, DeadlineExceeded, bind, run_within
+from .facts import FactsTable, default_facts
+from .memo import StageMemo
+from .query_parser import get_parser
+from .universe import UniverseSnapshot, default_universe
 from .agents import (
     DataAgent,
     DocumentAgent,
@@ -14,100 +29,360 @@ from .agents import (
     LLMAgent,
 )
 
+# Stages each response section needs. A `fields=` projection runs only the union
+# of its sections' stages; "query" and "ticker" are always returned.
+SECTION_STAGES: Dict[str, FrozenSet[str]] = {
+    "fundamentals": frozenset({"data"}),
+    "history_len": frozenset({"data"}),
+    "filings": frozenset({"documents"}),
+    "news": frozenset({"news"}),
+    "metrics": frozenset({"data", "calculation"}),
+    "prediction": frozenset({"data", "prediction"}),
+    "comparison": frozenset({"data", "comparison"}),
+    "risk": frozenset({"data", "news", "risk"}),
+    "validation": frozenset({"data", "validation"}),
+    # LLM synthesis over filing passages, falling back to rule-based reasoning over the rest
+    "thesis": frozenset({"data", "documents", "news", "calculation", "prediction", "rag", "synthesis"}),
+    "timings": frozenset(),
+    "stages": frozenset(),
+    "partial": frozenset(),
+}
+ALL_STAGES: FrozenSet[str] = frozenset().union(*SECTION_STAGES.values())
+
+
+def _no_errors(value: Any) -> bool:
+    """False when a composite stage output (RAG, synthesis) holds a failed sub-result, e.g. a transient LLM error."""
+    return isinstance(value, dict) and not any(isinstance(v, dict) and v.get("error") for v in value.values())
+
+
+def required_stages(fields: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+    """Stages needed for the requested response sections (all of them when fields is None)."""
+    if fields is None:
+        return ALL_STAGES
+    unknown = sorted(set(fields) - set(SECTION_STAGES) - {"query", "ticker"})
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(SECTION_STAGES)}")
+    return frozenset().union(*(SECTION_STAGES.get(f, frozenset()) for f in fields))
+
 
 class Planner:
-    def __init__(self, sec_user_agent: Optional[str] = None):
+    def __init__(
+        self,
+        sec_user_agent: Optional[str] = None,
+        cache: Optional[ResultCache] = None,
+        compute: Optional[ComputeExecutor] = None,
+        benchmark: Optional[str] = "SPY",
+        universe: Optional[UniverseSnapshot] = None,
+        facts: Optional[FactsTable] = None,
+        memo: Optional[StageMemo] = None,
+        deadline: Optional[float] = None,
+    ):
+        # Shared across Planner instances (and workers, with FINSAGE_REDIS_URL) unless one is passed in.
+        self.cache = cache if cache is not None else default_cache()
+        # CPU-bound RAG work goes to a process pool when configured (FINSAGE_COMPUTE_WORKERS).
+        self.compute = compute if compute is not None else default_executor()
+        # Index whose price history RiskAgent measures beta against (None to skip the fetch).
+        self.benchmark = benchmark
+        # Derived stages are memoized by a hash of their inputs, so a re-run recomputes only what changed.
+        self.memo = memo if memo is not None else StageMemo()
+        # Default latency budget per request in seconds (FINSAGE_DEADLINE_S); None for no deadline.
+        env_deadline = os.environ.get("FINSAGE_DEADLINE_S")
+        self.deadline = deadline if deadline is not None else (float(env_deadline) if env_deadline else None)
         self.data_agent = DataAgent()
-        self.doc_agent = DocumentAgent(user_agent=sec_user_agent)
-        self.calc_agent = CalculationAgent()
+        self.doc_agent = DocumentAgent(user_agent=sec_user_agent, cache=self.cache)
+        # Bulk 10-K facts (FINSAGE_FACTS_DIR) backing EPS and cross-checks without per-ticker fetches.
+        self.facts = facts if facts is not None else default_facts()
+        self.calc_agent = CalculationAgent(facts=self.facts)
         self.reasoning_agent = ReasoningAgent()
         self.news_agent = NewsAgent()
         self.pred_agent = PredictionAgent()
-        self.comparison_agent = ComparisonAgent()
+        # Precomputed fundamentals snapshot (FINSAGE_UNIVERSE_FILE) for sector ranks and peers without fetches.
+        self.comparison_agent = ComparisonAgent(universe=universe if universe is not None else default_universe())
         self.risk_agent = RiskAgent()
-        self.validation_agent = ValidationAgent()
-    self.rag_agent = RAGAgent()
-    self.llm_agent = LLMAgent()
+        self.validation_agent = ValidationAgent(facts=self.facts)
+        self.rag_agent = RAGAgent(executor=self.compute)
+        self.llm_agent = LLMAgent()
 
     def _parse_tickers(self, query: str) -> List[str]:
-        # Very small heuristic: look for uppercase tokens 1-5 chars long
-        tokens = [t.strip(".,?()") for t in query.split()]
-        picks = [t for t in tokens if t.isupper() and 1 <= len(t) <= 5]
-        return picks
+        # Tickers validated against the SEC dictionary (or a named company), as the chat endpoints parse them.
+        return get_parser().extract(query)["tickers"]
+
+    def _cached_run(self, agent: Any, ticker: str) -> Dict[str, Any]:
+        """Run a network-bound agent through the shared TTL cache, keyed by (agent, ticker)."""
+        return self.cache.get_or_compute(agent.name, ticker.upper(), lambda: agent.run(ticker))
+
+    @staticmethod
+    def _report(context: Dict[str, Any]) -> Dict[str, List[str]]:
+        return context.setdefault("stages", {"reused": [], "computed": [], "missed_deadline": [], "failed": []})
+
+    def _bounded(self, context: Dict[str, Any], stage: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run a stage under the request deadline. A stage that misses it yields a
+        partial error result (and is reported) instead of holding up the response.
+        """
+        try:
+            out = run_within(fn, stage)
+        except DeadlineExceeded:
+            self._report(context)["missed_deadline"].append(stage)
+            return {"error": f"deadline exceeded during {stage}", "partial": True}
+        self._report(context)["computed"].append(stage)
+        return out
+
+    def _source(self, context: Dict[str, Any], stage: str, agent: Any, ticker: str) -> Dict[str, Any]:
+        """A fetch stage: reused when the result cache already holds it."""
+        if self.cache.has(agent.name, ticker.upper()):
+            self._report(context)["reused"].append(stage)
+            return self._cached_run(agent, ticker)
+        return self._bounded(context, stage, lambda: self._cached_run(agent, ticker))
+
+    def _derived(
+        self,
+        context: Dict[str, Any],
+        stage: str,
+        inputs: Dict[str, Any],
+        compute: Callable[[], Any],
+        bounded: bool = True,
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        A derived stage: reused when its inputs hash the same as a previous run's.
+        Local analysis stages (bounded=False) take microseconds and always run,
+        so a partial response still carries them after the budget is spent.
+        Outputs for which `cacheable` is false are not memoized (see _no_errors).
+        """
+        key, found, value = self.memo.lookup(stage, inputs)
+        if found:
+            self._report(context)["reused"].append(stage)
+            return value
+        if bounded:
+            value = self._bounded(context, stage, compute)
+        else:
+            value = compute()
+            self._report(context)["computed"].append(stage)
+        if cacheable(value):
+            self.memo.store(key, value)
+        return value
 
-    def run(self, query: str, tickers: Optional[List[str]] = None, peers: Optional[List[str]] = None) -> Dict[str, Any]:
+    def run(
+        self,
+        query: str,
+        tickers: Optional[List[str]] = None,
+        peers: Optional[List[str]] = None,
+        fields: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+        on_stage: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Analyze the primary ticker. `fields` limits the response to those
+        sections (see SECTION_STAGES) and skips every stage none of them need.
+        `deadline` (seconds, default self.deadline) bounds the request: stages
+        still running when it expires are abandoned, listed under
+        stages.missed_deadline, and the response is marked partial.
+        `on_stage(section, value)` is called with each response section as soon
+        as the stage producing it finishes, before the slower stages run.
+        """
+        budget = deadline if deadline is not None else self.deadline
+        fields = None if fields is None else list(fields)
+        try:
+            stages = required_stages(fields)
+        except ValueError as e:
+            return {"error": str(e)}
+        if on_stage is not None and fields is not None:
+            on_stage = self._only(on_stage, fields)
+        with telemetry.collect() as spans:
+            with telemetry.span("planner", "run") as total, bind(Deadline(budget) if budget else None):
+                response = self._run(query, tickers, peers, stages, fields, on_stage)
+        if not response.get("error") and (fields is None or "timings" in fields):
+            # Per-agent and per-upstream wall time (ms) spent on this request.
+            timings = telemetry.summarize([sp for sp in spans if sp[0] != "planner"])
+            timings["total_ms"] = round(total.elapsed * 1e3, 3)
+            response["timings"] = timings
+        return response
+
+    def _run(
+        self,
+        query: str,
+        tickers: Optional[List[str]] = None,
+        peers: Optional[List[str]] = None,
+        stages: FrozenSet[str] = ALL_STAGES,
+        fields: Optional[List[str]] = None,
+        on_stage: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
         print(f"[Planner] Running planner for query: {query}")
         tickers = tickers or self._parse_tickers(query)
         if not tickers:
             return {"error": "No ticker provided or detected in query. Pass tickers=[...] to Planner.run"}
 
         primary = tickers[0]
-        context: Dict[str, Any] = {}
+        context = self._gather(primary, peers, stages, on_stage)
+
+        # 9) RAG ingest recent filings (if any) and retrieve top passages
+        rag_results = None
+        if "rag" in stages and context.get("filings"):
+            docs = self._filing_docs(primary, context)
+            rag_in = {"query": query, "ticker": primary, "docs": docs}
+            context["rag"] = self._derived(context, "rag", rag_in, lambda: {
+                "ingest": self.rag_agent.ingest_urls(docs),
+                "retrieve": self.rag_agent.retrieve(query, top_k=5, filters={"ticker": primary}),
+            }, cacheable=_no_errors)
+            rag_results = context["rag"].get("retrieve")
+
+        response = self._synthesize(query, primary, context, rag_results, stages, fields)
+        print(f"[Planner] Synthesis complete for {primary}.")
+        return response
+
+    @staticmethod
+    def _only(on_stage: Callable[[str, Any], None], fields: List[str]) -> Callable[[str, Any], None]:
+        wanted = set(fields)
+        return lambda section, value: on_stage(section, value) if section in wanted else None
+
+    @staticmethod
+    def _emit(context: Dict[str, Any], section: str, value: Any) -> None:
+        """Hand a finished response section to the on_stage callback; a failing callback never fails the run."""
+        on_stage = context.get("on_stage")
+        if on_stage is None:
+            return
+        try:
+            on_stage(section, value)
+        except Exception as e:
+            print(f"[Planner] on_stage callback failed for {section}: {e}")
+
+    def _gather(
+        self,
+        primary: str,
+        peers: Optional[List[str]] = None,
+        stages: FrozenSet[str] = ALL_STAGES,
+        on_stage: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
+        """Steps 1-8: fetch data, filings and news, then run the per-ticker analysis agents (those in `stages`)."""
+        context: Dict[str, Any] = {"on_stage": on_stage}
 
         # 1) Data
-        data_out = self.data_agent.run(primary)
-        if data_out.get("error"):
-            context["data_error"] = data_out.get("error")
-        else:
-            context["fundamentals"] = data_out.get("fundamentals")
-            context["history"] = data_out.get("history")
+        if "data" in stages:
+            data_out = self._source(context, "data", self.data_agent, primary)
+            if data_out.get("error"):
+                context["data_error"] = data_out.get("error")
+            else:
+                context["fundamentals"] = data_out.get("fundamentals")
+                context["history"] = data_out.get("history")
+            self._emit(context, "fundamentals", context.get("fundamentals"))
+            self._emit(context, "history_len", len(context.get("history") or []))
 
         # 2) Documents
-        docs_out = self.doc_agent.run(primary)
-        context["filings"] = docs_out.get("filings")
+        if "documents" in stages:
+            docs_out = self._source(context, "documents", self.doc_agent, primary)
+            context["filings"] = docs_out.get("filings")
+            context["cik"] = docs_out.get("cik")
+            self._emit(context, "filings", context["filings"])
 
         # 3) News
-        news_out = self.news_agent.run(primary)
-        context["news"] = news_out
+        news_out = None
+        if "news" in stages:
+            news_out = self._source(context, "news", self.news_agent, primary)
+            context["news"] = news_out
+            self._emit(context, "news", news_out)
 
         # 4) Calculations
-        calc_out = self.calc_agent.run(primary, {"fundamentals": context.get("fundamentals"), "history": context.get("history")})
-        context["metrics"] = calc_out
+        if "calculation" in stages:
+            calc_in = {"ticker": primary, "fundamentals": context.get("fundamentals"), "history": context.get("history")}
+            calc_out = self._derived(context, "calculation", calc_in, lambda: self.calc_agent.run(primary, calc_in), bounded=False)
+            context["metrics"] = calc_out
+            self._emit(context, "metrics", calc_out)
 
         # 5) Prediction
-        pred_out = self.pred_agent.run(primary, {"history": context.get("history")})
-        context["prediction"] = pred_out
+        if "prediction" in stages:
+            pred_in = {"ticker": primary, "history": context.get("history")}
+            pred_out = self._derived(context, "prediction", pred_in, lambda: self.pred_agent.run(primary, pred_in), bounded=False)
+            context["prediction"] = pred_out
+            self._emit(context, "prediction", pred_out)
 
-        # 6) Comparison (if peers provided)
-        if peers:
+        # 6) Comparison (if peers provided, or ranked against the universe snapshot)
+        if "comparison" in stages and (peers or self.comparison_agent.universe is not None):
             peer_data = []
-            for p in peers:
-                pd = self.data_agent.run(p)
+            for p in peers or []:
+                pd = self._source(context, f"peer:{p}", self.data_agent, p)
                 peer_data.append({"ticker": p, "fundamentals": pd.get("fundamentals")})
             context["peers"] = peer_data
-            comp_out = self.comparison_agent.run(primary, {"peers": peer_data, "fundamentals": context.get("fundamentals")})
+            comp_in = {"ticker": primary, "peers": peer_data, "fundamentals": context.get("fundamentals")}
+            comp_out = self._derived(context, "comparison", comp_in, lambda: self.comparison_agent.run(primary, comp_in), bounded=False)
             context["comparison"] = comp_out
+            self._emit(context, "comparison", comp_out)
 
         # 7) Risk
-        risk_out = self.risk_agent.run(primary, {"fundamentals": context.get("fundamentals"), "news": news_out})
-        context["risk"] = risk_out
+        if "risk" in stages:
+            bench_history = None
+            if self.benchmark and self.benchmark.upper() != primary.upper():
+                bench_history = self._source(context, "benchmark", self.data_agent, self.benchmark).get("history")
+            risk_in = {
+                "ticker": primary,
+                "fundamentals": context.get("fundamentals"),
+                "news": news_out,
+                "history": context.get("history"),
+                "benchmark_history": bench_history,
+            }
+            risk_out = self._derived(context, "risk", risk_in, lambda: self.risk_agent.run(primary, risk_in), bounded=False)
+            context["risk"] = risk_out
+            self._emit(context, "risk", risk_out)
 
         # 8) Validation
-        val_out = self.validation_agent.run(primary, {"fundamentals": context.get("fundamentals"), "history": context.get("history")})
-        context["validation"] = val_out
+        if "validation" in stages:
+            val_in = {"ticker": primary, "fundamentals": context.get("fundamentals"), "history": context.get("history")}
+            val_out = self._derived(context, "validation", val_in, lambda: self.validation_agent.run(primary, val_in), bounded=False)
+            context["validation"] = val_out
+            self._emit(context, "validation", val_out)
+        return context
 
-        # 9) RAG ingest recent filings (if any) and retrieve top passages
-        rag_results = None
-        if context.get("filings"):
-            docs = []
-            for f in context.get("filings"):
-                docs.append({"id": f.get("url"), "url": f.get("url"), "source": f.get("url")})
-            ingest = self.rag_agent.ingest_urls(docs)
-            rag_results = self.rag_agent.retrieve(query, top_k=5)
-            context["rag"] = {"ingest": ingest, "retrieve": rag_results}
-
-        # 10) LLM synthesis using retrieved passages (RAG)
-        llm_out = self.llm_agent.run(query, passages=(rag_results.get("results") if rag_results else None))
-        context["llm"] = llm_out
-
-        # 11) Final reasoning combines LLM output if available
-        if llm_out and not llm_out.get("error"):
-            context["thesis"] = llm_out.get("text")[:1500]
-        else:
-            reasoning_out = self.reasoning_agent.run(primary, {"fundamentals": context.get("fundamentals"), "news": news_out, "metrics": calc_out, "prediction": pred_out})
-            context["thesis"] = reasoning_out.get("thesis")
+    def _filing_docs(self, ticker: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": f.get("url"),
+                "url": f.get("url"),
+                "source": f.get("url"),
+                "ticker": ticker,
+                "cik": context.get("cik"),
+                "form": f.get("form"),
+                "filing_date": f.get("filing_date"),
+            }
+            for f in context.get("filings") or []
+        ]
+
+    def _synthesize(
+        self,
+        query: str,
+        primary: str,
+        context: Dict[str, Any],
+        rag_results: Optional[Dict[str, Any]],
+        stages: FrozenSet[str] = ALL_STAGES,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Steps 10-11: LLM synthesis over retrieved passages, falling back to rule-based reasoning."""
+        news_out = context.get("news")
+        calc_out = context.get("metrics")
+        pred_out = context.get("prediction")
+
+        if "synthesis" in stages:
+            passages = rag_results.get("results") if rag_results else None
+            reasoning_in = {"fundamentals": context.get("fundamentals"), "news": news_out, "metrics": calc_out, "prediction": pred_out}
+
+            def synthesize() -> Dict[str, Any]:
+                # 10) LLM synthesis using retrieved passages (RAG)
+                llm_out = self.llm_agent.run(query, passages=passages)
+
+                # 11) Final reasoning combines LLM output if available
+                if llm_out and not llm_out.get("error"):
+                    return {"llm": llm_out, "thesis": llm_out.get("text")[:1500]}
+                reasoning_out = self.reasoning_agent.run(primary, reasoning_in)
+                return {"llm": llm_out, "thesis": reasoning_out.get("thesis")}
+
+            synthesis_in = dict(reasoning_in, query=query, ticker=primary, passages=passages)
+            synthesis = self._derived(context, "synthesis", synthesis_in, synthesize, cacheable=_no_errors)
+            if synthesis.get("partial"):
+                # Out of time for the LLM: the rule-based thesis is local and fast.
+                synthesis = {"llm": synthesis, "thesis": self.reasoning_agent.run(primary, reasoning_in).get("thesis")}
+            context["llm"] = synthesis["llm"]
+            context["thesis"] = synthesis["thesis"]
+            self._emit(context, "thesis", context["thesis"])
 
-        
         response = {
             "query": query,
             "ticker": primary,
@@ -118,9 +393,209 @@ class Planner:
             "metrics": calc_out,
             "prediction": pred_out,
             "comparison": context.get("comparison"),
-            "risk": risk_out,
-            "validation": val_out,
+            "risk": context.get("risk"),
+            "validation": context.get("validation"),
             "thesis": context.get("thesis"),
+            # Which stages were served from the result cache / stage memo, which ran, which ran out of time
+            # and which could not run (a batch retrieval error in iter_many).
+            "stages": context.get("stages"),
+            "partial": bool((context.get("stages") or {}).get("missed_deadline")),
         }
-        print(f"[Planner] Synthesis complete for {primary}.")
+        if fields is not None:
+            response = {k: v for k, v in response.items() if k in ("query", "ticker") or k in fields}
         return response
+
+    def stream(
+        self,
+        query: str,
+        tickers: Optional[List[str]] = None,
+        peers: Optional[List[str]] = None,
+        fields: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        run() as a stream of events: {"event": "stage", "section", "data"} for
+        each section as soon as it is ready, then one {"event": "done", ...}
+        with the query, ticker, stage report, partial flag and timings (or
+        {"event": "error", "error"}). The run executes on a background thread.
+        """
+        events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+        def work() -> None:
+            try:
+                res = self.run(query, tickers, peers, fields, deadline,
+                               on_stage=lambda section, value: events.put({"event": "stage", "section": section, "data": value}))
+                if res.get("error"):
+                    events.put({"event": "error", "error": res["error"]})
+                else:
+                    keys = ("query", "ticker", "stages", "partial", "timings")
+                    events.put(dict({k: res[k] for k in keys if k in res}, event="done"))
+            except Exception as e:
+                events.put({"event": "error", "error": f"{type(e).__name__}: {e}"})
+
+        threading.Thread(target=work, name="planner-stream", daemon=True).start()
+        while True:
+            event = events.get()
+            yield event
+            if event["event"] != "stage":
+                return
+
+    def iter_many(
+        self,
+        tickers: List[str],
+        concurrency: int = 8,
+        wave_size: int = 64,
+        peers: Optional[List[str]] = None,
+        query_template: str = "Analyze {ticker}",
+        fields: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze many tickers, yielding each response as soon as it completes.
+
+        Tickers are processed in waves: one bulk price download primes the
+        cache for the wave, per-ticker fetches and agents run on `concurrency`
+        threads, filings for the whole wave are ingested with one batched
+        embed and queried with one batched encode, then LLM synthesis runs
+        concurrently. A failing ticker yields {"ticker", "error"} and does not
+        stop the batch. `fields` projects each response as in run(); `deadline`
+        gives each ticker its own budget from the start of its wave.
+        """
+        fields = None if fields is None else list(fields)
+        stages = required_stages(fields)
+        budget = deadline if deadline is not None else self.deadline
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            for start in range(0, len(tickers), wave_size):
+                wave = tickers[start:start + wave_size]
+                if "data" in stages:
+                    self._prefetch_data(wave + ([self.benchmark] if self.benchmark and "risk" in stages else []))
+
+                deadlines = {t: Deadline(budget) if budget else None for t in wave}
+                contexts: Dict[str, Dict[str, Any]] = {}
+                futures = {pool.submit(self._within, deadlines[t], self._gather, t, peers, stages): t for t in wave}
+                for fut in as_completed(futures):
+                    t = futures[fut]
+                    try:
+                        contexts[t] = fut.result()
+                    except Exception as e:
+                        yield {"ticker": t, "error": f"{type(e).__name__}: {e}"}
+
+                queries = {t: query_template.format(ticker=t) for t in contexts}
+                rag_by_ticker = self._rag_wave(queries, contexts) if "rag" in stages else {}
+
+                futures = {
+                    pool.submit(self._within, deadlines[t], self._synthesize, queries[t], t, contexts[t], rag_by_ticker.get(t), stages, fields): t
+                    for t in contexts
+                }
+                for fut in as_completed(futures):
+                    t = futures[fut]
+                    try:
+                        yield fut.result()
+                    except Exception as e:
+                        yield {"ticker": t, "error": f"{type(e).__name__}: {e}"}
+
+    @staticmethod
+    def _within(dl: Optional[Deadline], fn: Callable[..., Any], *args: Any) -> Any:
+        with bind(dl):
+            return fn(*args)
+
+    def _prefetch_data(self, tickers: List[str]) -> None:
+        """Warm the DataAgent cache for tickers not already cached with one bulk download."""
+        missing = [t for t in tickers if not self.cache.has(self.data_agent.name, t.upper())]
+        if len(missing) < 2:
+            return
+        try:
+            bulk = self.data_agent.run_many(missing)
+        except Exception:
+            return
+        for t, out in bulk.items():
+            self.cache.put(self.data_agent.name, t.upper(), out)
+
+    def _rag_wave(self, queries: Dict[str, str], contexts: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        todo: Dict[str, str] = {}  # ticker -> memo key
+        docs_by_ticker = {t: self._filing_docs(t, contexts[t]) for t in queries if contexts[t].get("filings")}
+        for t, docs in docs_by_ticker.items():
+            key, found, rag = self.memo.lookup("rag", {"query": queries[t], "ticker": t, "docs": docs})
+            if found:
+                self._report(contexts[t])["reused"].append("rag")
+                contexts[t]["rag"] = rag
+                out[t] = rag["retrieve"]
+            else:
+                todo[t] = key
+        if not todo:
+            return out
+        ingest = self.rag_agent.ingest_urls([d for t in todo for d in docs_by_ticker[t]])
+        batch = self.rag_agent.retrieve_many(
+            [queries[t] for t in todo], top_k=5, filters=[{"ticker": t} for t in todo]
+        )
+        if batch.get("error"):
+            # Nothing was retrieved: each ticker carries the error and synthesizes without passages.
+            for t in todo:
+                contexts[t]["rag"] = {"ingest": ingest, "retrieve": batch}
+                self._report(contexts[t])["failed"].append("rag")
+            return out
+        for (t, key), res in zip(todo.items(), batch["results"]):
+            self._report(contexts[t])["computed"].append("rag")
+            contexts[t]["rag"] = {"ingest": ingest, "retrieve": res}
+            if _no_errors(contexts[t]["rag"]):
+                self.memo.store(key, contexts[t]["rag"])
+            out[t] = res
+        return out
+
+    def run_many(
+        self,
+        tickers: List[str],
+        out_path: Optional[str] = None,
+        resume: bool = True,
+        concurrency: int = 8,
+        peers: Optional[List[str]] = None,
+        fields: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Batch entry point for nightly jobs: stream one JSON line per ticker to
+        `out_path`. With resume=True, tickers that already have a successful
+        line in `out_path` are skipped, so a crashed run can simply be restarted.
+        """
+        started = time.perf_counter()
+        done = completed_tickers(out_path) if (out_path and resume) else set()
+        todo = [t for t in dict.fromkeys(t.upper() for t in tickers) if t not in done]
+        counts = {"completed": 0, "failed": 0}
+        sink = open(out_path, "a") if out_path else None
+        if sink and sink.tell() > 0:
+            sink.write("\n")  # terminate a torn last line left by a crash; blank lines are skipped
+        try:
+            for res in self.iter_many(todo, concurrency=concurrency, peers=peers, fields=fields, deadline=deadline):
+                counts["failed" if res.get("error") else "completed"] += 1
+                if sink:
+                    sink.write(serialize.encode_line(res).decode())
+                    sink.flush()
+        finally:
+            if sink:
+                sink.close()
+        return {
+            "total": len(tickers),
+            "skipped": len(tickers) - len(todo),
+            "completed": counts["completed"],
+            "failed": counts["failed"],
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+def completed_tickers(path: str) -> Set[str]:
+    """Tickers with a successful result line in a run_many JSONL output file."""
+    done: Set[str] = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path) as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn final line from an interrupted run
+            if rec.get("ticker") and not rec.get("error"):
+                done.add(rec["ticker"].upper())
+    return done
@@ -0,0 +1,293 @@
+"""Background watchlist prefetcher: keep the result cache and RAG store warm.
+
+Traffic concentrates on a known set of tickers, and the first request for
+each of them otherwise pays every upstream fetch. A Prefetcher refreshes a
+watchlist through the same Planner (and so the same ResultCache and RAG
+store) that serves requests, one loop per source:
+
+- "data": yfinance prices and fundamentals, in bulk downloads of `chunk`
+  tickers (plus the planner's risk benchmark);
+- "documents": SEC filing lists, then newly listed filings are fetched and
+  embedded into the RAG store so requests only retrieve;
+- "news": Google News RSS.
+
+Each loop writes fresh results with ResultCache.put, so an entry is
+replaced before it expires as long as the source's interval is shorter than
+its TTL (the defaults are). Upstream calls draw from per-upstream token
+buckets (requests per second, bursts up to one second's worth), sized below
+the published limits (SEC asks for at most 10 req/s) to leave headroom for
+user traffic.
+
+Configuration: FINSAGE_WATCHLIST (comma-separated tickers or a file with
+one per line), FINSAGE_PREFETCH_INTERVALS ("data=3600,news=300", seconds;
+0 turns a source off) and FINSAGE_PREFETCH_RATES ("sec=8,google_news_rss=1",
+requests/s).
+backend.main starts one at startup when a watchlist is set; on its own,
+`python -m finsage.prefetch` runs as a daemon, which only helps a server
+sharing its cache through FINSAGE_REDIS_URL (the RAG store is per process).
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import threading
+import time
+
+from . import telemetry
+from .cache import HOUR, MINUTE
+
+SOURCES = ("data", "documents", "news")
+
+# Seconds between refresh rounds; each is well inside the source's cache TTL.
+DEFAULT_INTERVALS: Dict[str, float] = {"data": HOUR, "documents": 6 * HOUR, "news": 5 * MINUTE}
+
+# Requests per second the prefetcher may send to each upstream.
+DEFAULT_RATES: Dict[str, float] = {"sec": 8.0, "google_news_rss": 1.0, "yfinance": 2.0}
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1.0, rate if burst is None else burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    def _wait_for(self, n: float) -> float:
+        """Seconds until `n` tokens (capped at the burst size) are available; takes them when that is 0."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            need = min(n, self.burst)
+            if self._tokens >= need:
+                # A request larger than the burst leaves the bucket in debt, so later callers wait it off.
+                self._tokens -= n
+                return 0.0
+            return (need - self._tokens) / self.rate
+
+    def acquire(self, n: float = 1.0, stop: Optional[threading.Event] = None) -> bool:
+        """Block until `n` tokens are taken; False if `stop` is set first."""
+        if self.rate <= 0:
+            return True
+        while True:
+            wait = self._wait_for(n)
+            if wait <= 0:
+                return True
+            if stop is not None:
+                if stop.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+def _parse_pairs(spec: str, what: str) -> Dict[str, float]:
+    out = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            try:
+                out[name.strip()] = float(value)
+            except ValueError:
+                print(f"[prefetch] ignoring bad {what} {part!r}")
+    return out
+
+
+def parse_watchlist(spec: str) -> List[str]:
+    """Tickers from a comma-separated list, or from a file with one per line (# comments allowed)."""
+    if spec and os.path.isfile(spec):
+        with open(spec) as fh:
+            spec = ",".join(line.split("#", 1)[0] for line in fh)
+    return list(dict.fromkeys(t.strip().upper() for t in spec.split(",") if t.strip()))
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        tickers: List[str],
+        planner: Any = None,
+        intervals: Optional[Dict[str, float]] = None,
+        rates: Optional[Dict[str, float]] = None,
+        ingest: bool = True,
+        chunk: int = 50,
+    ):
+        if planner is None:
+            from .planner import Planner
+
+            planner = Planner()
+        self.planner = planner
+        self.tickers = [t.upper() for t in tickers]
+        self.intervals = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.buckets = {name: TokenBucket(rate) for name, rate in rates.items()}
+        self.ingest = ingest
+        self.chunk = max(1, chunk)
+        self.stats = {s: {"rounds": 0, "refreshed": 0, "failed": 0} for s in SOURCES}
+        self.stats["documents"]["ingested"] = 0
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _take(self, upstream: str, n: float = 1.0) -> bool:
+        bucket = self.buckets.get(upstream)
+        return bucket is None or bucket.acquire(n, self._stop)
+
+    def _count(self, source: str, ok: bool) -> None:
+        self.stats[source]["refreshed" if ok else "failed"] += 1
+        telemetry.REGISTRY.inc(
+            "finsage_prefetch_total", {"source": source, "outcome": "ok" if ok else "error"},
+            help="Watchlist entries refreshed by the background prefetcher.",
+        )
+
+    def refresh_data(self) -> None:
+        agent, cache = self.planner.data_agent, self.planner.cache
+        tickers = list(self.tickers)
+        if self.planner.benchmark and self.planner.benchmark.upper() not in tickers:
+            tickers.append(self.planner.benchmark.upper())
+        for start in range(0, len(tickers), self.chunk):
+            batch = tickers[start:start + self.chunk]
+            # One bulk history download plus one info lookup per ticker.
+            if not self._take("yfinance", 1 + len(batch)):
+                return
+            try:
+                results = agent.run_many(batch)
+            except Exception as e:
+                print(f"[prefetch] data refresh failed for {len(batch)} tickers: {e}")
+                results = {t: {"error": str(e)} for t in batch}
+            for t in batch:
+                out = results.get(t) or {"error": "missing from bulk fetch"}
+                cache.put(agent.name, t, out)
+                self._count("data", not out.get("error"))
+
+    def refresh_documents(self) -> None:
+        planner = self.planner
+        agent, rag = planner.doc_agent, planner.rag_agent
+        for t in self.tickers:
+            if not self._take("sec"):
+                return
+            try:
+                out = agent.run(t)
+            except Exception as e:
+                out = {"error": str(e)}
+            planner.cache.put(agent.name, t, out)
+            self._count("documents", not out.get("error"))
+            if out.get("error") or not self.ingest:
+                continue
+            docs = planner._filing_docs(t, {"filings": out.get("filings"), "cik": out.get("cik")})
+            new = [d for d in docs if not rag.store.has_document(d["id"])]
+            if not new or not self._take("sec", len(new)):
+                continue
+            try:
+                res = rag.ingest_urls(new)
+            except Exception as e:
+                res = {"error": str(e)}
+            if res.get("error"):
+                print(f"[prefetch] ingest failed for {t}: {res['error']}")
+            else:
+                self.stats["documents"]["ingested"] += len(new)
+
+    def refresh_news(self) -> None:
+        agent, cache = self.planner.news_agent, self.planner.cache
+        for t in self.tickers:
+            if not self._take("google_news_rss"):
+                return
+            try:
+                out = agent.run(t)
+            except Exception as e:
+                out = {"error": str(e)}
+            cache.put(agent.name, t, out)
+            self._count("news", not out.get("error"))
+
+    def refresh(self, source: str) -> None:
+        """One refresh round of `source` over the whole watchlist."""
+        start = time.perf_counter()
+        getattr(self, f"refresh_{source}")()
+        if self._stop.is_set():
+            return  # cut short by stop()
+        self.stats[source]["rounds"] += 1
+        telemetry.REGISTRY.observe(
+            "finsage_prefetch_round_seconds", {"source": source}, time.perf_counter() - start,
+            help="Duration of a prefetcher refresh round over the watchlist.",
+            buckets=(1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+        )
+
+    def run_once(self, sources: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Refresh every source (or `sources`) once, concurrently; returns the stats."""
+        threads = [threading.Thread(target=self.refresh, args=(s,), daemon=True) for s in sources or SOURCES]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        return self.stats
+
+    def _loop(self, source: str) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh(source)
+            except Exception as e:
+                print(f"[prefetch] {source} round failed: {e}")
+            if self._stop.wait(self.intervals[source]):
+                return
+
+    def start(self) -> "Prefetcher":
+        """Run each source's refresh loop on a daemon thread; the first rounds start immediately."""
+        if self._threads:
+            return self
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._loop, args=(s,), name=f"prefetch-{s}", daemon=True)
+            for s in SOURCES if self.intervals.get(s, 0) > 0
+        ]
+        for th in self._threads:
+            th.start()
+        print(f"[prefetch] watching {len(self.tickers)} tickers: " + ", ".join(f"{s} every {self.intervals[s]:g}s" for s in SOURCES))
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the loops; a round in progress ends at its next rate-limit wait or upstream call."""
+        self._stop.set()
+        for th in self._threads:
+            th.join(timeout)
+        self._threads = []
+
+
+def from_env(planner: Any = None) -> Optional[Prefetcher]:
+    tickers = parse_watchlist(os.environ.get("FINSAGE_WATCHLIST", ""))
+    if not tickers:
+        return None
+    return Prefetcher(
+        tickers,
+        planner,
+        intervals=_parse_pairs(os.environ.get("FINSAGE_PREFETCH_INTERVALS", ""), "interval"),
+        rates=_parse_pairs(os.environ.get("FINSAGE_PREFETCH_RATES", ""), "rate"),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Keep FinSage caches warm for a watchlist.")
+    p.add_argument("--watchlist", default=os.environ.get("FINSAGE_WATCHLIST", ""), help="Comma-separated tickers or a file")
+    p.add_argument("--intervals", default=os.environ.get("FINSAGE_PREFETCH_INTERVALS", ""), help='e.g. "data=3600,news=300" (seconds)')
+    p.add_argument("--rates", default=os.environ.get("FINSAGE_PREFETCH_RATES", ""), help='e.g. "sec=8,google_news_rss=1" (requests/s)')
+    p.add_argument("--no-ingest", action="store_true", help="Skip fetching and embedding new filings")
+    p.add_argument("--once", action="store_true", help="Refresh every source once, print the stats and exit")
+    args = p.parse_args(argv)
+    tickers = parse_watchlist(args.watchlist)
+    if not tickers:
+        p.error("no tickers: pass --watchlist or set FINSAGE_WATCHLIST")
+    pre = Prefetcher(tickers, intervals=_parse_pairs(args.intervals, "interval"),
+                     rates=_parse_pairs(args.rates, "rate"), ingest=not args.no_ingest)
+    if args.once:
+        print(json.dumps(pre.run_once(), indent=2))
+        return
+    pre.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pre.stop(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
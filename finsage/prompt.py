@@ -0,0 +1,146 @@
+"""Token-budgeted prompt assembly for LLMAgent.
+
+Retrieved passages often overlap (adjacent chunks of one filing, the same
+paragraph quoted in a 10-K and a 10-Q), and every redundant token is paid
+for in prefill latency and cost. PromptBuilder:
+
+- counts tokens with `tiktoken` when installed, else ~4 characters/token;
+- takes passages best score first and drops any whose word shingles are
+  mostly covered by passages already taken;
+- packs them into the token budget left after the fixed parts, trimming
+  each to `passage_tokens` and the last one to what still fits;
+- keeps the system prompt as a separate, byte-identical prefix whose token
+  count is computed once, so provider-side prefix caching can reuse it.
+
+The budget defaults to FINSAGE_PROMPT_TOKENS (2000).
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+import math
+import os
+
+from .lexical import tokenize
+
+try:
+    import tiktoken
+except Exception:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+SYSTEM = (
+    "You are FinSage, an assistant that answers financial queries using provided factual excerpts. "
+    "Cite sources by url when appropriate and be concise."
+)
+INSTRUCTIONS = "Answer succinctly and include citations like [1]."
+TOKEN_BUCKETS = (64.0, 128.0, 256.0, 512.0, 1024.0, 2048.0, 4096.0, 8192.0, 16384.0)
+_CHARS_PER_TOKEN = 4
+_SHINGLE = 5
+
+
+class TokenCounter:
+    """tiktoken's encoding for `encoding` when available, else a ~4 chars/token estimate."""
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        self._enc = None
+        if tiktoken is not None:
+            try:
+                self._enc = tiktoken.get_encoding(encoding)
+            except Exception:
+                self._enc = None
+
+    @property
+    def exact(self) -> bool:
+        return self._enc is not None
+
+    def count(self, text: str) -> int:
+        if self._enc is not None:
+            return len(self._enc.encode(text))
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, tokens: int) -> str:
+        """Text cut to at most `tokens` tokens (at a word boundary when estimating)."""
+        if tokens <= 0:
+            return ""
+        if self._enc is not None:
+            ids = self._enc.encode(text)
+            return text if len(ids) <= tokens else self._enc.decode(ids[:tokens])
+        limit = tokens * _CHARS_PER_TOKEN
+        if len(text) <= limit:
+            return text
+        cut = text[:limit]
+        space = cut.rfind(" ")
+        return cut[:space] if space > limit // 2 else cut
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = tokenize(text)
+    if len(words) < _SHINGLE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + _SHINGLE]) for i in range(len(words) - _SHINGLE + 1)}
+
+
+class PromptBuilder:
+    def __init__(
+        self,
+        system: str = SYSTEM,
+        budget: Optional[int] = None,
+        passage_tokens: int = 128,
+        overlap: float = 0.6,
+        min_tokens: int = 24,
+        counter: Optional[TokenCounter] = None,
+    ):
+        self.system = system
+        self.budget = budget or int(os.environ.get("FINSAGE_PROMPT_TOKENS", "2000"))
+        self.passage_tokens = passage_tokens
+        self.overlap = overlap
+        self.min_tokens = min_tokens
+        self.counter = counter or TokenCounter()
+        # The static prefix: counted once per builder, not per request.
+        self.system_tokens = self.counter.count(system)
+        self._header = "Relevant excerpts:\n"
+        self._fixed_tokens = self.system_tokens + self.counter.count(self._header + INSTRUCTIONS)
+
+    def select(self, passages: List[Dict[str, Any]], budget: int) -> Tuple[List[Tuple[Dict[str, Any], str, int]], Dict[str, int]]:
+        """(passage, trimmed text, tokens) to include, best first, and counts of those dropped by reason."""
+        ranked = sorted(
+            (p for p in passages if p and p.get("text")),
+            key=lambda p: -(p.get("score") or 0.0),
+        )
+        seen: Set[Tuple[str, ...]] = set()
+        chosen = []
+        dropped = {"duplicate": 0, "budget": 0}
+        left = budget
+        for p in ranked:
+            sh = _shingles(p["text"])
+            if sh and len(sh & seen) >= self.overlap * len(sh):
+                dropped["duplicate"] += 1
+                continue
+            wrapper = self.counter.count(f"[{len(chosen) + 1}]  ... (source: {p.get('source')})\n\n")
+            room = min(self.passage_tokens, left - wrapper)
+            if room < self.min_tokens:
+                dropped["budget"] += 1
+                continue
+            text = self.counter.truncate(p["text"], room)
+            cost = wrapper + self.counter.count(text)
+            chosen.append((p, text, cost))
+            seen |= sh
+            left -= cost
+        return chosen, dropped
+
+    def build(self, user_query: str, passages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """{"system", "user", "tokens", "passages_used", "passages_dropped"} for one request."""
+        question = "User question: " + user_query + "\n\n"
+        budget = self.budget - self._fixed_tokens - self.counter.count(question)
+        chosen, dropped = self.select(passages or [], budget)
+        parts = []
+        if chosen:
+            parts.append(self._header)
+            parts.extend(f"[{i}] {text} ... (source: {p.get('source')})\n\n" for i, (p, text, _) in enumerate(chosen, 1))
+        parts.append(question)
+        parts.append(INSTRUCTIONS)
+        user = "".join(parts)
+        return {
+            "system": self.system,
+            "user": user,
+            "tokens": self.system_tokens + self.counter.count(user),
+            "passages_used": len(chosen),
+            "passages_dropped": dropped,
+        }
@@ -0,0 +1,140 @@
+"""Cached, micro-batched query embedding for retrieval.
+
+Planner runs embed the same templated queries ("Analyze TSLA") over and
+over, and batch jobs issue thousands of concurrent single-query encodes.
+QueryEncoder sits in front of the model:
+
+- an LRU of query -> embedding (vectors are returned read-only, since they
+  are shared between callers);
+- concurrent misses are queued and a single worker thread encodes them in
+  one forward pass: it takes whatever is queued, waits up to `window`
+  seconds for more (up to `max_batch`), and encodes the distinct texts
+  together. Callers asking for a query already in flight share its result.
+
+Under load the number of forward passes then grows with batch count, not
+request count. Each batch is encoded in the contextvars context of its
+first caller, so the embedding span lands in that request's timings and
+its deadline applies. FINSAGE_QUERY_CACHE sets the LRU size (default 4096) and
+FINSAGE_QUERY_BATCH_MS the window (default 1; 0 still batches whatever
+queued up while the previous pass ran, without waiting).
+"""
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import contextvars
+import os
+import queue
+import threading
+import time
+
+from . import telemetry
+
+BATCH_BUCKETS = (1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0, 128.0)
+
+
+class QueryEncoder:
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], Any],
+        cache_size: Optional[int] = None,
+        window: Optional[float] = None,
+        max_batch: int = 64,
+    ):
+        self._encode_batch = encode_batch
+        self.cache_size = int(os.environ.get("FINSAGE_QUERY_CACHE", "4096")) if cache_size is None else cache_size
+        self.window = float(os.environ.get("FINSAGE_QUERY_BATCH_MS", "1")) / 1e3 if window is None else window
+        self.max_batch = max_batch
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[str, Future, contextvars.Context]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def _cached(self, text: str) -> Any:
+        with self._lock:
+            vec = self._cache.get(text)
+            if vec is not None:
+                self._cache.move_to_end(text)
+        telemetry.record_cache("query_embedding", vec is not None)
+        return vec
+
+    def _remember(self, text: str, vec: Any) -> Any:
+        try:
+            vec.setflags(write=False)
+        except (AttributeError, ValueError):
+            pass
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[text] = vec
+                self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return vec
+
+    def encode(self, text: str) -> Any:
+        """Embedding of one query: from the LRU, or from the next micro-batch."""
+        vec = self._cached(text)
+        if vec is not None:
+            return vec
+        with self._lock:
+            fut = self._inflight.get(text)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[text] = Future()
+                self._queue.put((text, fut, contextvars.copy_context()))
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="finsage-query-encoder", daemon=True)
+                    self._worker.start()
+        return fut.result()
+
+    def encode_many(self, texts: Sequence[str]) -> List[Any]:
+        """Embeddings for a list of queries; cache misses are encoded together in one pass, on this thread."""
+        out: List[Any] = [self._cached(t) for t in texts]
+        missing = list(dict.fromkeys(t for t, v in zip(texts, out) if v is None))
+        if missing:
+            encoded = dict(zip(missing, self._encode(missing)))
+            out = [v if v is not None else encoded[t] for t, v in zip(texts, out)]
+        return out
+
+    def _encode(self, texts: List[str]) -> List[Any]:
+        telemetry.REGISTRY.observe(
+            "finsage_query_embedding_batch_size", {}, len(texts), help="Distinct queries per embedding forward pass.", buckets=BATCH_BUCKETS
+        )
+        return [self._remember(t, v) for t, v in zip(texts, self._encode_batch(texts))]
+
+    def _take_batch(self) -> List[Tuple[str, Future, contextvars.Context]]:
+        batch = [self._queue.get()]
+        until = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            left = until - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=left) if left > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            texts = [t for t, _, _ in batch]
+            try:
+                # Run in the first caller's context: its telemetry collector and deadline see the call.
+                results: List[Any] = batch[0][2].run(self._encode, texts)
+                error: Optional[BaseException] = None
+            except BaseException as e:  # surface model failures to every waiting caller
+                results, error = [], e
+            with self._lock:
+                for t, _, _ in batch:
+                    self._inflight.pop(t, None)
+            for i, (_, fut, _) in enumerate(batch):
+                if error is not None:
+                    fut.set_exception(error)
+                else:
+                    fut.set_result(results[i])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
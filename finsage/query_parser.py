@@ -0,0 +1,205 @@
+"""Query parsing: tickers validated against the ticker dictionary, company names and intent.
+
+Shared by Planner.run (tickers detected in a free-text query) and the
+backend chat endpoints (backend.services.parser).
+"""
+import re
+import string
+import threading
+from typing import Dict, List, Optional
+
+from .resolver import NameIndex, default_resolver
+from .tickers import TickerDirectory, default_directory
+
+# Candidate ticker tokens like: AAPL, TSLA, HDFC.NS, RELIANCE, $tsla. Punctuation other than
+# "$" and "." becomes whitespace so a plain split() tokenizes in one C-level pass.
+_TOKEN_SPLIT = str.maketrans({c: " " for c in string.punctuation if c not in "$."})
+
+# Possible company / fund names (capitalized sequences, acronyms allowed: "HDFC Bank")
+_NAME_RE = re.compile(r"\b[A-Z][A-Za-z&]+(?:\s[A-Z][A-Za-z&]+)*\b")
+
+# Minimum resolver scores: capitalized phrases may be partial names, bare lower-case words must match closely.
+NAME_MIN_SCORE = 0.7
+WORD_MIN_SCORE = 0.9
+
+# Exchange suffixes that make a token a ticker on their own (HDFC.NS, SHEL.L, RY.TO)
+_EXCHANGE_SUFFIXES = frozenset({"NS", "BO", "L", "TO", "V", "HK", "AX", "SI", "T", "DE", "PA", "AS", "SW", "MI", "SS", "SZ"})
+
+# Upper-case words that are never meant as tickers in a query
+_NOT_TICKERS = frozenset({"ETF", "IPO", "USD", "INR", "NSE", "BSE", "NYSE", "SEC", "CEO", "CFO", "EPS", "PE", "GDP", "AI", "BANK"})
+
+# Common query words: never tickers when typed in lower/mixed case, nor when no dictionary is loaded
+_COMMON_WORDS = frozenset("""
+a about after all also am an and any are as at be been before best big buy by can could did do does for from
+get give go good has have how i if in into is it its just like long low me more most my new next no not now of
+on or our out over price quote rate sell share shares short should show so some stock stocks tell than that the
+their them then there these they this to today top up us vs want was we what when where which who why will with
+would year you your
+""".split())
+
+# Real tickers that are also everyday words ("Is IT a good time", "sell ALL my shares"). Typed in
+# upper case they count only when "$"-prefixed or when the query names no other ticker.
+_WORD_TICKERS = _COMMON_WORDS | frozenset("""
+a big can fun he it low new on one open play real see so true
+""".split())
+
+# Intent keywords, in priority order: the highest keyword count wins and ties go to the earlier intent.
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "investment_decision": ["buy", "invest", "good stock", "worth", "should i", "recommendation"],
+    "information_lookup": ["price", "today", "quote", "value", "chart", "data", "performance"],
+    "risk_assessment": ["risk", "safe", "danger", "volatile", "exposure"],
+    "mutual_fund_analysis": ["fund", "nav", "mutual", "scheme"],
+    "news_summary": ["news", "update", "latest", "trend"],
+    "prediction_query": ["predict", "forecast", "future", "expected"],
+}
+DEFAULT_INTENT = "general_finance_query"
+
+_INTENT_ORDER = {intent: i for i, intent in enumerate(INTENT_KEYWORDS)}
+_KEYWORD_INTENT = {kw: intent for intent, kws in INTENT_KEYWORDS.items() for kw in kws}
+# One alternation over every keyword (longest first): a single left-to-right scan per query
+# that finds every hit, instead of one substring search per keyword.
+_KEYWORD_RE = re.compile("|".join(re.escape(k) for k in sorted(_KEYWORD_INTENT, key=len, reverse=True)))
+
+
+class QueryParser:
+    """
+    Compiled query parser. Ticker candidates are validated against a ticker
+    dictionary (set lookup) instead of accepting any upper-case word.
+    """
+
+    def __init__(self, directory: Optional[TickerDirectory] = None, resolver: Optional[NameIndex] = None):
+        self.directory = directory if directory is not None else TickerDirectory()
+        # Optional name -> ticker index, consulted when the query names a company but no ticker.
+        self.resolver = resolver
+
+    def _is_ticker(self, token: str, typed_upper: bool, dollar: bool) -> bool:
+        base, _, suffix = token.partition(".")
+        if suffix:
+            return token in self.directory.tickers or (suffix in _EXCHANGE_SUFFIXES and len(base) >= 2 and base.isalpha())
+        if not self.directory:
+            # No dictionary available: fall back to the upper-case heuristic
+            return (dollar or typed_upper) and 2 <= len(token) <= 6 and token.isalpha() and token not in _NOT_TICKERS and token.lower() not in _COMMON_WORDS
+        if token not in self.directory.tickers:
+            return False
+        if dollar:
+            return True
+        if typed_upper:
+            return len(token) >= 2 and token not in _NOT_TICKERS
+        return len(token) >= 2 and token.lower() not in _COMMON_WORDS
+
+    def extract_tickers(self, query: str) -> List[str]:
+        """
+        Validated tickers in query order; explicit ($ or upper-case) mentions come
+        before lower-case ones. Tickers that are also common words (IT, ALL, NOW)
+        count only with a "$" or when nothing else in the query is a ticker.
+        """
+        known = self.directory.tickers
+        tokens = query.translate(_TOKEN_SPLIT).split()
+        if known:
+            # Cheap reject first: ordinary words are neither known tickers nor "$"/"."-qualified.
+            tokens = [t for t in tokens if t.upper() in known or "." in t or "$" in t]
+        explicit: List[str] = []
+        implicit: List[str] = []
+        wordlike: List[str] = []
+        for raw in tokens:
+            raw = raw.rstrip(".")
+            dollar = raw.startswith("$")
+            if dollar:
+                raw = raw.lstrip("$")
+            token = raw.upper()
+            typed_upper = raw.isupper()
+            if self._is_ticker(token, typed_upper, dollar):
+                if not dollar and token.lower() in _WORD_TICKERS:
+                    wordlike.append(token)
+                else:
+                    (explicit if dollar or typed_upper else implicit).append(token)
+        return list(dict.fromkeys(explicit + implicit or wordlike))
+
+    def extract_names(self, query: str) -> List[str]:
+        """Capitalized phrases with leading/trailing common words dropped ("Should" is not a name)."""
+        names = []
+        for phrase in _NAME_RE.findall(query):
+            words = phrase.split()
+            while words and words[0].lower() in _COMMON_WORDS:
+                words.pop(0)
+            while words and words[-1].lower() in _COMMON_WORDS:
+                words.pop()
+            if words:
+                names.append(" ".join(words))
+        return names
+
+    def resolve_name(self, query: str, names: List[str]) -> Optional[str]:
+        """Ticker for the first name phrase (or distinctive lower-case word) the resolver recognises."""
+        if self.resolver is None:
+            return None
+        for name in names:
+            ticker = self.resolver.best(name, min_score=NAME_MIN_SCORE)
+            if ticker:
+                return ticker
+        for word in query.lower().translate(_TOKEN_SPLIT).split():
+            if len(word) >= 4 and word.isalpha() and word not in _COMMON_WORDS and word not in _KEYWORD_INTENT:
+                ticker = self.resolver.best(word, min_score=WORD_MIN_SCORE)
+                if ticker:
+                    return ticker
+        return None
+
+    def extract(self, query: str) -> Dict[str, Optional[str]]:
+        tickers = self.extract_tickers(query)
+        names = self.extract_names(query)
+        if not tickers:
+            resolved = self.resolve_name(query, names)
+            tickers = [resolved] if resolved else []
+        return {
+            "ticker": tickers[0] if tickers else None,
+            "tickers": tickers,
+            "name": names[0] if names else None,
+        }
+
+    def intent_scores(self, query: str) -> Dict[str, int]:
+        scores: Dict[str, int] = {}
+        for kw in _KEYWORD_RE.findall(query.lower()):
+            intent = _KEYWORD_INTENT[kw]
+            scores[intent] = scores.get(intent, 0) + 1
+        return scores
+
+    def intent(self, query: str) -> str:
+        scores = self.intent_scores(query)
+        if len(scores) <= 1:
+            return next(iter(scores), DEFAULT_INTENT)
+        return min(scores, key=lambda i: (-scores[i], _INTENT_ORDER[i]))
+
+    def parse(self, query: str) -> Dict[str, Optional[str]]:
+        entity_info = self.extract(query)
+        return {
+            "query": query,
+            "intent": self.intent(query),
+            "ticker": entity_info["ticker"],
+            "tickers": entity_info["tickers"],
+            "name": entity_info["name"],
+        }
+
+    def parse_many(self, queries: List[str]) -> List[Dict[str, Optional[str]]]:
+        """Parse a batch; repeated queries are parsed once."""
+        memo: Dict[str, Dict[str, Optional[str]]] = {}
+        out = []
+        for q in queries:
+            parsed = memo.get(q)
+            if parsed is None:
+                parsed = memo[q] = self.parse(q)
+            out.append(dict(parsed))
+        return out
+
+
+_parser: Optional[QueryParser] = None
+_parser_lock = threading.Lock()
+
+
+def get_parser() -> QueryParser:
+    """Process-wide parser over the shared ticker dictionary and name index (built on first use)."""
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = QueryParser(default_directory(), default_resolver())
+    return _parser
+
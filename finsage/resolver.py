@@ -0,0 +1,196 @@
+"""Fuzzy company-name -> ticker resolution.
+
+NameIndex maps what users type ("HDFC Bank", "reliance", "tesla") to ranked
+ticker candidates without scanning every name:
+
+- names are normalized (case, punctuation, corporate suffixes such as "Inc",
+  "Corp", "Ltd" dropped), so "Tesla, Inc." is indexed as "tesla";
+- a character-trigram inverted index (numpy posting arrays) gives each
+  candidate's trigram overlap with the query in one bincount, scored with
+  the Dice coefficient, which tolerates typos;
+- sorted arrays of normalized names and name words give prefix matches by
+  binary search, so partially typed names ("relia") rank well.
+
+Built from the SEC company map (TickerDirectory) plus an optional local list
+for other exchanges (FINSAGE_EXTRA_TICKERS_FILE: CSV with ticker,name[,exchange]
+columns, or the SEC JSON layout).
+"""
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import csv
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from .tickers import TickerDirectory, default_directory
+
+_NON_ALNUM = re.compile(r"[^a-z0-9& ]+")
+_CORPORATE_SUFFIXES = frozenset(
+    "inc incorporated corp corporation co company ltd limited plc llc lp holdings holding group sa ag nv se "
+    "the class common stock ordinary shares adr".split()
+)
+_PREFIX_END = "\uffff"
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase words without punctuation or corporate suffixes ("Tesla, Inc." -> "tesla")."""
+    words = _NON_ALNUM.sub(" ", name.lower().replace(".", "")).split()
+    kept = [w for w in words if w not in _CORPORATE_SUFFIXES]
+    return " ".join(kept or words)
+
+
+def _trigrams(norm: str) -> List[str]:
+    padded = f"  {norm} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+class NameIndex:
+    def __init__(self, entries: Iterable[Dict[str, Any]] = ()):
+        self.entries: List[Dict[str, Any]] = []
+        self._norms: List[str] = []
+        self._by_ticker: Dict[str, int] = {}
+        self._by_norm: Dict[str, List[int]] = {}
+        postings: Dict[str, List[int]] = {}
+        gram_counts: List[int] = []
+        name_keys: List[Tuple[str, int]] = []
+        word_keys: List[Tuple[str, int]] = []
+
+        for e in entries:
+            ticker = str(e.get("ticker") or "").upper()
+            name = str(e.get("name") or e.get("title") or "")
+            if not ticker or not name or ticker in self._by_ticker:
+                continue
+            i = len(self.entries)
+            norm = normalize_name(name)
+            self.entries.append({"ticker": ticker, "name": name, "exchange": e.get("exchange") or "US"})
+            self._norms.append(norm)
+            self._by_ticker[ticker] = i
+            self._by_norm.setdefault(norm, []).append(i)
+            grams = _trigrams(norm)
+            gram_counts.append(len(grams))
+            for g in grams:
+                postings.setdefault(g, []).append(i)
+            name_keys.append((norm, i))
+            word_keys.extend((w, i) for w in dict.fromkeys(norm.split()[1:]))
+
+        self._postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+        self._gram_counts = np.asarray(gram_counts, dtype=np.float32)
+        name_keys.sort()
+        word_keys.sort()
+        self._name_keys = [k for k, _ in name_keys]
+        self._name_ids = [i for _, i in name_keys]
+        self._word_keys = [k for k, _ in word_keys]
+        self._word_ids = [i for _, i in word_keys]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_directory(cls, directory: TickerDirectory, extra: Iterable[Dict[str, Any]] = ()) -> "NameIndex":
+        """Extra (local exchange) entries come first, so they win ties against SEC names."""
+        return cls(list(extra) + [{"ticker": e["ticker"], "name": e["title"]} for e in directory])
+
+    @staticmethod
+    def read_entries(path: str) -> List[Dict[str, Any]]:
+        """Entries from a CSV (ticker,name[,exchange] header) or a JSON file (SEC layout or a list)."""
+        if path.lower().endswith(".csv"):
+            with open(path, newline="", encoding="utf-8") as fh:
+                return [{k.strip().lower(): (v or "").strip() for k, v in row.items() if k} for row in csv.DictReader(fh)]
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        if isinstance(data, dict):
+            return [{"ticker": v.get("ticker"), "name": v.get("title")} for v in data.values()]
+        return list(data)
+
+    @classmethod
+    def from_file(cls, path: str) -> "NameIndex":
+        """Bulk build from a local file (see read_entries)."""
+        return cls(cls.read_entries(path))
+
+    def _prefix_ids(self, keys: List[str], ids: List[int], prefix: str, limit: int) -> List[int]:
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + _PREFIX_END, lo)
+        return ids[lo:min(hi, lo + limit)]
+
+    def resolve(self, query: str, limit: int = 5, min_score: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Ranked ticker candidates for a company name or ticker, best first, each
+        {"ticker", "name", "exchange", "score"} with score in [0, 1].
+        """
+        q = normalize_name(query)
+        if not q or not self.entries:
+            return []
+        scores: Dict[int, float] = {}
+
+        def _offer(i: int, s: float) -> None:
+            if s > scores.get(i, 0.0):
+                scores[i] = s
+
+        t = self._by_ticker.get(query.strip().upper())
+        if t is not None:
+            _offer(t, 1.0)
+        for i in self._by_norm.get(q, ()):
+            _offer(i, 1.0)
+
+        # Prefix matches on the whole name, then on later words ("bank" -> "hdfc bank").
+        for i in self._prefix_ids(self._name_keys, self._name_ids, q, 4 * limit):
+            _offer(i, 0.6 + 0.35 * len(q) / len(self._norms[i]))
+        if len(q) >= 3:
+            for i in self._prefix_ids(self._word_keys, self._word_ids, q, 4 * limit):
+                _offer(i, 0.45 + 0.3 * len(q) / len(self._norms[i]))
+
+        # Trigram Dice similarity over every name sharing at least one trigram.
+        grams = _trigrams(q)
+        lists = [self._postings[g] for g in grams if g in self._postings]
+        if lists:
+            shared = np.bincount(np.concatenate(lists), minlength=len(self.entries))
+            hit = np.flatnonzero(shared)
+            dice = 2.0 * shared[hit] / (len(grams) + self._gram_counts[hit])
+            keep = dice >= min_score
+            hit, dice = hit[keep], dice[keep]
+            if len(hit) > 4 * limit:
+                top = np.argpartition(-dice, 4 * limit - 1)[:4 * limit]
+                hit, dice = hit[top], dice[top]
+            for i, s in zip(hit.tolist(), dice.tolist()):
+                _offer(i, 0.95 * s)
+
+        # Ties go to the earlier entry (the SEC map is roughly ordered by market cap).
+        ranked = sorted((i for i in scores if scores[i] >= min_score), key=lambda i: (-scores[i], i))[:limit]
+        return [dict(self.entries[i], score=round(scores[i], 4)) for i in ranked]
+
+    def best(self, query: str, min_score: float = 0.6) -> Optional[str]:
+        """Single most likely ticker, or None if nothing scores at least min_score."""
+        exact = self._by_norm.get(normalize_name(query))
+        if exact:
+            return self.entries[exact[0]]["ticker"]
+        hits = self.resolve(query, limit=1, min_score=min_score)
+        return hits[0]["ticker"] if hits else None
+
+
+def build_resolver(directory: Optional[TickerDirectory] = None, extra_path: Optional[str] = None) -> NameIndex:
+    """Index the ticker directory plus an optional local list for other exchanges."""
+    directory = directory if directory is not None else default_directory()
+    extra_path = extra_path or os.environ.get("FINSAGE_EXTRA_TICKERS_FILE")
+    extra: List[Dict[str, Any]] = []
+    if extra_path:
+        try:
+            extra = NameIndex.read_entries(extra_path)
+        except Exception as e:
+            print(f"[resolver] failed to load {extra_path}: {e}")
+    return NameIndex.from_directory(directory, extra)
+
+
+_default_resolver: Optional[NameIndex] = None
+_default_lock = threading.Lock()
+
+
+def default_resolver() -> NameIndex:
+    """Process-wide index over default_directory(), built on first use."""
+    global _default_resolver
+    with _default_lock:
+        if _default_resolver is None:
+            _default_resolver = build_resolver()
+        return _default_resolver
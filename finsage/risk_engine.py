@@ -0,0 +1,191 @@
+"""Vectorized risk analytics over price histories.
+
+Every function takes a 1-D series (days,) or a 2-D matrix (tickers, days)
+and works along the last axis, so one call scores a single name or a whole
+universe. Rolling statistics use cumulative sums (O(n) regardless of window)
+and drawdowns use a running maximum; nothing loops over windows in Python.
+
+Inputs must be aligned and NaN-free along the time axis (forward-fill gaps
+before calling). Returns are simple daily returns; volatility-type outputs
+are annualized with `periods` (252 trading days by default), VaR and
+expected shortfall are one-day losses expressed as positive fractions.
+"""
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+# With fewer overlapping returns than this, beta is reported as None rather than as a noisy estimate.
+MIN_BETA_OBSERVATIONS = 20
+
+
+def returns_from_prices(prices: Any) -> np.ndarray:
+    p = np.asarray(prices, dtype=np.float64)
+    return p[..., 1:] / p[..., :-1] - 1.0
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Sum over each trailing window along the last axis: shape (..., n - window + 1)."""
+    c = np.cumsum(x, axis=-1)
+    pad = np.zeros(c.shape[:-1] + (1,), dtype=c.dtype)
+    c = np.concatenate([pad, c], axis=-1)
+    return c[..., window:] - c[..., :-window]
+
+
+def realized_volatility(returns: Any, periods: int = TRADING_DAYS) -> Any:
+    r = np.asarray(returns, dtype=np.float64)
+    return np.std(r, axis=-1, ddof=1) * np.sqrt(periods)
+
+
+def rolling_volatility(returns: Any, window: int = 20, periods: int = TRADING_DAYS) -> np.ndarray:
+    """Annualized sample volatility of each trailing window."""
+    r = np.asarray(returns, dtype=np.float64)
+    # Demean first so the sum-of-squares identity doesn't lose precision on small daily returns.
+    r = r - r.mean(axis=-1, keepdims=True)
+    s1 = _rolling_sum(r, window)
+    s2 = _rolling_sum(r * r, window)
+    var = (s2 - s1 * s1 / window) / (window - 1)
+    return np.sqrt(np.maximum(var, 0.0) * periods)
+
+
+def downside_deviation(returns: Any, mar: float = 0.0, periods: int = TRADING_DAYS) -> Any:
+    """Annualized root-mean-square of returns below the minimum acceptable return."""
+    r = np.asarray(returns, dtype=np.float64)
+    shortfall = np.minimum(r - mar, 0.0)
+    return np.sqrt(np.mean(shortfall * shortfall, axis=-1) * periods)
+
+
+def drawdowns(prices: Any) -> np.ndarray:
+    """Fractional distance below the running peak at every point (0 at new highs, negative below)."""
+    p = np.asarray(prices, dtype=np.float64)
+    return p / np.maximum.accumulate(p, axis=-1) - 1.0
+
+
+def max_drawdown(prices: Any) -> Any:
+    return drawdowns(prices).min(axis=-1)
+
+
+def beta(returns: Any, benchmark: Any) -> Any:
+    """Full-sample beta of each series against a benchmark return series (days,)."""
+    r = np.asarray(returns, dtype=np.float64)
+    b = np.asarray(benchmark, dtype=np.float64)
+    bc = b - b.mean()
+    var = np.dot(bc, bc)
+    if var == 0:
+        return np.full(r.shape[:-1], np.nan) if r.ndim > 1 else float("nan")
+    return ((r - r.mean(axis=-1, keepdims=True)) @ bc) / var
+
+
+def rolling_beta(returns: Any, benchmark: Any, window: int = 60) -> np.ndarray:
+    """Beta over each trailing window: cov(r, b) / var(b) from rolling sums of r, b, r*b and b*b."""
+    r = np.asarray(returns, dtype=np.float64)
+    b = np.asarray(benchmark, dtype=np.float64)
+    r = r - r.mean(axis=-1, keepdims=True)
+    b = b - b.mean()
+    sb = _rolling_sum(b, window)
+    sbb = _rolling_sum(b * b, window)
+    sr = _rolling_sum(r, window)
+    srb = _rolling_sum(r * b, window)
+    cov = srb - sr * sb / window
+    var = sbb - sb * sb / window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(var > 0, cov / np.where(var > 0, var, 1.0), np.nan)
+
+
+def historical_var(returns: Any, level: float = 0.95) -> Any:
+    """Empirical one-day VaR: the loss exceeded on (1 - level) of days."""
+    r = np.asarray(returns, dtype=np.float64)
+    return -np.quantile(r, 1.0 - level, axis=-1)
+
+
+def expected_shortfall(returns: Any, level: float = 0.95) -> Any:
+    """Mean loss on the days at or beyond the historical VaR (CVaR)."""
+    r = np.asarray(returns, dtype=np.float64)
+    cutoff = np.quantile(r, 1.0 - level, axis=-1)
+    tail = r <= cutoff[..., None] if r.ndim > 1 else r <= cutoff
+    return -np.sum(np.where(tail, r, 0.0), axis=-1) / np.maximum(tail.sum(axis=-1), 1)
+
+
+def parametric_var(returns: Any, level: float = 0.95) -> Any:
+    """Gaussian one-day VaR: -(mean + z * std)."""
+    r = np.asarray(returns, dtype=np.float64)
+    z = NormalDist().inv_cdf(1.0 - level)
+    return -(r.mean(axis=-1) + z * r.std(axis=-1, ddof=1))
+
+
+def align_on_dates(
+    dates: Sequence[Any], prices: Any, benchmark_dates: Sequence[Any], benchmark_prices: Any
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Both price series restricted to the dates they share, in date order
+    (ISO date strings sort chronologically). Histories fetched separately can
+    differ by a halted session, a late listing or a stale cache entry, and
+    positional alignment would then pair returns from different days.
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    b = np.asarray(benchmark_prices, dtype=np.float64)
+    _, ia, ib = np.intersect1d(np.asarray(dates), np.asarray(benchmark_dates), return_indices=True)
+    return p[..., ia], b[ib]
+
+
+def risk_profile(
+    prices: Any,
+    benchmark_prices: Optional[Any] = None,
+    window: int = 20,
+    level: float = 0.95,
+    periods: int = TRADING_DAYS,
+    min_overlap: int = MIN_BETA_OBSERVATIONS,
+) -> Dict[str, Any]:
+    """
+    All metrics for one series or a (tickers, days) matrix. For a matrix each
+    value is an array with one entry per row; for a series, plain floats.
+    The rolling metrics report their latest window. `benchmark_prices` must
+    be on the same dates as `prices` (see align_on_dates); beta is None when
+    they share fewer than `min_overlap` returns.
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    r = returns_from_prices(p)
+    out: Dict[str, Any] = {
+        "observations": int(r.shape[-1]),
+        "volatility": realized_volatility(r, periods),
+        "downside_deviation": downside_deviation(r, periods=periods),
+        "max_drawdown": max_drawdown(p),
+        "var_historical": historical_var(r, level),
+        "var_parametric": parametric_var(r, level),
+        "expected_shortfall": expected_shortfall(r, level),
+        "var_level": level,
+    }
+    if r.shape[-1] >= window:
+        out["volatility_recent"] = rolling_volatility(r, window, periods)[..., -1]
+    if benchmark_prices is not None:
+        b = returns_from_prices(benchmark_prices)
+        n = min(r.shape[-1], b.shape[-1])
+        rr, bb = r[..., -n:], b[-n:]
+        out["beta_observations"] = int(n)
+        if n < min_overlap:
+            out["beta"] = None
+        else:
+            out["beta"] = beta(rr, bb)
+            if n >= window:
+                out["beta_recent"] = rolling_beta(rr, bb, window)[..., -1]
+    if p.ndim == 1:
+        out = {k: (float(v) if isinstance(v, np.generic) or (isinstance(v, np.ndarray) and v.ndim == 0) else v) for k, v in out.items()}
+    return out
+
+
+def portfolio_risk(
+    prices: Any,
+    weights: Any,
+    benchmark_prices: Optional[Any] = None,
+    window: int = 20,
+    level: float = 0.95,
+) -> Dict[str, Any]:
+    """Risk of a fixed-weight portfolio over a (tickers, days) price matrix, rebalanced daily."""
+    p = np.asarray(prices, dtype=np.float64)
+    w = np.asarray(weights, dtype=np.float64)
+    w = w / w.sum()
+    port = w @ returns_from_prices(p)
+    nav = np.concatenate([[1.0], np.cumprod(1.0 + port)])
+    return risk_profile(nav, benchmark_prices, window=window, level=level)
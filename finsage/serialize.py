@@ -0,0 +1,79 @@
+"""Response encoders: stdlib JSON, orjson and msgpack.
+
+orjson and msgpack are optional: without orjson its format falls back to
+stdlib JSON, without msgpack asking for it is a ValueError. Non-native
+values (numpy scalars and arrays, datetimes, sets) are converted the same
+way by every encoder; the one difference is that orjson writes NaN/inf as
+null where stdlib JSON writes the non-standard NaN/Infinity tokens.
+"""
+from typing import Any, Dict, Optional, Tuple
+import datetime
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except Exception:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MEDIA_TYPES: Dict[str, str] = {
+    "json": "application/json",
+    "orjson": "application/json",
+    "msgpack": "application/x-msgpack",
+}
+# Accept-header media type -> format, for content negotiation
+ACCEPT_FORMATS: Dict[str, str] = {"application/x-msgpack": "msgpack", "application/msgpack": "msgpack"}
+
+
+def to_native(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def available_formats() -> Tuple[str, ...]:
+    return tuple(f for f in MEDIA_TYPES if f == "json" or (f == "orjson" and orjson) or (f == "msgpack" and msgpack))
+
+
+def resolve_format(fmt: Optional[str] = None, accept: Optional[str] = None) -> str:
+    """Explicit format if given, else one negotiated from an Accept header; orjson over json when installed."""
+    if not fmt and accept:
+        offered = (m.split(";")[0].strip() for m in accept.split(","))
+        # Only negotiate encoders that are installed; an explicit format is an error instead.
+        fmt = next((ACCEPT_FORMATS[m] for m in offered if m in ACCEPT_FORMATS and ACCEPT_FORMATS[m] in available_formats()), None)
+    fmt = (fmt or "orjson").lower()
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unknown format {fmt!r}. Choose from: {', '.join(MEDIA_TYPES)}")
+    if fmt == "msgpack" and msgpack is None:
+        raise ValueError("msgpack is not installed")
+    if fmt == "orjson" and orjson is None:
+        return "json"
+    return fmt
+
+
+def encode(obj: Any, fmt: str = "json") -> bytes:
+    """Serialize a response with the named encoder (see resolve_format)."""
+    if fmt == "orjson" and orjson is not None:
+        return orjson.dumps(obj, default=to_native, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise ValueError("msgpack is not installed")
+        return msgpack.packb(obj, default=to_native, use_bin_type=True)
+    return json.dumps(obj, default=to_native, separators=(",", ":")).encode()
+
+
+def encode_line(obj: Any, fmt: str = "orjson") -> bytes:
+    """One JSONL record (JSON encoders only)."""
+    return encode(obj, "orjson" if fmt == "orjson" else "json") + b"\n"
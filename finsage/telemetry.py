@@ -0,0 +1,222 @@
+"""Lightweight in-process metrics and tracing spans for FinSage.
+
+No external dependencies. Agents and outbound calls record into a global
+registry of counters and latency histograms, which `render_prometheus()`
+exposes in the Prometheus text format (served at `/metrics` by the backend).
+
+    with span("upstream", "sec"):          # finsage_upstream_duration_seconds{upstream="sec"}
+        resp = requests.get(...)
+
+    class DataAgent:
+        @traced                             # finsage_agent_duration_seconds{agent="DataAgent"}
+        def run(self, ticker, context=None): ...
+
+`collect()` additionally captures every span finished inside it, which the
+Planner uses to report a per-request `timings` block.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import functools
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans range from sub-millisecond agents to multi-second LLM calls.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, b in enumerate(self.buckets):
+            if value <= b:
+                self.counts[i] += 1
+                break
+
+
+class Registry:
+    """Thread-safe store of counters and histograms keyed by (metric, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def inc(self, metric: str, labels: Dict[str, str], value: float = 1.0, help: str = "") -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(metric, {})
+            series[key] = series.get(key, 0.0) + value
+            if help:
+                self._help.setdefault(metric, help)
+
+    def observe(self, metric: str, labels: Dict[str, str], value: float, help: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Record a histogram sample; `buckets` applies when the series is first created (default: latency seconds)."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(metric, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(buckets)
+            hist.observe(value)
+            if help:
+                self._help.setdefault(metric, help)
+
+    def counter_value(self, metric: str, labels: Dict[str, str]) -> float:
+        with self._lock:
+            return self._counters.get(metric, {}).get(tuple(sorted(labels.items())), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for metric in sorted(self._counters):
+                _header(lines, metric, "counter", self._help.get(metric))
+                for key, value in sorted(self._counters[metric].items()):
+                    lines.append(f"{metric}{_fmt_labels(key)} {_fmt_value(value)}")
+            for metric in sorted(self._histograms):
+                _header(lines, metric, "histogram", self._help.get(metric))
+                for key, hist in sorted(self._histograms[metric].items()):
+                    cumulative = 0
+                    for bound, c in zip(hist.buckets, hist.counts):
+                        cumulative += c
+                        lines.append(f"{metric}_bucket{_fmt_labels(key + (('le', _fmt_value(bound)),))} {cumulative}")
+                    lines.append(f"{metric}_bucket{_fmt_labels(key + (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{metric}_sum{_fmt_labels(key)} {_fmt_value(hist.sum)}")
+                    lines.append(f"{metric}_count{_fmt_labels(key)} {hist.count}")
+            ratios = _cache_hit_ratios(self._counters.get(CACHE_METRIC, {}))
+        if ratios:
+            _header(lines, "finsage_cache_hit_ratio", "gauge", "Fraction of cache lookups served from cache.")
+            for cache, ratio in sorted(ratios.items()):
+                lines.append(f'finsage_cache_hit_ratio{{cache="{_escape(cache)}"}} {_fmt_value(ratio)}')
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines: List[str], metric: str, kind: str, help: Optional[str]) -> None:
+    if help:
+        lines.append(f"# HELP {metric} {help}")
+    lines.append(f"# TYPE {metric} {kind}")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+def _cache_hit_ratios(series: Dict[LabelKey, float]) -> Dict[str, float]:
+    totals: Dict[str, List[float]] = {}
+    for key, value in series.items():
+        labels = dict(key)
+        hits_total = totals.setdefault(labels.get("cache", ""), [0.0, 0.0])
+        if labels.get("result") == "hit":
+            hits_total[0] += value
+        hits_total[1] += value
+    return {cache: h / t for cache, (h, t) in totals.items() if t}
+
+
+REGISTRY = Registry()
+CACHE_METRIC = "finsage_cache_requests_total"
+
+# Spans finished while a collect() block is active, as (kind, name, seconds, ok).
+_collector: ContextVar[Optional[List[Tuple[str, str, float, bool]]]] = ContextVar("finsage_span_collector", default=None)
+
+
+class Span:
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.ok = True
+        self.elapsed = 0.0
+
+    def fail(self) -> None:
+        """Count this span as an error without raising (for agents that return error dicts)."""
+        self.ok = False
+
+
+@contextmanager
+def span(kind: str, name: str) -> Iterator[Span]:
+    """Time a block into `finsage_<kind>_duration_seconds{<kind>=name}`; count failures."""
+    s = Span(kind, name)
+    start = time.perf_counter()
+    try:
+        yield s
+    except BaseException:
+        s.ok = False
+        raise
+    finally:
+        s.elapsed = time.perf_counter() - start
+        labels = {kind: name}
+        REGISTRY.observe(f"finsage_{kind}_duration_seconds", labels, s.elapsed, help=f"Latency of {kind} calls in seconds.")
+        if not s.ok:
+            REGISTRY.inc(f"finsage_{kind}_errors_total", labels, help=f"Failed {kind} calls.")
+        spans = _collector.get()
+        if spans is not None:
+            spans.append((kind, name, s.elapsed, s.ok))
+
+
+def traced(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap an agent method in an "agent" span named after the agent (and method, if not `run`)."""
+
+    @functools.wraps(fn)
+    def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        label = self.name if fn.__name__ == "run" else f"{self.name}.{fn.__name__}"
+        with span("agent", label) as s:
+            out = fn(self, *args, **kwargs)
+            if isinstance(out, dict) and out.get("error"):
+                s.fail()
+            return out
+
+    return wrapper
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    REGISTRY.inc(CACHE_METRIC, {"cache": cache, "result": "hit" if hit else "miss"}, help="Cache lookups by result.")
+
+
+@contextmanager
+def collect() -> Iterator[List[Tuple[str, str, float, bool]]]:
+    """Capture spans finished in this context (and contexts copied from it)."""
+    spans: List[Tuple[str, str, float, bool]] = []
+    token = _collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _collector.reset(token)
+
+
+def summarize(spans: List[Tuple[str, str, float, bool]]) -> Dict[str, Dict[str, float]]:
+    """Sum span durations (ms) per kind and name, e.g. {"agent": {"DataAgent": 12.3}, "upstream": {...}}."""
+    out: Dict[str, Dict[str, float]] = {}
+    for kind, name, seconds, _ in spans:
+        bucket = out.setdefault(kind, {})
+        bucket[name] = round(bucket.get(name, 0.0) + seconds * 1e3, 3)
+    return out
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,94 @@
+"""Ticker dictionary shared by query parsing and name resolution.
+
+Built once per process from SEC's company_tickers.json (through the shared
+result cache, so it is the same map DocumentAgent uses) or from a local copy
+named by FINSAGE_TICKER_FILE. If neither is reachable the directory is empty
+and callers fall back to pattern heuristics.
+"""
+from typing import Any, Dict, Iterable, Iterator, Optional
+import json
+import os
+import threading
+
+import requests
+
+from .cache import default_cache
+from .telemetry import span
+
+SEC_TICKER_MAP_URL = "https://www.sec.gov/files/company_tickers.json"
+DEFAULT_USER_AGENT = "finsage-agent (email@example.com)"
+
+
+class TickerDirectory:
+    """Set of known tickers with their CIK and company title."""
+
+    def __init__(self, entries: Iterable[Dict[str, Any]] = ()):
+        self.by_ticker: Dict[str, Dict[str, Any]] = {}
+        for e in entries:
+            t = str(e.get("ticker") or "").upper()
+            if t and t not in self.by_ticker:
+                self.by_ticker[t] = {"ticker": t, "cik": e.get("cik"), "title": e.get("title") or ""}
+        self.tickers = frozenset(self.by_ticker)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.upper() in self.tickers
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.by_ticker.values())
+
+    def get(self, ticker: str) -> Optional[Dict[str, Any]]:
+        return self.by_ticker.get(ticker.upper())
+
+    @classmethod
+    def from_sec_map(cls, mapping: Dict[str, Any]) -> "TickerDirectory":
+        """Build from the company_tickers.json payload ({"0": {"cik_str", "ticker", "title"}, ...})."""
+        return cls({"ticker": v.get("ticker"), "cik": v.get("cik_str"), "title": v.get("title")} for v in mapping.values())
+
+    @classmethod
+    def from_file(cls, path: str) -> "TickerDirectory":
+        """Load a local company_tickers.json, or a JSON list of {"ticker", "cik", "title"} entries."""
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        if isinstance(data, dict):
+            return cls.from_sec_map(data)
+        return cls(data)
+
+
+def fetch_sec_ticker_map(user_agent: Optional[str] = None) -> Dict[str, Any]:
+    with span("upstream", "sec.ticker_map"):
+        resp = requests.get(SEC_TICKER_MAP_URL, headers={"User-Agent": user_agent or DEFAULT_USER_AGENT}, timeout=10)
+        resp.raise_for_status()
+    return resp.json()
+
+
+def load_directory(path: Optional[str] = None, cache: Any = None, user_agent: Optional[str] = None) -> TickerDirectory:
+    """Directory from `path`, else the (cached) SEC map; empty if both fail."""
+    path = path or os.environ.get("FINSAGE_TICKER_FILE")
+    if path:
+        try:
+            return TickerDirectory.from_file(path)
+        except Exception as e:
+            print(f"[tickers] failed to load {path}: {e}")
+    cache = cache or default_cache()
+    try:
+        mapping = cache.get_or_compute("sec_ticker_map", "all", lambda: fetch_sec_ticker_map(user_agent))
+        return TickerDirectory.from_sec_map(mapping)
+    except Exception as e:
+        print(f"[tickers] SEC ticker map unavailable: {e}")
+        return TickerDirectory()
+
+
+_default_directory: Optional[TickerDirectory] = None
+_default_lock = threading.Lock()
+
+
+def default_directory() -> TickerDirectory:
+    """Process-wide directory, loaded on first use."""
+    global _default_directory
+    with _default_lock:
+        if _default_directory is None:
+            _default_directory = load_directory()
+        return _default_directory
@@ -0,0 +1,263 @@
+"""Columnar universe snapshot for sector-relative peer ranking.
+
+A snapshot holds fundamentals for a whole universe of tickers as numpy
+columns. At build time every (sector or industry, metric) group gets a sorted
+value array plus its mean/std, and every group gets its members ordered by
+log market cap. At request time:
+
+- percentile rank = two searchsorted calls on the group's sorted array,
+- z-score = precomputed group mean/std,
+- nearest peers by size = one searchsorted into the group's market-cap
+  order, then k steps outwards,
+
+all O(log n) (plus k) with no network fetches. Snapshots are built offline
+(`python -m finsage.universe --tickers-file universe.txt --out universe.npz`)
+and loaded with FINSAGE_UNIVERSE_FILE.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+METRICS = ("marketCap", "trailingPE", "forwardPE", "epsTrailingTwelveMonths", "regularMarketPrice")
+LEVELS = ("sector", "industry")
+
+
+def _num(v: Any) -> float:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return np.nan
+    return f if np.isfinite(f) else np.nan
+
+
+class UniverseSnapshot:
+    def __init__(
+        self,
+        tickers: Iterable[str],
+        sectors: Iterable[str],
+        industries: Iterable[str],
+        metrics: Dict[str, Any],
+        as_of: Optional[float] = None,
+    ):
+        self.tickers = np.asarray([t.upper() for t in tickers], dtype=str)
+        self.labels = {"sector": np.asarray(list(sectors), dtype=str), "industry": np.asarray(list(industries), dtype=str)}
+        self.metrics = {m: np.asarray(v, dtype=np.float64) for m, v in metrics.items()}
+        self.as_of = as_of if as_of is not None else time.time()
+        self._row = {t: i for i, t in enumerate(self.tickers.tolist())}
+
+        # (level, group) -> member row indices
+        self._members: Dict[Tuple[str, str], np.ndarray] = {}
+        # (level, group, metric) -> sorted finite values, mean, std
+        self._sorted: Dict[Tuple[str, str, str], np.ndarray] = {}
+        self._stats: Dict[Tuple[str, str, str], Tuple[float, float]] = {}
+        # (level, group) -> (sorted log market caps, rows in that order)
+        self._by_size: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+
+        caps = self.metrics.get("marketCap")
+        for level, labels in self.labels.items():
+            groups, inverse = np.unique(labels, return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(groups) + 1))
+            for g, name in enumerate(groups.tolist()):
+                rows = order[bounds[g]:bounds[g + 1]]
+                self._members[(level, name)] = rows
+                for m, col in self.metrics.items():
+                    vals = col[rows]
+                    vals = np.sort(vals[np.isfinite(vals)])
+                    self._sorted[(level, name, m)] = vals
+                    if len(vals):
+                        self._stats[(level, name, m)] = (float(vals.mean()), float(vals.std()))
+                if caps is not None:
+                    c = caps[rows]
+                    ok = np.isfinite(c) & (c > 0)
+                    log_caps = np.log(c[ok])
+                    by = np.argsort(log_caps, kind="stable")
+                    self._by_size[(level, name)] = (log_caps[by], rows[ok][by])
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.upper() in self._row
+
+    # ------------------------------------------------------------------
+    # Build / persist
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], as_of: Optional[float] = None) -> "UniverseSnapshot":
+        """Build from {"ticker", "sector", "industry", <metric>...} dicts (DataAgent fundamentals plus a ticker)."""
+        records = [r for r in records if r.get("ticker")]
+        return cls(
+            [r["ticker"] for r in records],
+            [r.get("sector") or "Unknown" for r in records],
+            [r.get("industry") or "Unknown" for r in records],
+            {m: [_num(r.get(m)) for r in records] for m in METRICS},
+            as_of=as_of,
+        )
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            tickers=self.tickers,
+            sector=self.labels["sector"],
+            industry=self.labels["industry"],
+            as_of=np.asarray(self.as_of),
+            **{f"metric_{m}": v for m, v in self.metrics.items()},
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "UniverseSnapshot":
+        with np.load(path, allow_pickle=False) as z:
+            metrics = {k[len("metric_"):]: z[k] for k in z.files if k.startswith("metric_")}
+            return cls(z["tickers"], z["sector"], z["industry"], metrics, as_of=float(z["as_of"]))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def row(self, ticker: str) -> Optional[Dict[str, Any]]:
+        i = self._row.get(ticker.upper())
+        if i is None:
+            return None
+        out: Dict[str, Any] = {"ticker": str(self.tickers[i]), "sector": str(self.labels["sector"][i]), "industry": str(self.labels["industry"][i])}
+        for m, col in self.metrics.items():
+            v = col[i]
+            out[m] = float(v) if np.isfinite(v) else None
+        return out
+
+    def _resolve(self, ticker: str, fundamentals: Optional[Dict[str, Any]], level: str) -> Tuple[Optional[str], Dict[str, float]]:
+        """Group label and metric values for a ticker: live fundamentals override the snapshot row."""
+        snap = self.row(ticker) or {}
+        fundamentals = fundamentals or {}
+        group = fundamentals.get(level) or snap.get(level)
+        # DataAgent reports missing fields as explicit None; those fall back to the snapshot too.
+        values = {m: _num(fundamentals.get(m) if fundamentals.get(m) is not None else snap.get(m)) for m in self.metrics}
+        return group, values
+
+    def rank(
+        self,
+        ticker: str,
+        metrics: Optional[Iterable[str]] = None,
+        level: str = "sector",
+        fundamentals: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Percentile (0-100) and z-score of each metric within the ticker's sector or industry."""
+        group, values = self._resolve(ticker, fundamentals, level)
+        if group is None or (level, group) not in self._members:
+            return {"ticker": ticker, "error": f"{level} unknown for {ticker}"}
+        out: Dict[str, Any] = {}
+        for m in metrics or self.metrics:
+            x = values.get(m, np.nan)
+            vals = self._sorted.get((level, group, m))
+            if vals is None or not len(vals) or not np.isfinite(x):
+                out[m] = {"value": None if not np.isfinite(x) else x, "percentile": None, "zscore": None}
+                continue
+            lo = np.searchsorted(vals, x, side="left")
+            hi = np.searchsorted(vals, x, side="right")
+            mean, std = self._stats[(level, group, m)]
+            out[m] = {
+                "value": x,
+                "percentile": round(100.0 * (lo + hi) / 2.0 / len(vals), 2),
+                "zscore": round((x - mean) / std, 4) if std > 0 else 0.0,
+            }
+        return {
+            "ticker": ticker,
+            "level": level,
+            "group": group,
+            "group_size": int(len(self._members[(level, group)])),
+            "metrics": out,
+        }
+
+    def nearest_peers(
+        self,
+        ticker: str,
+        k: int = 5,
+        level: str = "industry",
+        fundamentals: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        The k same-group tickers closest in log market cap. Falls back from
+        industry to sector when the industry has too few other members.
+        """
+        group, values = self._resolve(ticker, fundamentals, level)
+        size = self._by_size.get((level, group)) if group is not None else None
+        if (size is None or len(size[0]) <= k) and level == "industry":
+            return self.nearest_peers(ticker, k, level="sector", fundamentals=fundamentals)
+        cap = values.get("marketCap", np.nan)
+        if size is None or not np.isfinite(cap) or cap <= 0:
+            return []
+        log_caps, rows = size
+        x = np.log(cap)
+        self_row = self._row.get(ticker.upper())
+        lo = hi = int(np.searchsorted(log_caps, x))
+        picked: List[int] = []
+        while len(picked) < k and (lo > 0 or hi < len(rows)):
+            left = x - log_caps[lo - 1] if lo > 0 else np.inf
+            right = log_caps[hi] - x if hi < len(rows) else np.inf
+            if left <= right:
+                lo -= 1
+                r = int(rows[lo])
+            else:
+                r = int(rows[hi])
+                hi += 1
+            if r != self_row:
+                picked.append(r)
+        return [self.row(str(self.tickers[r])) for r in picked]
+
+
+def build_snapshot(tickers: List[str], data_agent: Any = None, chunk_size: int = 200) -> UniverseSnapshot:
+    """Fetch fundamentals for a universe with bulk DataAgent calls and build a snapshot."""
+    if data_agent is None:
+        from .agents import DataAgent
+
+        data_agent = DataAgent()
+    records: List[Dict[str, Any]] = []
+    for start in range(0, len(tickers), chunk_size):
+        chunk = tickers[start:start + chunk_size]
+        for t, out in data_agent.run_many(chunk).items():
+            if out.get("fundamentals") and not out.get("error"):
+                records.append(dict(out["fundamentals"], ticker=t))
+        print(f"[universe] fetched {min(start + chunk_size, len(tickers))}/{len(tickers)}")
+    return UniverseSnapshot.from_records(records)
+
+
+_default_universe: Optional[UniverseSnapshot] = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def default_universe() -> Optional[UniverseSnapshot]:
+    """Snapshot from FINSAGE_UNIVERSE_FILE, loaded once; None when unset or unreadable."""
+    global _default_universe, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            _default_loaded = True
+            path = os.environ.get("FINSAGE_UNIVERSE_FILE")
+            if path:
+                try:
+                    _default_universe = UniverseSnapshot.load(path)
+                except Exception as e:
+                    print(f"[universe] failed to load {path}: {e}")
+        return _default_universe
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Build a universe snapshot of fundamentals for peer ranking.")
+    p.add_argument("--tickers-file", required=True, help="One ticker per line")
+    p.add_argument("--out", required=True, help="Output .npz path")
+    p.add_argument("--chunk-size", type=int, default=200)
+    args = p.parse_args(argv)
+    with open(args.tickers_file) as fh:
+        tickers = [line.strip().upper() for line in fh if line.strip() and not line.startswith("#")]
+    snap = build_snapshot(tickers, chunk_size=args.chunk_size)
+    snap.save(args.out)
+    print(f"[universe] wrote {len(snap)} tickers to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Vectorized DCF sensitivity grids.
+
+The per-share value of an earnings stream growing at g for `horizon` years,
+then at `terminal_growth` forever, discounted at r:
+
+    sum_{t=1..H} eps * q^t  +  q^H * eps * (1 + g_T) / (r - g_T),  q = (1 + g) / (1 + r)
+
+With no horizon it is CalculationAgent's growing perpetuity
+eps * (1 + g) / (r - g). eps, growth, discount and horizon are broadcast
+against each other, so one call values a whole watchlist over the full
+growth x discount (x horizon) grid. Cells whose discount rate does not
+exceed the perpetual growth rate have no finite value and are NaN.
+
+Break-even contours trace value == price across the grid: the growth rate
+that justifies the current price at each discount rate, and the discount
+rate at which each growth assumption is fairly priced. They are solved by
+vectorized bisection on the closed form, so they do not depend on the grid
+resolution; points with no solution inside the grid's range are NaN.
+"""
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+GROWTH = tuple(round(0.01 * i, 2) for i in range(0, 9))  # 0% .. 8%
+DISCOUNT = tuple(round(0.01 * i, 2) for i in range(7, 14))  # 7% .. 13%
+TERMINAL_GROWTH = 0.02
+_BISECT_STEPS = 60
+
+
+def dcf_value(eps: Any, growth: Any, discount: Any, horizon: Any = None, terminal_growth: float = TERMINAL_GROWTH) -> np.ndarray:
+    """DCF per share, broadcasting all arguments (horizon None: perpetuity at `growth`)."""
+    e = np.asarray(eps, dtype=np.float64)
+    g = np.asarray(growth, dtype=np.float64)
+    r = np.asarray(discount, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        if horizon is None:
+            return np.where(r > g, e * (1 + g) / (r - g), np.nan)
+        h = np.asarray(horizon, dtype=np.float64)
+        q = (1 + g) / (1 + r)
+        qh = q ** h
+        near_one = np.abs(1 - q) < 1e-12
+        annuity = np.where(near_one, h, q * (1 - qh) / np.where(near_one, 1.0, 1 - q))
+        terminal = np.where(r > terminal_growth, qh * (1 + terminal_growth) / (r - terminal_growth), np.nan)
+        return e * (annuity + terminal)
+
+
+def _bisect(value_at: Any, lo: float, hi: float, price: np.ndarray, increasing: bool) -> np.ndarray:
+    """
+    Root of value_at(x) == price on [lo, hi] for a monotone value (NaN counts
+    as +inf); NaN if not bracketed. A bracket that only closes on the r == g
+    singularity (loss-making EPS runs to -inf there, not +inf) is not a root:
+    the value must be finite on both sides of the converged bracket.
+    """
+    def above(x: Any) -> np.ndarray:
+        v = value_at(x)
+        return np.isnan(v) | (v > price)
+
+    shape = np.broadcast_shapes(np.shape(value_at(lo)), np.shape(price))
+    ok = np.broadcast_to(above(hi) != above(lo), shape)
+    lo, hi = np.full(shape, lo), np.full(shape, hi)
+    for _ in range(_BISECT_STEPS):
+        mid = (lo + hi) / 2
+        go_left = above(mid) if increasing else ~above(mid)
+        hi = np.where(go_left, mid, hi)
+        lo = np.where(go_left, lo, mid)
+    ok = ok & np.isfinite(value_at(lo)) & np.isfinite(value_at(hi))
+    return np.where(ok, (lo + hi) / 2, np.nan)
+
+
+def sensitivity(
+    eps: Any,
+    price: Any = None,
+    growth: Sequence[float] = GROWTH,
+    discount: Sequence[float] = DISCOUNT,
+    horizon: Optional[Sequence[int]] = None,
+    terminal_growth: float = TERMINAL_GROWTH,
+) -> Dict[str, Any]:
+    """
+    Value grid for one EPS or an array of them: shape (..., growth, discount)
+    or (..., growth, discount, horizon). With prices, also the upside grid
+    (value / price - 1) and the break-even contours
+    break_even_growth (..., discount[, horizon]) and break_even_discount
+    (..., growth[, horizon]).
+    """
+    e = np.asarray(eps, dtype=np.float64)
+    g = np.asarray(growth, dtype=np.float64)
+    r = np.asarray(discount, dtype=np.float64)
+    h = None if horizon is None else np.asarray(horizon, dtype=np.float64)
+    grid = (g[:, None], r[None, :]) if h is None else (g[:, None, None], r[None, :, None])
+    hh = None if h is None else h[None, None, :]
+    extra = 2 if h is None else 3
+    e_ = e.reshape(e.shape + (1,) * extra)
+    out: Dict[str, Any] = {
+        "growth": g,
+        "discount": r,
+        "horizon": h,
+        "terminal_growth": terminal_growth,
+        "value": dcf_value(e_, grid[0], grid[1], hh, terminal_growth),
+    }
+    if price is None:
+        return out
+    p = np.asarray(price, dtype=np.float64)
+    p_ = p.reshape(p.shape + (1,) * extra)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["upside"] = out["value"] / p_ - 1.0
+
+    # Contours drop the solved-for axis: growth x (discount[, horizon]) -> (discount[, horizon]), and vice versa.
+    e1, p1 = e.reshape(e.shape + (1,) * (extra - 1)), p.reshape(p.shape + (1,) * (extra - 1))
+    r1 = r if h is None else r[:, None]
+    g1 = g if h is None else g[:, None]
+    h1 = None if h is None else h[None, :]
+    out["break_even_growth"] = _bisect(lambda x: dcf_value(e1, x, r1, h1, terminal_growth), g.min(), g.max(), p1, True)
+    out["break_even_discount"] = _bisect(lambda x: dcf_value(e1, g1, x, h1, terminal_growth), r.min(), r.max(), p1, False)
+    return out
+
+
+def as_tables(result: Dict[str, Any], index: Any = ()) -> Dict[str, Any]:
+    """JSON-ready copy of a sensitivity() result, or of one ticker's slice of it (`index`): nested lists, NaN -> None."""
+    out = {}
+    for k, v in result.items():
+        if isinstance(v, np.ndarray):
+            v = v if k in ("growth", "discount", "horizon") else v[index]
+            v = np.where(np.isnan(v), None, v).tolist()
+        out[k] = v
+    return out
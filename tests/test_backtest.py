@@ -0,0 +1,41 @@
+import numpy as np
+
+from finsage import backtest
+from finsage.agents import PredictionAgent
+
+
+def _prices(rows=3, days=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (rows, days)), axis=1))
+
+
+def test_rolling_fits_match_prediction_agent_per_day():
+    p = _prices()
+    fit = backtest.rolling_trend(p, window=30)
+    agent = PredictionAgent()
+    for row in (0, 2):
+        for i in (0, 71, p.shape[1] - 30):
+            hist = [{"close": float(c)} for c in p[row, i:i + 30]]
+            out = agent.run("X", {"history": hist})
+            assert np.isclose(fit["forecast"][row, i], out["forecast_next_close"])
+            assert np.isclose(fit["slope"][row, i], out["trend_slope"])
+            assert np.isclose(fit["residual_std"][row, i], out["residual_std"])
+            assert np.allclose([fit["lower"][row, i], fit["upper"][row, i]], out["confidence_interval_approx"])
+
+
+def test_walk_forward_metrics_matrix_vs_series_and_agent():
+    p = _prices(rows=4)
+    m = backtest.walk_forward(p)
+    s = backtest.walk_forward(p[1])
+    assert m["forecasts"] == s["forecasts"] == p.shape[1] - 30
+    for k in ("mae", "rmse", "interval_coverage", "directional_accuracy", "skill"):
+        assert np.isclose(m[k][1], s[k]) and isinstance(s[k], float)
+    assert 0 <= s["interval_coverage"] <= 1 and s["rmse"] >= s["mae"] > 0
+
+    # A clean trend is forecast exactly and always lands inside the band.
+    line = backtest.walk_forward(np.linspace(50, 80, 120) + 0.01 * np.sin(np.arange(120)))
+    assert line["mape"] < 1e-3 and line["interval_coverage"] == 1.0 and line["directional_accuracy"] == 1.0
+
+    hist = [{"close": float(c)} for c in p[1]]
+    out = PredictionAgent().run("X", {"history": hist, "backtest": True})
+    assert np.isclose(out["backtest"]["mae"], s["mae"])
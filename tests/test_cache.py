@@ -0,0 +1,59 @@
+import threading
+import time
+
+from finsage.cache import ResultCache, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry_and_lru_eviction():
+    clock = FakeClock()
+    c = TTLCache(max_entries=2, clock=clock)
+    c.set("a", 1, ttl=10)
+    c.set("b", 2, ttl=10)
+    c.get("a")
+    c.set("c", 3, ttl=10)
+    assert c.get("b") == (False, None)
+    assert c.get("a") == (True, 1)
+    clock.now = 11
+    assert c.get("a") == (False, None)
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = ResultCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"ticker": "NVDA"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("DataAgent", "NVDA", fetch))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r == {"ticker": "NVDA"} for r in results)
+    assert cache.get_or_compute("DataAgent", "NVDA", fetch) == {"ticker": "NVDA"}
+    assert len(calls) == 1
+
+
+def test_error_results_are_not_cached():
+    cache = ResultCache()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        return {"error": "upstream down"}
+
+    cache.get_or_compute("NewsAgent", "TSLA", failing)
+    cache.get_or_compute("NewsAgent", "TSLA", failing)
+    assert len(calls) == 2
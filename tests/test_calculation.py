@@ -6,3 +6,46 @@ def test_pe_calculation():
     context = {"data": {"price": 220.0}, "eps": 4.0}
     out = agent.run("calc", context)
     assert out["pe_calculated"] == 220.0 / 4.0
+
+
+def test_dcf_grid_matches_scalar_dcf_and_break_even_contours():
+    import numpy as np
+    from finsage import valuation
+
+    agent = CalculationAgent()
+    out = agent.run("calc", {"price": 100.0, "eps": 4.0, "scenarios": True})
+    grid = out["dcf_grid"]
+    g, r = grid["growth"].index(0.05), grid["discount"].index(0.10)
+    assert np.isclose(grid["value"][g][r], out["dcf_per_share"])
+    assert grid["value"][grid["growth"].index(0.08)][grid["discount"].index(0.07)] is None  # r <= g
+    # Perpetuity break-even growth in closed form: g* = (r * P - eps) / (P + eps).
+    assert np.allclose(
+        [x for x in grid["break_even_growth"] if x is not None],
+        [(d * 100 - 4) / 104 for d in grid["discount"] if 0 <= (d * 100 - 4) / 104 <= 0.08],
+    )
+
+    spec = {"growth": [0.02, 0.06, 0.1], "discount": [0.08, 0.1, 0.12], "horizon": [5, 10]}
+    many = agent.run_many({"A": {"price": 50.0, "eps": 2.0}, "B": {"price": 80.0, "eps": 5.0}, "C": {}}, spec)
+    assert "error" in many["C"]["dcf_grid"]
+    a, b = many["A"]["dcf_grid"], many["B"]["dcf_grid"]
+    assert np.array(b["value"]).shape == (3, 3, 2)
+    assert np.isclose(a["value"][1][1][0], valuation.dcf_value(2.0, 0.06, 0.1, 5))
+    solved = 0
+    for i, d in enumerate(spec["discount"]):
+        for j, h in enumerate(spec["horizon"]):
+            ge = b["break_even_growth"][i][j]
+            solved += ge is not None
+            assert ge is None or np.isclose(valuation.dcf_value(5.0, ge, d, h), 80.0)
+    assert solved == 3
+    assert agent.run("B", {"price": 80.0, "eps": 5.0, "scenarios": spec})["dcf_grid"] == b
+
+
+def test_loss_making_eps_has_no_break_even():
+    import numpy as np
+    from finsage.valuation import sensitivity
+
+    res = sensitivity([-2.0, 3.0], [50.0, 80.0])
+    assert (res["value"][0][np.isfinite(res["value"][0])] < 0).all()
+    # Values run to -inf at r == g: that edge is not a crossing of the price.
+    assert np.isnan(res["break_even_growth"][0]).all() and np.isnan(res["break_even_discount"][0]).all()
+    assert np.isfinite(res["break_even_growth"][1]).any()
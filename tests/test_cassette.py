@@ -0,0 +1,66 @@
+import itertools
+import time
+
+import pytest
+
+from benchmarks import fixtures
+from finsage import cassette, loadgen
+from finsage.agents import DataAgent, DocumentAgent, LLMAgent, NewsAgent
+from finsage.cache import ResultCache
+from finsage.planner import Planner
+
+PASSAGES = [{"text": "Revenue grew on record deliveries.", "source": "sec.gov/x", "score": 1.0}]
+
+
+def _agents():
+    return (
+        DataAgent().run("TSLA"),
+        DocumentAgent().run("TSLA"),
+        NewsAgent().run("TSLA"),
+        LLMAgent().run("Analyze TSLA", passages=PASSAGES),
+    )
+
+
+def test_replay_matches_recording_without_upstreams(tmp_path):
+    with fixtures.offline(), cassette.patch(cassette.Cassette(str(tmp_path), "record")) as tape:
+        recorded = _agents()
+    assert tape.stats["recorded"] == 6 and all("error" not in r for r in recorded)
+
+    # Outside offline(): any call reaching a real client would go to the network or fail.
+    tape = cassette.Cassette(str(tmp_path), "replay", latency={"google_news_rss": 0.05})
+    with cassette.patch(tape):
+        t0 = time.perf_counter()
+        assert _agents() == recorded
+        assert time.perf_counter() - t0 >= 0.05
+        with pytest.raises(cassette.CassetteMiss):
+            tape.call("yfinance.info", {"ticker": "NOPE"}, lambda: None, dict, dict)
+    assert tape.stats == {"recorded": 0, "replayed": 6, "missed": 1}
+
+    any_tape = cassette.Cassette(str(tmp_path), "replay", miss="any")
+    with cassette.patch(any_tape):
+        assert LLMAgent().run("A question nobody recorded")["text"] == recorded[3]["text"]
+
+
+def test_load_generator_reports_throughput_and_percentiles(tmp_path):
+    with fixtures.offline(), cassette.patch(cassette.Cassette(str(tmp_path), "record")):
+        send = loadgen.planner_target(Planner(cache=ResultCache()))
+        bodies = loadgen.requests_from_mix(loadgen.DEFAULT_MIX, ["TSLA", "AAPL"], seed=1)
+        report = loadgen.run_load(send, bodies, concurrency=2, requests=12)
+    assert report["requests"] == 12 and report["errors"] == 0
+    assert sum(k["requests"] for k in report["by_kind"].values()) == 12
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"] <= report["latency_ms"]["max"]
+
+    paced = loadgen.run_load(lambda body: True, loadgen.requests_from_mix(loadgen.DEFAULT_MIX, ["TSLA"]), rate=200, duration=0.25)
+    assert 15 < paced["requests"] < 100 and paced["mode"].startswith("open loop")
+
+
+def test_app_target_replays_through_backend_app(tmp_path):
+    bodies = list(itertools.islice(loadgen.requests_from_mix(loadgen.DEFAULT_MIX, ["TSLA", "AAPL"], seed=2), 6))
+    with fixtures.offline(), cassette.patch(cassette.Cassette(str(tmp_path), "record")):
+        loadgen.run_load(loadgen.planner_target(Planner(cache=ResultCache())), iter(bodies), concurrency=1, requests=6)
+
+    tape = cassette.Cassette(str(tmp_path), "replay", miss="any")
+    with cassette.patch(tape):
+        report = loadgen.run_load(loadgen.app_target(), iter(bodies), concurrency=2, requests=6)
+    assert report["requests"] == 6 and report["errors"] == 0
+    assert tape.stats["replayed"] > 0 and tape.stats["recorded"] == 0
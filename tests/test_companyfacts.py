@@ -0,0 +1,45 @@
+import json
+import zipfile
+
+from benchmarks import fixtures
+from finsage.agents import CalculationAgent, ValidationAgent
+from finsage.facts import FactsTable, build_table
+from finsage.tickers import TickerDirectory
+
+
+def _dump(tmp_path, ciks):
+    path = tmp_path / "companyfacts.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        for cik in ciks:
+            zf.writestr(f"CIK{cik:010d}.json", json.dumps(fixtures.companyfacts(cik)))
+        zf.writestr(f"CIK{999:010d}.json", json.dumps({"cik": 999, "entityName": "Shell", "facts": {}}))
+    return str(path)
+
+
+def test_build_picks_latest_annual_values_and_loads_memory_mapped(tmp_path):
+    directory = TickerDirectory([{"ticker": "AAA", "cik": 1001}, {"ticker": "BBB", "cik": 1002}, {"ticker": "ZZZ", "cik": 5}])
+    build_table(_dump(tmp_path, [1002, 1001, 1003]), str(tmp_path / "facts"), directory=directory)
+    table = FactsTable.load(str(tmp_path / "facts"))
+
+    assert len(table) == 3  # the filer without facts is dropped
+    doc = fixtures.companyfacts(1001)
+    annual = [e for e in doc["facts"]["us-gaap"]["Revenues"]["units"]["USD"] if e["form"] == "10-K"]
+    row = table.lookup("aaa")
+    assert row["revenue"] == max(annual, key=lambda e: e["end"])["val"]
+    assert row["period_end"] == "2024-09-30" and row["eps"] == row["eps_diluted"]
+    assert table.lookup(cik=1003)["cik"] == 1003 and table.lookup("ZZZ") is None
+    assert table.columns["revenue"].filename is not None  # memory-mapped
+
+
+def test_agents_fall_back_to_and_cross_check_filed_facts(tmp_path):
+    directory = TickerDirectory([{"ticker": "AAA", "cik": 1001}])
+    table = build_table(_dump(tmp_path, [1001]), directory=directory)
+    row = table.lookup("AAA")
+
+    calc = CalculationAgent(facts=table).run("AAA", {"fundamentals": {"regularMarketPrice": 50.0}})
+    assert calc["eps"] == row["eps"] and calc["eps_source"] == "10-K"
+    assert calc["filed"]["market_cap"] == 50.0 * row["shares_outstanding"]
+
+    fundamentals = {"regularMarketPrice": 50.0, "epsTrailingTwelveMonths": row["eps"] * 3, "marketCap": 50.0 * row["shares_outstanding"]}
+    out = ValidationAgent(facts=table).run("AAA", {"fundamentals": fundamentals, "history": [{"close": 50.0}]})
+    assert out["issues"] == ["trailing EPS differs >50% from latest 10-K EPS"]
@@ -0,0 +1,65 @@
+import time
+from unittest import mock
+
+import pytest
+
+from benchmarks import fixtures
+from finsage.compute import ComputeBusy, ComputeExecutor, html_to_text
+
+
+def test_queue_full_raises_compute_busy():
+    ex = ComputeExecutor(workers=1, max_queue=0, model_name=None, block_timeout=0.05)
+    try:
+        running = ex.submit(time.sleep, 0.5)
+        with pytest.raises(ComputeBusy):
+            ex.submit(time.sleep, 0)
+        running.result()
+        # Done-callbacks (which release the slot) run after result() waiters are woken.
+        until = time.monotonic() + 2
+        while ex.pending and time.monotonic() < until:
+            time.sleep(0.001)
+        assert ex.pending == 0
+        assert ex.html_to_text("<p>Item 1A</p><script>x()</script>") == html_to_text("<p>Item 1A</p>")
+    finally:
+        ex.shutdown()
+
+
+def test_busy_pool_surfaces_as_agent_error():
+    from finsage.agents import PredictionAgent, RAGAgent
+
+    class Full:
+        def embed(self, texts, batch_size=32):
+            raise ComputeBusy("compute queue full")
+
+        def submit(self, fn, *args):
+            raise ComputeBusy("compute queue full")
+
+    with fixtures.offline():
+        rag = RAGAgent(executor=Full())
+        assert "queue full" in rag.add_passages([{"id": "a#p0", "text": "Revenue grew.", "source": "x"}])["error"]
+        assert "queue full" in rag.retrieve("revenue")["error"]
+        assert "queue full" in rag.retrieve_many(["revenue"])["error"]
+
+    history = [{"close": 100.0 + i} for i in range(40)]
+    with mock.patch("finsage.montecarlo.default_executor", Full):
+        out = PredictionAgent().run("X", {"history": history, "simulate": {"paths": 10, "steps": 5}})
+    assert "queue full" in out["monte_carlo"]["error"]
+
+
+def test_embedding_model_is_shared_with_the_executor():
+    from finsage import compute
+    from finsage.agents import RAGAgent
+
+    class Pool:
+        model_name = "all-MiniLM-L6-v2"
+
+    with fixtures.offline(), mock.patch.dict("os.environ", {"FINSAGE_EMBED_MODEL": "bge-small-en-v1.5"}):
+        assert RAGAgent().model_name == "bge-small-en-v1.5"
+        with pytest.raises(ValueError, match="does not match"):
+            RAGAgent(executor=Pool())
+        assert RAGAgent(model_name="all-MiniLM-L6-v2", executor=Pool()).model_name == "all-MiniLM-L6-v2"
+
+        with mock.patch.dict("os.environ", {"FINSAGE_COMPUTE_WORKERS": "1"}), \
+                mock.patch.object(compute, "_default_executor", None), mock.patch.object(compute, "ComputeExecutor") as cls:
+            compute.default_executor()
+        assert cls.call_args.kwargs["model_name"] == "bge-small-en-v1.5"
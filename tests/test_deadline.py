@@ -0,0 +1,51 @@
+import itertools
+import time
+
+from benchmarks import fixtures
+from finsage import deadline
+from finsage.cache import ResultCache
+from finsage.planner import Planner
+
+
+def test_slow_stage_is_abandoned_and_reported():
+    with fixtures.offline():
+        planner = Planner(cache=ResultCache())
+        fast_news = planner.news_agent.run
+        planner.news_agent.run = lambda ticker, context=None: time.sleep(1.0) or fast_news(ticker)
+        t0 = time.perf_counter()
+        out = planner.run("Analyze TSLA", tickers=["TSLA"], deadline=0.3)
+        elapsed = time.perf_counter() - t0
+
+    assert elapsed < 0.9
+    assert out["partial"] is True and out["stages"]["missed_deadline"][0] == "news"
+    assert out["metrics"]["pe_calculated"] is not None and out["fundamentals"]
+    assert out["thesis"]  # rule-based fallback when the budget is gone
+
+
+def test_slow_data_stage_still_returns_the_rest():
+    with fixtures.offline():
+        planner = Planner(cache=ResultCache())
+        fast_data = planner.data_agent.run
+        planner.data_agent.run = lambda ticker, context=None: time.sleep(1.0) or fast_data(ticker)
+        out = planner.run("Analyze TSLA", tickers=["TSLA"], deadline=0.3)
+
+    assert out["partial"] is True and "data" in out["stages"]["missed_deadline"]
+    assert out["fundamentals"] is None and out["news"] and out["thesis"]
+    assert "metrics" in out and "validation" in out
+
+
+def test_hedged_call_returns_the_faster_attempt():
+    calls = itertools.count()
+
+    def flaky():
+        if next(calls) == 0:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    t0 = time.perf_counter()
+    assert deadline.hedged("test.upstream", flaky, delay=0.05) == "fast"
+    assert time.perf_counter() - t0 < 0.4
+    assert deadline.hedged("unconfigured.upstream", lambda: "direct") == "direct"
+    with deadline.scope(2.0):
+        assert deadline.timeout(10) <= 2.0
@@ -0,0 +1,34 @@
+from benchmarks import fixtures
+from finsage.agents import RAGAgent
+from finsage.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenizer_keeps_codes_and_form_numbers():
+    toks = tokenize("See Item 1A of the 10-K (CUSIP 88160R101).")
+    assert {"1a", "10-k", "10", "k", "88160r101"} <= set(toks)
+    assert "the" not in toks
+
+
+def test_bm25_ranks_exact_rare_token_first_and_updates_incrementally():
+    idx = BM25Index()
+    idx.add("Revenue growth was strong across segments.")
+    idx.add("Risk factors are described in Item 1A.")
+    assert idx.search("item 1a risk", k=1)[0][0] == 1
+    doc = idx.add("Goodwill impairment charge recorded in Q3.")
+    assert idx.search("goodwill impairment")[0][0] == doc
+    assert idx.search("nonexistent") == []
+
+
+def test_rrf_prefers_documents_ranked_well_by_both():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 2]])
+    assert max(fused, key=fused.get) == 1
+
+
+def test_hybrid_retrieve_surfaces_exact_match():
+    with fixtures.offline():
+        rag = RAGAgent()
+        rag.add_passages(list(fixtures.synthetic_passages(200)))
+        rag.add_passages([{"id": "x#p0", "text": "Form 10-K Item 1A lists CUSIP 88160R101.", "source": "x"}])
+        res = rag.retrieve("CUSIP 88160R101", top_k=3)
+    assert res["results"][0]["id"] == "x#p0"
+    assert res["results"][0]["bm25_score"] > 0
@@ -0,0 +1,46 @@
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from finsage import montecarlo as mc
+from finsage.agents import PredictionAgent
+from finsage.compute import ComputeExecutor
+
+
+def _closes(days=300, seed=0, drift=0.0005, vol=0.02):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(drift, vol, days)))
+
+
+def test_chunked_runs_are_reproducible_across_workers():
+    prices = {"A": _closes(seed=1), "B": _closes(seed=2), "C": _closes()[:2]}
+    kw = dict(paths=30_000, steps=20, seed=7, chunk_size=8_000)
+    inline = mc.simulate_many(prices, **kw)
+    ex = ComputeExecutor(workers=2, model_name=None)
+    try:
+        pooled = mc.simulate_many(prices, executor=ex, **kw)
+    finally:
+        ex.shutdown()
+    assert inline == pooled
+    assert inline["A"]["chunks"] == 4 and inline["A"]["paths"] == 30_000
+    assert inline["A"] != inline["B"] and "error" in inline["C"]
+    assert mc.simulate(prices["A"], method="bootstrap", seed=3) == mc.simulate(prices["A"], method="bootstrap", seed=3)
+    with pytest.raises(ValueError):
+        mc.simulate(prices["A"], method="heston")
+
+
+def test_gbm_matches_lognormal_terminal_distribution():
+    closes = _closes(days=2000, drift=0.0, vol=0.02)
+    out = mc.simulate(closes, paths=200_000, steps=25, seed=0)
+    r = np.diff(np.log(closes))
+    mu, sd = r.mean() * 25, r.std(ddof=1) * 5
+    q = out["terminal_quantiles"]
+    assert np.isclose(q["p50"], closes[-1] * np.exp(mu), rtol=2e-3)
+    assert np.isclose(q["p97.5"], closes[-1] * np.exp(mu + 1.959964 * sd), rtol=5e-3)
+    assert abs(out["prob_loss"] - NormalDist().cdf(-mu / sd)) < 5e-3 and 0 < out["expected_max_drawdown"] < 1
+
+    hist = [{"close": float(c)} for c in closes[-60:]]
+    pred = PredictionAgent().run("X", {"history": hist, "simulate": {"paths": 5_000, "seed": 1}})
+    lo, hi = pred["monte_carlo"]["confidence_interval_mc"]
+    assert lo < closes[-1] < hi
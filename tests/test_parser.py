@@ -0,0 +1,46 @@
+from benchmarks import fixtures
+from backend.services.parser import QueryParser
+from finsage.tickers import TickerDirectory
+
+
+def _parser():
+    return QueryParser(TickerDirectory.from_sec_map(fixtures.sec_ticker_map(fixtures.TICKERS + ["ALL", "NOW", "IT", "ON"])))
+
+
+def test_tickers_are_validated_against_the_dictionary():
+    p = _parser()
+    assert p.extract("SHOULD I BUY TSLA NOW?")["tickers"] == ["TSLA"]
+    # real tickers that are also words only count with "$" or when nothing else matches
+    assert p.extract("Is IT a good time to buy TSLA NOW?")["tickers"] == ["TSLA"]
+    assert p.extract("Should I sell ALL my AAPL stock?")["ticker"] == "AAPL"
+    assert p.extract("Compare $NOW with TSLA")["tickers"] == ["NOW", "TSLA"]
+    assert p.extract("What is ON trading at?")["tickers"] == ["ON"]
+    assert p.extract("what about tsla and all of msft")["tickers"] == ["TSLA", "MSFT"]
+    assert p.extract("Is HDFC.NS a good buy?")["ticker"] == "HDFC.NS"
+    assert p.extract("Compare $aapl with Tesla")["ticker"] == "AAPL"
+
+
+def test_empty_dictionary_falls_back_to_uppercase_heuristic():
+    p = QueryParser()
+    assert p.extract("WHAT is the outlook for HDFC?")["tickers"] == ["HDFC"]
+
+
+def test_intent_scoring_and_batch_parse():
+    p = _parser()
+    assert p.intent("Should I buy AAPL?") == "investment_decision"
+    assert p.intent("latest news and trend updates on risk") == "news_summary"
+    assert p.intent("Forecasting KO") == "prediction_query"
+    assert p.intent("hello") == "general_finance_query"
+    out = p.parse_many(["price of KO today", "price of KO today", "risk of JPM"])
+    assert [o["intent"] for o in out] == ["information_lookup", "information_lookup", "risk_assessment"]
+    assert out[0] is not out[1] and out[2]["ticker"] == "JPM"
+
+
+def test_planner_detects_tickers_with_the_validated_parser():
+    from unittest import mock
+
+    from finsage.planner import Planner
+
+    parser = _parser()
+    with mock.patch("finsage.planner.get_parser", lambda: parser):
+        assert Planner._parse_tickers(None, "WHAT about TSLA and $nvda") == ["TSLA", "NVDA"]
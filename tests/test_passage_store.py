@@ -0,0 +1,93 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from benchmarks import fixtures
+from finsage.agents import DocumentAgent, RAGAgent
+from finsage.compute import html_to_text
+from finsage.passage_store import PassageStore, detect_section
+
+
+def _item(i, ticker, form="10-K", date="2024-01-31", text=None):
+    emb = np.zeros(4, dtype=np.float32)
+    emb[i % 4] = 1.0
+    return {"id": f"{ticker}#{i}", "text": text or f"{ticker} revenue growth in period {i}", "ticker": ticker,
+            "form": form, "filing_date": date, "embedding": emb}
+
+
+def test_filters_select_shard_and_mask_rows_before_scoring():
+    store = PassageStore()
+    store.add([_item(0, "TSLA"), _item(1, "TSLA", form="10-Q", date="2023-05-01"), _item(2, "AAPL")])
+    assert set(store.shards) == {"TSLA", "AAPL"}
+
+    q = np.ones(4, dtype=np.float32)
+    hits = store.search("revenue growth", q, top_k=5, filters={"ticker": "tsla"})
+    assert {h["ticker"] for h in hits} == {"TSLA"} and len(hits) == 2
+
+    hits = store.search("revenue growth", q, top_k=5, filters={"ticker": "TSLA", "form": "10-Q"})
+    assert [h["id"] for h in hits] == ["TSLA#1"]
+
+    hits = store.search("revenue", q, top_k=5, mode="dense", filters={"date_from": "2024-01-01"})
+    assert {h["id"] for h in hits} == {"TSLA#0", "AAPL#2"}
+
+    assert store.search("revenue", q, filters={"ticker": "MSFT"}) == []
+    with pytest.raises(ValueError):
+        store.search("revenue", q, filters={"sector": "Tech"})
+
+
+def test_html_sections_are_detected_and_filterable():
+    text = html_to_text(fixtures.filing_html("https://www.sec.gov/Archives/x", paragraphs=8))
+    lines = text.split("\n")
+    assert len(lines) == 8 and detect_section(lines[0]) == "Item 1A"
+
+    with fixtures.offline():
+        cik = DocumentAgent().run("TSLA")["cik"]
+        rag = RAGAgent()
+        rag.ingest_urls([{"id": "f1", "url": "https://www.sec.gov/Archives/f1", "ticker": "TSLA", "cik": cik,
+                          "form": "10-K", "filing_date": "2024-12-01"}])
+        res = rag.retrieve("risk factor", top_k=3, filters={"ticker": "TSLA", "section": "item 1a"})
+    assert res["results"] and all(h["section"] == "Item 1A" and h["cik"] == cik for h in res["results"])
+
+
+def test_reingest_is_idempotent_and_near_duplicates_are_suppressed():
+    docs = [{"id": f"f{i}", "url": f"https://www.sec.gov/Archives/f{i}", "ticker": "TSLA"} for i in range(3)]
+    with fixtures.offline():
+        rag = RAGAgent()
+        first = rag.ingest_urls(docs)
+        again = rag.ingest_urls(docs)
+        refreshed = rag.ingest_urls(docs, refresh=True)
+        dup = rag.add_passages([{"id": "x#p0", "text": "  " + rag.store.shards["TSLA"].items[0]["text"].upper() + "!",
+                                 "ticker": "TSLA"}])
+    assert first["ingested"] > 0
+    assert again["ingested"] == 0 and again["skipped_documents"] == 3
+    assert refreshed["ingested"] == 0 and refreshed["skipped_documents"] == 3
+    assert dup == {"ingested": 0, "duplicates": 1, "evicted": 0, "index_size": first["index_size"]}
+
+
+
+def test_document_with_only_duplicate_passages_is_not_refetched():
+    url = "https://www.sec.gov/Archives/f0"
+    with fixtures.offline():
+        rag = RAGAgent()
+        rag.ingest_urls([{"id": "f0", "url": url, "ticker": "TSLA"}])
+        copy = rag.ingest_urls([{"id": "f0-copy", "url": url, "ticker": "TSLA"}])
+        assert copy["ingested"] == 0 and rag.store.has_document("f0-copy")
+        with mock.patch.object(rag, "_fetch_text", wraps=rag._fetch_text) as fetch:
+            again = rag.ingest_urls([{"id": "f0-copy", "url": url, "ticker": "TSLA"}])
+    assert again["skipped_documents"] == 1 and fetch.call_count == 0
+    assert rag.delete_document("f0-copy")["deleted"] == 0
+
+def test_lru_eviction_and_tombstone_compaction():
+    store = PassageStore(max_passages=4)
+    store.add([{**_item(i, "TSLA"), "id": f"a#{i}"} for i in range(2)])
+    store.add([{**_item(i + 2, "TSLA"), "id": f"b#{i}"} for i in range(2)])
+    store.touch("a")  # b is now least recently used
+    res = store.add([{**_item(i + 4, "AAPL"), "id": f"c#{i}"} for i in range(2)])
+    assert res["evicted"] == 1 and not store.has_document("b") and len(store) == 4
+
+    q = np.ones(4, dtype=np.float32)
+    assert {h["id"] for h in store.search("revenue", q, top_k=10, filters={"ticker": "TSLA"})} == {"a#0", "a#1"}
+
+    assert store.delete_document("a") == 2 and "TSLA" not in store.shards  # fully dead shard is dropped
+    assert [h["id"] for h in store.search("revenue", q, top_k=10)] != [] and len(store) == 2
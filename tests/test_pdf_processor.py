@@ -0,0 +1,29 @@
+import os
+
+from backend.services.pdf_processor import chunk_text, ingest_pdf
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "Experiments", "Sample.pdf")
+
+
+class ListStore:
+    def __init__(self):
+        self.batches = []
+
+    def add_passages(self, batch):
+        self.batches.append(list(batch))
+
+
+def test_chunk_text_overlaps_on_word_boundaries():
+    text = " ".join(f"word{i}" for i in range(200))
+    chunks = chunk_text(text, chunk_size=100, overlap=20)
+    assert all(len(c) <= 100 for c in chunks)
+    assert chunks[0].split()[-1] in chunks[1]
+
+
+def test_ingest_pdf_inserts_in_batches():
+    store = ListStore()
+    stats = ingest_pdf(SAMPLE, store=store, workers=1, batch_size=4)
+    assert stats["pages"] == 4
+    assert stats["chunks"] == sum(len(b) for b in store.batches)
+    assert all(len(b) <= 4 for b in store.batches)
+    assert store.batches[0][0]["chunk_id"] == "p1_c1"
@@ -0,0 +1,109 @@
+import json
+from unittest import mock
+
+from benchmarks import fixtures
+from finsage.cache import ResultCache
+from finsage.planner import Planner, completed_tickers
+
+
+def test_run_many_streams_jsonl_and_resumes(tmp_path):
+    out = tmp_path / "nightly.jsonl"
+    out.write_text(json.dumps({"ticker": "TSLA", "thesis": "done earlier"}) + "\n" + '{"ticker": "AAPL", "thes')
+
+    with fixtures.offline():
+        planner = Planner(cache=ResultCache())
+        summary = planner.run_many(["TSLA", "AAPL", "msft", "MSFT"], out_path=str(out), concurrency=2)
+
+    assert summary["skipped"] == 2
+    assert summary["completed"] == 2
+    assert completed_tickers(str(out)) == {"TSLA", "AAPL", "MSFT"}
+    lines = [json.loads(x) for x in out.read_text().splitlines()[2:] if x.strip()]  # after the seeded and torn lines
+    assert sorted(r["ticker"] for r in lines) == ["AAPL", "MSFT"]  # one line per ticker, upper-cased
+
+
+def test_fields_projection_skips_unneeded_stages():
+    with fixtures.offline():
+        planner = Planner(cache=ResultCache())
+        out = planner.run("Analyze TSLA", tickers=["TSLA"], fields=["metrics", "validation"])
+        assert set(out) == {"query", "ticker", "metrics", "validation"}
+        assert out["metrics"]["pe_calculated"] is not None
+        # no filings, news or benchmark fetches for these sections
+        assert not planner.cache.has("DocumentAgent", "TSLA") and not planner.cache.has("NewsAgent", "TSLA")
+        assert not planner.cache.has("DataAgent", "SPY")
+        assert "Unknown fields: bogus" in planner.run("Analyze TSLA", tickers=["TSLA"], fields=["bogus"])["error"]
+
+
+def test_rerun_recomputes_only_stages_downstream_of_changed_inputs():
+    with fixtures.offline():
+        planner = Planner(cache=ResultCache())
+        first = planner.run("Analyze TSLA", tickers=["TSLA"])
+        assert "synthesis" in first["stages"]["computed"]
+
+        again = planner.run("Analyze TSLA", tickers=["TSLA"])
+        assert again["stages"]["computed"] == [] and again["thesis"] == first["thesis"]
+
+        news = dict(planner.cache.local.get("NewsAgent:TSLA")[1])
+        news["items"] = list(news.get("items") or []) + [{"title": "TSLA recalls vehicles", "summary": "recall"}]
+        planner.cache.put("NewsAgent", "TSLA", news)
+        changed = planner.run("Analyze TSLA", tickers=["TSLA"])
+    assert sorted(changed["stages"]["computed"]) == ["risk", "synthesis"]
+    assert {"calculation", "prediction", "rag", "validation"} <= set(changed["stages"]["reused"])
+
+
+def test_stream_yields_sections_before_the_slow_tail():
+    with fixtures.offline():
+        planner = Planner(cache=ResultCache())
+        events = list(planner.stream("Analyze TSLA", tickers=["TSLA"]))
+        full = planner.run("Analyze TSLA", tickers=["TSLA"])
+
+    sections = [e["section"] for e in events if e["event"] == "stage"]
+    assert sections[:3] == ["fundamentals", "history_len", "filings"] and sections[-1] == "thesis"
+    assert events[-1]["event"] == "done" and events[-1]["ticker"] == "TSLA"
+    streamed = {e["section"]: e["data"] for e in events if e["event"] == "stage"}
+    assert streamed["risk"] == full["risk"] and streamed["thesis"] == full["thesis"]
+
+
+def test_failed_llm_synthesis_is_not_memoized():
+    calls = []
+
+    def flaky(model, messages, **kwargs):
+        calls.append(model)
+        if len(calls) == 1:
+            raise RuntimeError("upstream 503")
+        return {"choices": [{"message": {"content": "LLM thesis"}}]}
+
+    with fixtures.offline(), mock.patch.object(fixtures._FakeChatCompletion, "create", staticmethod(flaky)):
+        planner = Planner(cache=ResultCache())
+        failed = planner.run("Analyze TSLA", tickers=["TSLA"])
+        assert "synthesis" in failed["stages"]["computed"] and failed["thesis"] != "LLM thesis"
+        retried = planner.run("Analyze TSLA", tickers=["TSLA"])
+    assert len(calls) == 2 and retried["stages"]["computed"] == ["synthesis"]
+    assert retried["thesis"] == "LLM thesis"
+
+
+
+def test_failed_batch_retrieval_is_reported_not_computed():
+    with fixtures.offline():
+        planner = Planner(cache=ResultCache())
+        busy = {"error": "ComputeBusy: embedding pool is full"}
+        with mock.patch.object(planner.rag_agent, "retrieve_many", return_value=busy):
+            failed = {r["ticker"]: r["stages"] for r in planner.iter_many(["TSLA", "AAPL"])}
+        for stages in failed.values():
+            assert "rag" in stages["failed"] and "rag" not in stages["computed"]
+        retried = {r["ticker"]: r["stages"] for r in planner.iter_many(["TSLA", "AAPL"])}
+    assert all("rag" in s["computed"] and not s["failed"] for s in retried.values())
+
+def test_chat_endpoints_take_fields_as_a_list_of_names():
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.routers import chat_router
+
+    with fixtures.offline(), mock.patch.object(chat_router, "_planner", Planner(cache=ResultCache())):
+        client = TestClient(app)
+        res = client.post("/chat/batch", json={"tickers": ["TSLA"], "fields": "metrics"})
+        assert set(json.loads(res.text.splitlines()[0])) == {"query", "ticker", "metrics"}  # a bare name, not "m", "e", ...
+        assert client.post("/chat/batch", json={"tickers": ["TSLA"], "fields": {"metrics": 1}}).json() == {
+            "error": '"fields" must be a list of section names'
+        }
+        events = [json.loads(x) for x in client.post("/chat/stream", json={"tickers": ["TSLA"], "fields": [1]}).text.splitlines()]
+        assert events == [{"event": "error", "error": '"fields" must be a list of section names'}]
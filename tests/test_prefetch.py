@@ -0,0 +1,47 @@
+import threading
+
+from benchmarks import fixtures
+from finsage import telemetry
+from finsage.cache import ResultCache
+from finsage.planner import Planner
+from finsage.prefetch import Prefetcher, TokenBucket, parse_watchlist
+
+
+def test_prefetched_watchlist_requests_are_cache_hits():
+    with fixtures.offline():
+        planner = Planner(cache=ResultCache())
+        pre = Prefetcher(["tsla", "AAPL"], planner, rates={"sec": 0, "google_news_rss": 0, "yfinance": 0})
+        stats = pre.run_once()
+        assert stats["data"]["refreshed"] == 3  # the watchlist plus the SPY benchmark
+        assert stats["news"] == {"rounds": 1, "refreshed": 2, "failed": 0}
+        assert stats["documents"]["ingested"] == 10
+
+        misses = telemetry.REGISTRY.counter_value("finsage_cache_requests_total", {"cache": "DataAgent", "result": "miss"})
+        res = planner.run("Analyze TSLA", tickers=["TSLA"])
+        assert {"data", "documents", "news", "benchmark"} <= set(res["stages"]["reused"])
+        assert telemetry.REGISTRY.counter_value("finsage_cache_requests_total", {"cache": "DataAgent", "result": "miss"}) == misses
+        # Filings were embedded ahead of time; the request only retrieved.
+        assert planner.rag_agent.ingest_urls(planner._filing_docs("TSLA", res))["skipped_documents"] == 5
+
+
+def test_token_bucket_paces_to_rate_and_stops_promptly():
+    now = [0.0]
+    bucket = TokenBucket(rate=4, clock=lambda: now[0])
+    assert [bucket._wait_for(1) for _ in range(4)] == [0, 0, 0, 0]
+    assert bucket._wait_for(1) == 0.25
+    now[0] += 1.0
+    assert bucket._wait_for(6) == 0  # more than the burst: taken from a full bucket, leaving it in debt
+    now[0] += 0.25
+    assert bucket._wait_for(1) == 0.5
+
+    slow = TokenBucket(rate=0.001)
+    stop = threading.Event()
+    stop.set()
+    assert slow.acquire(1, stop) and not slow.acquire(1, stop)
+
+
+def test_parse_watchlist_from_file(tmp_path):
+    path = tmp_path / "watchlist.txt"
+    path.write_text("tsla\nAAPL  # core\n\n# comment\nmsft,tsla\n")
+    assert parse_watchlist(str(path)) == ["TSLA", "AAPL", "MSFT"]
+    assert parse_watchlist("nvda, amd") == ["NVDA", "AMD"]
@@ -0,0 +1,45 @@
+from finsage import telemetry
+from finsage.agents import LLMAgent
+from finsage.prompt import PromptBuilder, TokenCounter
+
+
+def _passage(text, score, source="sec.gov/x"):
+    return {"text": text, "score": score, "source": source}
+
+
+BASE = " ".join(f"word{i}" for i in range(120))
+
+
+def test_packs_best_passages_into_budget_and_drops_overlaps():
+    counter = TokenCounter()
+    passages = [
+        _passage("Low score filler about unrelated matters " * 5, 0.1),
+        _passage(BASE, 0.9),
+        _passage(BASE[: len(BASE) // 2] + " tail text", 0.8),  # mostly inside the best passage
+        _passage("Margins expanded on lower battery costs and higher deliveries this quarter.", 0.5),
+    ]
+    small = PromptBuilder(budget=170, passage_tokens=128, counter=counter).build("Analyze TSLA", passages)
+    assert small["tokens"] <= 170 and small["passages_used"] == 1
+    assert small["passages_dropped"] == {"duplicate": 1, "budget": 2}
+    assert "[1] word0" in small["user"] and "Margins" not in small["user"]
+
+    big = PromptBuilder(budget=4000, counter=counter).build("Analyze TSLA", passages)
+    assert big["passages_used"] == 3 and big["passages_dropped"]["duplicate"] == 1
+    assert big["user"].index("word0") < big["user"].index("Margins") < big["user"].index("Low score")
+    assert big["tokens"] == counter.count(big["system"]) + counter.count(big["user"])
+
+    empty = PromptBuilder(budget=4000, counter=counter).build("Analyze TSLA", None)
+    assert "excerpts" not in empty["user"] and empty["system"] == big["system"]
+
+
+def test_llm_agent_uses_packed_prompt_and_reports_tokens():
+    agent = LLMAgent(prompt_budget=300)
+    built = agent.prompt_builder.build("Analyze TSLA", [_passage(BASE, 1.0), _passage(BASE, 0.5)])
+    assert built["system"] == agent.prompt_builder.system
+    assert "[1] word0" in built["user"] and "[2]" not in built["user"]
+
+    telemetry.REGISTRY.reset()
+    agent._record(agent.prompt_builder.build("Analyze TSLA", [_passage(BASE, 1.0)]), "openai")
+    text = telemetry.render_prometheus()
+    assert 'finsage_prompt_tokens_bucket{backend="openai",le="256"} 1' in text
+    assert 'finsage_prompt_passages_dropped_total{reason="duplicate"} 0' in text
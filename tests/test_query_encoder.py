@@ -0,0 +1,73 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from finsage.query_encoder import QueryEncoder
+
+
+class SlowModel:
+    """Fixed cost per forward pass, like a GPU encoder at small batch sizes."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        time.sleep(self.delay)
+        return np.array([[len(t), sum(map(ord, t))] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_misses_share_forward_passes_and_hits_skip_the_model():
+    model = SlowModel()
+    enc = QueryEncoder(model, cache_size=100, window=0.005)
+    queries = [f"Analyze T{i % 20}" for i in range(64)]
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        vecs = list(pool.map(enc.encode, queries))
+    for q, v in zip(queries, vecs):
+        assert v[0] == len(q) and v[1] == sum(map(ord, q))
+    encoded = [t for b in model.batches for t in b]
+    assert sorted(encoded) == sorted(set(queries))  # each distinct query encoded exactly once
+    assert len(model.batches) < 10
+
+    passes = len(model.batches)
+    assert enc.encode("Analyze T3") is vecs[3]
+    assert [v[1] for v in enc.encode_many(["Analyze T1", "new query", "new query"])] == [sum(map(ord, q)) for q in ("Analyze T1", "new query", "new query")]
+    assert model.batches[passes:] == [["new query"]]
+    with pytest.raises(ValueError):
+        vecs[0][0] = 1.0
+
+
+def test_lru_evicts_and_errors_reach_every_waiter():
+    enc = QueryEncoder(SlowModel(0), cache_size=2, window=0)
+    for q in ("a", "b", "c"):
+        enc.encode(q)
+    assert len(enc) == 2 and enc._cached("a") is None
+
+    def broken(texts):
+        raise RuntimeError("model crashed")
+
+    failing = QueryEncoder(broken, window=0.005)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futs = [pool.submit(failing.encode, "q") for _ in range(4)]
+    for f in futs:
+        with pytest.raises(RuntimeError):
+            f.result()
+
+
+def test_batch_runs_in_the_callers_context():
+    from finsage import telemetry
+
+    def model(texts):
+        with telemetry.span("upstream", "embedding"):
+            return SlowModel(0)(texts)
+
+    enc = QueryEncoder(model, window=0)
+    with telemetry.collect() as spans:
+        enc.encode("Analyze TSLA")
+    assert [(k, n) for k, n, _, _ in spans] == [("upstream", "embedding")]
@@ -0,0 +1,40 @@
+from backend.services.parser import QueryParser
+from finsage.resolver import NameIndex, normalize_name
+from finsage.tickers import TickerDirectory
+
+SEC = {
+    "0": {"cik_str": 1318605, "ticker": "TSLA", "title": "Tesla, Inc."},
+    "1": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."},
+    "2": {"cik_str": 1481832, "ticker": "APLE", "title": "Apple Hospitality REIT, Inc."},
+    "3": {"cik_str": 1144967, "ticker": "HDB", "title": "HDFC BANK LTD"},
+}
+
+
+def _index(tmp_path):
+    extra = tmp_path / "nse.csv"
+    extra.write_text("ticker,name,exchange\nRELIANCE.NS,Reliance Industries Limited,NSE\nHDFCBANK.NS,HDFC Bank Limited,NSE\n")
+    return NameIndex.from_directory(TickerDirectory.from_sec_map(SEC), NameIndex.read_entries(str(extra)))
+
+
+def test_normalize_drops_corporate_suffixes():
+    assert normalize_name("Tesla, Inc.") == "tesla"
+    assert normalize_name("HDFC Bank Ltd") == "hdfc bank"
+
+
+def test_resolve_exact_prefix_and_typo(tmp_path):
+    idx = _index(tmp_path)
+    assert idx.resolve("tesla")[0]["ticker"] == "TSLA"
+    assert idx.resolve("tsla")[0]["score"] == 1.0
+    assert idx.resolve("relia")[0]["ticker"] == "RELIANCE.NS"
+    assert idx.resolve("teslla")[0]["ticker"] == "TSLA"
+    assert [h["ticker"] for h in idx.resolve("HDFC Bank")][:2] == ["HDFCBANK.NS", "HDB"]
+    apple = idx.resolve("apple")
+    assert apple[0]["ticker"] == "AAPL" and apple[1]["ticker"] == "APLE" and apple[1]["score"] < 1.0
+    assert idx.resolve("zzqx") == []
+
+
+def test_parser_resolves_names_when_no_ticker_is_given(tmp_path):
+    p = QueryParser(TickerDirectory.from_sec_map(SEC), _index(tmp_path))
+    assert p.extract("Should I invest in HDFC Bank?") == {"ticker": "HDFCBANK.NS", "tickers": ["HDFCBANK.NS"], "name": "HDFC Bank"}
+    assert p.extract("what about tesla")["ticker"] == "TSLA"
+    assert p.extract("what is the latest news")["ticker"] is None
@@ -0,0 +1,59 @@
+import numpy as np
+
+from finsage import risk_engine as re_
+from finsage.agents import RiskAgent
+
+
+def _prices(rows=3, days=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (rows, days)), axis=1))
+
+
+def test_rolling_metrics_match_per_window_loops():
+    p = _prices()
+    r = re_.returns_from_prices(p)
+    bench = r[0] * 0.5 + np.random.default_rng(1).normal(0, 0.01, r.shape[1])
+    w = 20
+    vol = re_.rolling_volatility(r, w)
+    b = re_.rolling_beta(r, bench, w)
+    for i in (0, 57, r.shape[1] - w):
+        x = r[:, i:i + w]
+        y = bench[i:i + w]
+        assert np.allclose(vol[:, i], x.std(axis=1, ddof=1) * np.sqrt(252))
+        assert np.allclose(b[:, i], [np.cov(row, y)[0, 1] / np.var(y, ddof=1) for row in x])
+
+
+def test_drawdown_var_and_matrix_vs_series():
+    p = np.array([100, 120, 90, 95, 130, 104.0])
+    assert np.isclose(re_.max_drawdown(p), 90 / 120 - 1)
+
+    m = _prices(rows=4)
+    prof = re_.risk_profile(m, benchmark_prices=m[0])
+    single = re_.risk_profile(m[2], benchmark_prices=m[0])
+    for k in ("volatility", "downside_deviation", "max_drawdown", "var_historical", "var_parametric", "beta_recent"):
+        assert np.isclose(prof[k][2], single[k]) and isinstance(single[k], float)
+    assert np.isclose(prof["beta"][0], 1.0)
+    assert single["expected_shortfall"] >= single["var_historical"] > 0
+
+
+def test_risk_agent_uses_history():
+    closes = 100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.05, 90)))
+    hist = [{"date": str(i), "close": float(c)} for i, c in enumerate(closes)]
+    out = RiskAgent().run("X", {"fundamentals": {"marketCap": 5e10}, "history": hist})
+    assert out["metrics"]["volatility"] > 0.5 and any("volatility" in n for n in out["notes"])
+
+
+def test_risk_agent_pairs_benchmark_by_date():
+    rng = np.random.default_rng(4)
+    b_ret = rng.normal(0, 0.01, 120)
+    dates = [f"2024-{1 + i // 28:02d}-{1 + i % 28:02d}" for i in range(121)]
+    bench = 100 * np.concatenate([[1.0], np.cumprod(1 + b_ret)])
+    own = 50 * np.concatenate([[1.0], np.cumprod(1 + 1.5 * b_ret)])
+    bench_hist = [{"date": d, "close": float(c)} for d, c in zip(dates, bench)]
+    # The ticker misses one session mid-history (halt): positional pairing would shift every later return.
+    hist = [{"date": d, "close": float(c)} for i, (d, c) in enumerate(zip(dates, own)) if i != 30]
+    out = RiskAgent().run("X", {"history": hist, "benchmark_history": bench_hist})
+    assert abs(out["metrics"]["beta"] - 1.5) < 0.05 and out["metrics"]["beta_observations"] == 119
+
+    short = RiskAgent().run("X", {"history": hist, "benchmark_history": bench_hist[-10:]})
+    assert short["metrics"]["beta"] is None and "beta_recent" not in short["metrics"]
@@ -0,0 +1,21 @@
+import datetime
+import json
+
+import numpy as np
+
+from finsage import serialize
+
+
+def test_encoders_agree_on_content():
+    payload = {"ticker": "TSLA", "eps": np.float64(4.5), "n": np.int64(3), "vol": np.arange(3, dtype=np.float32),
+               "as_of": datetime.date(2024, 1, 2), "tags": {"x"}}
+    expected = {"ticker": "TSLA", "eps": 4.5, "n": 3, "vol": [0.0, 1.0, 2.0], "as_of": "2024-01-02", "tags": ["x"]}
+    for fmt in serialize.available_formats():
+        raw = serialize.encode(payload, fmt)
+        if fmt == "msgpack":
+            import msgpack
+            assert msgpack.unpackb(raw) == expected
+        else:
+            assert json.loads(raw) == expected
+    negotiated = serialize.resolve_format(None, "application/x-msgpack, */*")
+    assert negotiated == ("msgpack" if serialize.msgpack else serialize.resolve_format())
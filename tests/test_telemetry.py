@@ -0,0 +1,31 @@
+import pytest
+
+from finsage import telemetry
+
+
+def test_span_records_latency_and_errors():
+    reg = telemetry.REGISTRY
+    reg.reset()
+    with telemetry.span("upstream", "sec"):
+        pass
+    with pytest.raises(RuntimeError):
+        with telemetry.span("upstream", "sec"):
+            raise RuntimeError("boom")
+
+    text = telemetry.render_prometheus()
+    assert 'finsage_upstream_duration_seconds_count{upstream="sec"} 2' in text
+    assert 'finsage_upstream_errors_total{upstream="sec"} 1' in text
+    assert '# TYPE finsage_upstream_duration_seconds histogram' in text
+
+
+def test_cache_hit_ratio_and_collect():
+    telemetry.REGISTRY.reset()
+    for hit in (True, True, False, True):
+        telemetry.record_cache("DataAgent", hit)
+    assert 'finsage_cache_hit_ratio{cache="DataAgent"} 0.75' in telemetry.render_prometheus()
+
+    with telemetry.collect() as spans:
+        with telemetry.span("agent", "RiskAgent"):
+            pass
+    summary = telemetry.summarize(spans)
+    assert list(summary["agent"]) == ["RiskAgent"]
@@ -0,0 +1,54 @@
+import numpy as np
+
+from finsage.agents import ComparisonAgent
+from finsage.universe import UniverseSnapshot
+
+
+def _records(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    sectors = ["Technology", "Energy", "Financials"]
+    return [
+        {
+            "ticker": f"T{i:03d}",
+            "sector": sectors[i % 3],
+            "industry": f"{sectors[i % 3]}-{i % 2}",
+            "marketCap": float(np.exp(rng.uniform(20, 28))),
+            "trailingPE": float(rng.uniform(5, 60)) if i % 17 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def test_rank_matches_brute_force_and_survives_save_load(tmp_path):
+    recs = _records()
+    snap = UniverseSnapshot.from_records(recs)
+    path = tmp_path / "u.npz"
+    snap.save(str(path))
+    snap = UniverseSnapshot.load(str(path))
+
+    r = snap.rank("T003")
+    tech_pe = np.array([x["trailingPE"] for x in recs if x["sector"] == "Technology" and x["trailingPE"] is not None])
+    pe = recs[3]["trailingPE"]
+    assert r["group"] == "Technology" and r["group_size"] == sum(x["sector"] == "Technology" for x in recs)
+    assert np.isclose(r["metrics"]["trailingPE"]["percentile"], 100 * ((tech_pe < pe).sum() + 0.5) / len(tech_pe), atol=0.01)
+    assert np.isclose(r["metrics"]["trailingPE"]["zscore"], (pe - tech_pe.mean()) / tech_pe.std(), atol=1e-3)
+    # live fundamentals override the snapshot; unknown tickers can be ranked from their fundamentals
+    assert snap.rank("NEW", fundamentals={"sector": "Energy", "trailingPE": 1.0})["metrics"]["trailingPE"]["percentile"] == 0.0
+    # a live None (field missing from the quote) does not mask the snapshot value
+    assert snap.rank("T003", fundamentals={"sector": None, "trailingPE": None})["metrics"]["trailingPE"] == r["metrics"]["trailingPE"]
+
+
+def test_nearest_peers_by_market_cap():
+    recs = _records()
+    snap = UniverseSnapshot.from_records(recs)
+    peers = snap.nearest_peers("T010", k=4)
+    same = [x for x in recs if x["industry"] == recs[10]["industry"] and x["ticker"] != "T010"]
+    gap = lambda x: abs(np.log(x["marketCap"]) - np.log(recs[10]["marketCap"]))
+    assert [p["ticker"] for p in peers] == [x["ticker"] for x in sorted(same, key=gap)[:4]]
+
+
+def test_comparison_agent_uses_snapshot_without_peers():
+    snap = UniverseSnapshot.from_records(_records())
+    out = ComparisonAgent(universe=snap).run("T001", {"fundamentals": {}})
+    assert out["sector_rank"]["group"] == "Energy"
+    assert len(out["comparisons"]) == 5 and all(c["ticker"] != "T001" for c in out["comparisons"])